@@ -0,0 +1,210 @@
+"""
+Admission control for the expensive endpoints (LLM calls, OCR, uploads).
+
+Every caller has a token bucket: signed-in users by user id, everyone else
+by IP. Each endpoint costs a number of tokens and the bucket size / refill
+rate depend on the caller's membership tier. Over-limit requests are
+rejected with 429 + Retry-After before the body is read, so nothing is
+saved, parsed or sent upstream for them.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import re
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+from config import settings
+from services.rate_limit import TokenBucketStore
+from utils.cache import TTLCache
+from utils.common import client_address
+import api.profile_metrics as profile_metrics
+from api.payment import get_supabase
+
+logger = logging.getLogger("backend")
+
+ANONYMOUS, GUEST, MEMBER = "anonymous", "guest", "member"
+
+
+def _parse_pairs(spec: str) -> Dict[str, str]:
+    pairs = {}
+    for item in spec.split(","):
+        name, _, value = item.strip().partition("=")
+        if name and value:
+            pairs[name.strip()] = value.strip()
+    return pairs
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parses "tier=capacity/refill_per_second,..." into {tier: (capacity, rate)}."""
+    limits = {}
+    for tier, value in _parse_pairs(spec).items():
+        capacity, _, rate = value.partition("/")
+        limits[tier] = (float(capacity), float(rate or 0))
+    return limits
+
+
+def parse_costs(spec: str) -> Dict[str, float]:
+    """Parses "name=tokens,..." into {name: tokens}."""
+    return {name: float(value) for name, value in _parse_pairs(spec).items()}
+
+
+# POST paths that are metered, by cost name
+_ENDPOINTS = [
+    (re.compile(r"^/api/(jobs/)?full-analysis$"), "full-analysis"),
+    (re.compile(r"^/api/(jobs/)?parse-resume(/stream)?$"), "parse-resume"),
+    (re.compile(r"^/api/upload-resume$"), "parse-resume"),
+    (re.compile(r"^/api/parse-resume/bulk$"), "bulk-parse"),
+    (re.compile(r"^/api/candidates/rank$"), "rank"),
+    (re.compile(r"^/api/ats-score$"), "ats-score"),
+    (re.compile(r"^/api/interview$"), "interview"),
+    # A seeded history can start a summary call right away
+    (re.compile(r"^/api/interview/sessions$"), "interview"),
+    (re.compile(r"^/api/interview/sessions/[^/]+/turns$"), "interview"),
+]
+
+
+class AdmissionController:
+    def __init__(self, store: TokenBucketStore, limits: Dict[str, Tuple[float, float]], costs: Dict[str, float]):
+        self.store = store
+        self.enabled = settings.ADMISSION_ENABLED
+        self.limits = limits
+        self.costs = costs
+        # token hash -> (user id, tier); avoids an auth round trip per request
+        self._identities = TTLCache(ttl=settings.ADMISSION_IDENTITY_TTL, max_entries=10000)
+        self.counters = {"admitted": 0, "rejected": 0, "store_errors": 0}
+
+    def cost(self, method: str, path: str) -> Optional[float]:
+        if not self.enabled or method != "POST":
+            return None
+        for pattern, name in _ENDPOINTS:
+            if pattern.match(path):
+                return self.costs.get(name)
+        return None
+
+    def client_ip(self, scope: Scope) -> str:
+        return client_address(Request(scope), settings.TRUSTED_PROXIES)
+
+    async def user_for(self, authorization: Optional[str], client_ip: str) -> Tuple[str, str]:
+        """
+        (user id, tier) for a Bearer token, ("", anonymous) if it doesn't check out. Cached per
+        token. Checking a token not seen before first costs `client_ip`'s bucket "token-check"
+        tokens, so a stream of made-up tokens can't turn into one auth round trip each; once
+        that bucket is empty the caller is simply anonymous.
+        """
+        if not authorization or not authorization.startswith("Bearer "):
+            return "", ANONYMOUS
+        token_key = hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+        identity = self._identities.get(token_key)
+        if identity is None:
+            check_cost = self.costs.get("token-check")
+            if self.enabled and check_cost:
+                admitted, _, _ = await self.admit(f"ip:{client_ip}", ANONYMOUS, check_cost)
+                if not admitted:
+                    return "", ANONYMOUS
+            user_id = await profile_metrics._get_user_id_from_token(authorization)
+            identity = (user_id, await self._tier(user_id)) if user_id else ("", ANONYMOUS)
+            self._identities.set(token_key, identity)
+        return identity
+
+    async def identify(self, headers: Headers, scope: Scope) -> Tuple[str, str]:
+        """(bucket key, tier): the signed-in user when the Bearer token checks out, else the client IP."""
+        client_ip = self.client_ip(scope)
+        user_id, tier = await self.user_for(headers.get("authorization"), client_ip)
+        if user_id:
+            return f"user:{user_id}", tier
+        return f"ip:{client_ip}", ANONYMOUS
+
+    async def charge(self, scope: Scope, name: str) -> bool:
+        """
+        Takes the `name` cost from the caller's bucket from inside a handler, for work
+        metered per item (each resume of a bulk batch) rather than per request.
+        """
+        cost = self.costs.get(name)
+        if not self.enabled or not cost:
+            return True
+        key, tier = await self.identify(Headers(scope=scope), scope)
+        admitted, _, _ = await self.admit(key, tier, cost)
+        return admitted
+
+    async def _tier(self, user_id: str) -> str:
+        supabase = get_supabase()
+        if not supabase:
+            return GUEST
+        try:
+            resp = await asyncio.to_thread(
+                lambda: supabase.table("profiles").select("membership_tier, membership_expiry").eq("id", user_id).execute()
+            )
+        except Exception as e:
+            logger.warning(f"Could not load membership tier for {user_id}: {e}")
+            return GUEST
+        row = resp.data[0] if resp.data else {}
+        if row.get("membership_tier") != MEMBER:
+            return GUEST
+        expiry = row.get("membership_expiry")
+        try:
+            if expiry and datetime.fromisoformat(str(expiry).replace("Z", "+00:00")) < datetime.now(timezone.utc):
+                return GUEST
+        except ValueError:
+            pass
+        return MEMBER
+
+    async def admit(self, key: str, tier: str, cost: float) -> Tuple[bool, float, float]:
+        capacity, rate = self.limits.get(tier) or self.limits[ANONYMOUS]
+        try:
+            admitted, remaining, retry_after = await asyncio.to_thread(self.store.take, key, cost, capacity, rate)
+        except Exception as e:
+            # Fail open: a locked or broken limiter must not take the API down with it
+            self.counters["store_errors"] += 1
+            logger.warning(f"Admission check failed, letting request through: {e}")
+            return True, capacity, 0.0
+        self.counters["admitted" if admitted else "rejected"] += 1
+        return admitted, remaining, retry_after
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cost = self.controller.cost(scope["method"], scope["path"])
+        if not cost:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key, tier = await self.controller.identify(headers, scope)
+        admitted, remaining, retry_after = await self.controller.admit(key, tier, cost)
+        if admitted:
+            await self.app(scope, receive, send)
+            return
+
+        wait = max(1, math.ceil(retry_after))
+        logger.info(f"Rejected {scope['path']} for {key} ({tier}): retry in {wait}s")
+        body = json.dumps({"detail": f"Too many requests, retry in {wait} seconds"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(wait).encode()),
+                (b"x-ratelimit-remaining", str(int(remaining)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+admission_controller = AdmissionController(
+    TokenBucketStore(settings.ADMISSION_DB_PATH),
+    limits=parse_limits(settings.ADMISSION_LIMITS),
+    costs=parse_costs(settings.ADMISSION_COSTS),
+)
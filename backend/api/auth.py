@@ -1,12 +1,15 @@
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import RedirectResponse
-from authlib.integrations.httpx_client import AsyncOAuth2Client
 from config import settings
+from utils.startup import LazyModule
 import httpx
 import secrets
 
 router = APIRouter()
 
+# authlib is only needed once someone actually signs in
+httpx_oauth = LazyModule("authlib.integrations.httpx_client")
+
 GOOGLE_CLIENT_ID = settings.GOOGLE_CLIENT_ID
 GOOGLE_CLIENT_SECRET = settings.GOOGLE_CLIENT_SECRET
 GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
@@ -34,7 +37,7 @@ async def google_login(request: Request, redirect_to: str = "/check-auth"):
 
     callback_url = str(request.base_url).rstrip('/') + "/api/auth/google/callback"
 
-    client = AsyncOAuth2Client(
+    client = httpx_oauth.AsyncOAuth2Client(
         client_id=GOOGLE_CLIENT_ID,
         client_secret=GOOGLE_CLIENT_SECRET,
         redirect_uri=callback_url,
@@ -72,7 +75,7 @@ async def google_callback(request: Request, code: str = None, state: str = None,
 
         callback_url = str(request.base_url).rstrip('/') + "/api/auth/google/callback"
 
-        client = AsyncOAuth2Client(
+        client = httpx_oauth.AsyncOAuth2Client(
             client_id=GOOGLE_CLIENT_ID,
             client_secret=GOOGLE_CLIENT_SECRET,
             redirect_uri=callback_url
@@ -0,0 +1,65 @@
+"""
+Candidate index API: store parsed resumes per signed-in user and rank them against a JD.
+"""
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Request
+from config import settings
+from models.domain import CandidateRequest, CandidateResponse, RankRequest, RankResponse
+from services.candidate_index import candidate_index, candidate_ranker
+from api.admission import admission_controller
+from utils import deadline
+
+router = APIRouter()
+
+
+async def require_owner(request: Request, authorization: Optional[str]) -> str:
+    """The signed-in user's id; candidate lists are private to their owner."""
+    user_id, _ = await admission_controller.user_for(authorization, admission_controller.client_ip(request.scope))
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid or missing authorization")
+    return user_id
+
+
+@router.post("", response_model=CandidateResponse, status_code=201)
+async def add_candidate(request: Request, body: CandidateRequest, authorization: Optional[str] = Header(None)):
+    """Indexes a structured resume (the /parse-resume output) for ranking."""
+    owner = await require_owner(request, authorization)
+    candidate_id = await asyncio.to_thread(
+        candidate_index.upsert, owner, body.resume_data.model_dump(mode="json"), body.name, body.candidate_id
+    )
+    return await asyncio.to_thread(candidate_index.get, owner, candidate_id)
+
+
+@router.get("/{candidate_id}", response_model=CandidateResponse)
+async def get_candidate(request: Request, candidate_id: str, authorization: Optional[str] = Header(None)):
+    owner = await require_owner(request, authorization)
+    candidate = await asyncio.to_thread(candidate_index.get, owner, candidate_id)
+    if candidate is None:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    return candidate
+
+
+@router.delete("/{candidate_id}", status_code=204)
+async def delete_candidate(request: Request, candidate_id: str, authorization: Optional[str] = Header(None)):
+    owner = await require_owner(request, authorization)
+    if not await asyncio.to_thread(candidate_index.delete, owner, candidate_id):
+        raise HTTPException(status_code=404, detail="Candidate not found")
+
+
+@router.post("/rank", response_model=RankResponse)
+async def rank_candidates(request: Request, body: RankRequest, authorization: Optional[str] = Header(None)):
+    """
+    Top-k of the caller's candidates for a JD by lexical score (skills, then experience /
+    project / education wording). With llm_score, the best of them (at most
+    RANK_LLM_MAX_CANDIDATES, each charged like an ATS score) are scored by the LLM and
+    re-ordered by that score; clear non-fits among them are skipped.
+    """
+    owner = await require_owner(request, authorization)
+    top_k = min(body.top_k, settings.RANK_MAX_TOP_K)
+    # Each LLM-scored candidate costs as much as an /ats-score call
+    work = candidate_ranker.rank(
+        owner, body.jd_text, top_k, llm_score=body.llm_score,
+        admit=lambda: admission_controller.charge(request.scope, "rank-llm"),
+    )
+    return await deadline.run(request, work, settings.REQUEST_DEADLINE)
@@ -0,0 +1,90 @@
+"""
+Background job API: submit a document analysis, then poll or subscribe (SSE) for the result.
+"""
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from utils.responses import dumps
+from services.ingest import IngestService
+from models.domain import JobResponse
+from services.jobs import job_queue, QueueFull, TERMINAL_STATES
+from services.storage import upload_store, JOB
+from config import settings
+from api.admission import admission_controller
+from utils.common import client_address
+
+router = APIRouter()
+
+
+def _links(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **job,
+        "status_url": f"/api/jobs/{job['job_id']}",
+        "events_url": f"/api/jobs/{job['job_id']}/events",
+    }
+
+
+async def submitter(request: Request) -> str:
+    """Who a job belongs to: the signed-in user when the Bearer token checks out, else the client address."""
+    key, _ = await admission_controller.identify(request.headers, request.scope)
+    return key
+
+
+async def submit_document(kind: str, request: Request, file: UploadFile, params: Dict[str, Any]) -> Dict[str, Any]:
+    await IngestService.validate_file(file)
+    owner = await submitter(request)
+    # Pinned until the job finishes, so neither TTL nor quota eviction can pull it from under a worker
+    filepath = await IngestService.save_temp(file, owner=client_address(request, settings.TRUSTED_PROXIES), purpose=JOB)
+    try:
+        job = await job_queue.submit(kind, filepath, params, owner)
+    except QueueFull:
+        await upload_store.release(filepath)
+        raise HTTPException(status_code=503, detail="Job queue is full, try again shortly", headers={"Retry-After": "10"})
+    return _links(job)
+
+
+@router.post("/full-analysis", status_code=202, response_model=JobResponse)
+async def submit_full_analysis(request: Request, file: UploadFile = File(...), jd: str = Form(...)):
+    """Queues a full analysis (parse + ATS score); the result matches /api/full-analysis."""
+    return await submit_document("full-analysis", request, file, {"jd": jd})
+
+
+@router.post("/parse-resume", status_code=202, response_model=JobResponse)
+async def submit_parse_resume(request: Request, file: UploadFile = File(...)):
+    """Queues a resume parse; the result matches /api/parse-resume."""
+    return await submit_document("parse-resume", request, file, {})
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(request: Request, job_id: str):
+    job = await job_queue.get(job_id, await submitter(request))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return _links(job)
+
+
+def _sse(event: str, data: Optional[Dict[str, Any]]) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+@router.get("/{job_id}/events")
+async def job_events(request: Request, job_id: str):
+    """
+    Server-Sent Events stream: a `status` event on every state change, then
+    `done` with the final job (result or error). Comment lines keep idle
+    connections open through proxies.
+    """
+    owner = await submitter(request)
+    if await job_queue.get(job_id, owner) is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def stream():
+        async for job in job_queue.watch(job_id, owner=owner):
+            if job is None:
+                yield ": keep-alive\n\n"
+            elif job["status"] in TERMINAL_STATES:
+                yield _sse("done", job)
+            else:
+                yield _sse("status", job)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -1,23 +1,36 @@
 import uuid
-import razorpay
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from config import settings
-from supabase import create_client, Client
 import hmac
 import hashlib
 from datetime import datetime, timedelta, timezone
+from utils.startup import startup_profile
 
 router = APIRouter()
 
-# Initialize Razorpay client
-razorpay_client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID or "dummy", settings.RAZORPAY_KEY_SECRET or "dummy"))
+# Razorpay and Supabase Admin clients are created on first use (see getters below)
+razorpay_client = None
+supabase = None
 
-# Initialize Supabase Admin client
-if settings.SUPABASE_URL and settings.SUPABASE_SERVICE_ROLE_KEY:
-    supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
-else:
-    supabase = None
+
+def get_razorpay_client():
+    global razorpay_client
+    if razorpay_client is None:
+        with startup_profile.timed("initializer", "razorpay_client"):
+            import razorpay
+            razorpay_client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID or "dummy", settings.RAZORPAY_KEY_SECRET or "dummy"))
+    return razorpay_client
+
+
+def get_supabase():
+    """Supabase Admin client, or None when it is not configured."""
+    global supabase
+    if supabase is None and settings.SUPABASE_URL and settings.SUPABASE_SERVICE_ROLE_KEY:
+        with startup_profile.timed("initializer", "supabase_client"):
+            from supabase import create_client
+            supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+    return supabase
 
 class OrderRequest(BaseModel):
     amount: int  # in INR (Rs 50 = amount: 50)
@@ -37,7 +50,7 @@ async def create_order(request: OrderRequest):
             "currency": request.currency,
             "receipt": f"rng_{uuid.uuid4().hex[:24]}",  # Must be unique per order (max 40 chars)
         }
-        order = razorpay_client.order.create(data=data)
+        order = get_razorpay_client().order.create(data=data)
         return {"order_id": order["id"], "amount": order["amount"], "currency": order["currency"]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -56,6 +69,7 @@ async def verify_payment(request: VerificationRequest):
             raise HTTPException(status_code=400, detail="Invalid payment signature")
 
         # Payment is valid, update user in Supabase
+        supabase = get_supabase()
         if not supabase:
             raise HTTPException(status_code=500, detail="Supabase admin client not configured")
         
@@ -7,7 +7,7 @@ from pydantic import BaseModel
 from typing import Optional
 import httpx
 from config import settings
-from api.payment import supabase
+from api.payment import get_supabase
 
 router = APIRouter()
 
@@ -57,6 +57,7 @@ async def increment_profile_metrics(
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid or missing authorization")
 
+    supabase = get_supabase()
     if not supabase:
         raise HTTPException(status_code=500, detail="Supabase not configured")
 
@@ -1,105 +1,264 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Header, Request, Response
 from fastapi.responses import StreamingResponse
 from services.ingest import IngestService
-from services.ocr import OCRService
-from services.parser import parser_service
-from services.structurer import structurer_service
+from services.storage import upload_store
+from services.jobs import job_queue, SUCCEEDED, FAILED
+from config import settings
+from services.ocr import PageBudget
 from services.ats import ats_service
+from services import pipeline
+from services.bulk import bulk_ingest_service, ARCHIVE_EXTENSIONS
+from services.pipeline import memory_monitor
+from services.llm import RESET_FIELD, hedge_report
 from services.interview import interview_service
-from models.domain import JobDescription, ResumeParsingResult
-from models.interview import InterviewRequest
+from services.interview_sessions import interview_sessions, SessionNotFound, SessionBusy
+from models.domain import JobDescription, ResumeParsingResult, ParsedResume, AnalysisResult, FullAnalysisResponse, AtsScoreRequest, UploadResponse
+from models.interview import InterviewRequest, InterviewTurnRequest, InterviewSessionResponse
 from api.payment import router as payment_router
 from api.profile_metrics import router as profile_metrics_router
-import os
+from api.jobs import router as jobs_router, submit_document, submitter
+from api.candidates import router as candidates_router, require_owner
+from api.admission import admission_controller
+from utils.startup import startup_profile
+from utils.common import client_address
+from utils.responses import FastJSONResponse, dumps
+from utils import deadline
+from utils.deadline import RequestAborted
+from utils.memory import DocumentRejected
+import asyncio
 import json
+import os
+from typing import Any, Dict, List, Optional
 
 router = APIRouter()
 router.include_router(payment_router, prefix="/payment", tags=["Payment"])
 router.include_router(profile_metrics_router, prefix="/profile", tags=["Profile"])
+router.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
+router.include_router(candidates_router, prefix="/candidates", tags=["Candidates"])
 
 
 @router.get("/health")
 async def health_check():
+    startup_profile.mark("first_health_check")
     return {"status": "ok"}
 
-@router.post("/upload-resume")
-async def upload_resume(file: UploadFile = File(...)):
-    await IngestService.validate_file(file)
-    filepath = await IngestService.save_temp(file)
-    return {"filename": file.filename, "filepath": filepath, "message": "File uploaded successfully"}
+@router.get("/health/startup", response_class=FastJSONResponse)
+async def startup_report():
+    """Cold-start breakdown: time per import / client initializer and startup milestones."""
+    return startup_profile.report()
+
+@router.get("/health/llm", response_class=FastJSONResponse)
+async def llm_report():
+    """Per call type: observed latency quantiles, current hedge delay and how often hedges fire and win."""
+    return hedge_report()
+
+@router.get("/health/memory", response_class=FastJSONResponse)
+async def memory_report():
+    """Worker RSS (now / peak), memory limits and per-stage growth of recent documents, for sizing workers."""
+    return memory_monitor.report()
+
+@router.get("/health/storage", response_class=FastJSONResponse)
+async def storage_report():
+    """Upload directory usage: files/bytes by purpose, quota, free disk and sweep/eviction counters."""
+    return await upload_store.stats()
+
+@router.post("/upload-resume", response_model=UploadResponse)
+async def upload_resume(request: Request, file: UploadFile = File(...)):
+    # Extraction + LLM parsing start right away in the job queue; the resume_id
+    # can then be passed to /ats-score, /full-analysis and /interview
+    job = await submit_document("parse-resume", request, file, {})
+    return {
+        "filename": file.filename,
+        "resume_id": job["job_id"],
+        "status": job["status"],
+        "message": "File uploaded successfully"
+    }
+
+def _mark_truncated(response: Response, budget: PageBudget):
+    # Oversized documents are cut at the page/char budget; let the client know
+    if budget.truncated:
+        response.headers["X-Document-Truncated"] = "true"
+
+async def _resume_from_handle(request: Request, resume_id: str, response: Optional[Response] = None) -> Dict[str, Any]:
+    """
+    Parsed resume behind a resume_id, waiting (up to RESUME_WAIT_TIMEOUT) for its background parse.
+    Only its uploader can use it; anyone else gets the same 404 as for an unknown id.
+    """
+    job = await job_queue.wait(resume_id, timeout=settings.RESUME_WAIT_TIMEOUT, owner=await submitter(request))
+    if job is None or job["kind"] != "parse-resume":
+        raise HTTPException(status_code=404, detail="Unknown or expired resume_id")
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=422, detail=f"Resume processing failed: {job['error']}")
+    if job["status"] != SUCCEEDED:
+        raise HTTPException(status_code=503, detail="Resume is still being processed", headers={"Retry-After": "5"})
+    if response is not None and job["truncated"]:
+        response.headers["X-Document-Truncated"] = "true"
+    return job["result"]
 
-@router.post("/parse-resume")
-async def parse_resume(file: UploadFile = File(...)):
+@router.post("/parse-resume", response_model=ParsedResume)
+async def parse_resume(request: Request, response: Response, file: UploadFile = File(...)):
     # 1. Ingest
     await IngestService.validate_file(file)
-    filepath = await IngestService.save_temp(file)
+    filepath = await IngestService.save_temp(file, owner=client_address(request, settings.TRUSTED_PROXIES))
     
     try:
-        # 2. OCR & Normalization
-        doc_data = await OCRService.parse_document(filepath)
-        
-        # 3. AI Parsing (LLM)
-        full_text = "\n".join([page.get('text', '') for page in doc_data['pages']])
-        parsed_data = await parser_service.parse_resume(full_text)
-            
-        # 4. Structuring
-        structured_data = structurer_service.structure_resume(parsed_data)
+        # 2. OCR -> AI Parsing (LLM) -> Structuring
+        budget = PageBudget()
+        structured_data = await deadline.run(request, pipeline.parse_document(filepath, budget), settings.REQUEST_DEADLINE)
+        _mark_truncated(response, budget)
         
         return structured_data
         
+    except (RequestAborted, DocumentRejected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         # Cleanup temp file
-        if os.path.exists(filepath):
-            os.remove(filepath)
-
-@router.post("/ats-score")
-async def ats_score(data: dict):
-    # Expects { "resume_data": {...}, "jd_text": "..." }
-    resume_data = data.get("resume_data")
-    jd_text = data.get("jd_text")
-    
-    if not resume_data or not jd_text:
-        raise HTTPException(status_code=400, detail="Missing resume_data or jd_text")
+        await upload_store.release(filepath)
+
+@router.post("/parse-resume/stream")
+async def parse_resume_stream(request: Request, file: UploadFile = File(...)):
+    """
+    Same pipeline as /parse-resume, streamed as NDJSON: a {"event": "field"} line per
+    top-level field as soon as the model has written it (skills usually arrive first),
+    then {"event": "result"} with the structured resume, or {"event": "error"}.
+    {"event": "reset"} means the fields sent so far are void (the model call was
+    answered by another attempt, whose fields follow).
+    """
+    await IngestService.validate_file(file)
+    filepath = await IngestService.save_temp(file, owner=client_address(request, settings.TRUSTED_PROXIES))
+
+    async def events():
+        # Starlette cancels this generator when the client disconnects, which cancels the parse below
+        deadline.start(settings.REQUEST_DEADLINE)
+        budget = PageBudget()
+        fields: asyncio.Queue = asyncio.Queue()
+        parse = asyncio.create_task(
+            pipeline.parse_document(filepath, budget, on_field=lambda key, value: fields.put_nowait((key, value)))
+        )
+        parse.add_done_callback(lambda _: fields.put_nowait(None))
+        try:
+            while (item := await fields.get()) is not None:
+                if item[0] == RESET_FIELD:
+                    yield dumps({"event": "reset"}) + b"\n"
+                    continue
+                yield dumps({"event": "field", "field": item[0], "value": item[1]}) + b"\n"
+            result = ParsedResume.model_validate(await parse).model_dump(mode="json")
+            yield dumps({"event": "result", "data": result, "truncated": budget.truncated}) + b"\n"
+        except Exception as e:
+            yield dumps({"event": "error", "detail": str(e)}) + b"\n"
+        finally:
+            parse.cancel()
+            await upload_store.release(filepath)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@router.post("/parse-resume/bulk")
+async def parse_resume_bulk(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    index: bool = Form(False),
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Parses many resumes at once: ZIP archives and/or individual files. Streams NDJSON,
+    one {"event": "result"} or {"event": "error"} line per resume in completion order
+    (with its "index" and "file" name), then a final {"event": "done"} summary.
+    With index=true (signed in) each parsed resume is also added to the caller's
+    candidate index and its result line carries the "candidate_id".
+    """
+    index_owner = await require_owner(request, authorization) if index else None
+    for file in files:
+        ext = os.path.splitext(file.filename or "")[1].lower()
+        if ext in ARCHIVE_EXTENSIONS:
+            if file.size and file.size > settings.BULK_MAX_ARCHIVE_MB * 1024 * 1024:
+                raise HTTPException(status_code=413, detail=f"Archive too large. Max size: {settings.BULK_MAX_ARCHIVE_MB}MB")
+        else:
+            await IngestService.validate_file(file)
+
+    # The uploads are closed once this handler returns, so keep copies for the stream
+    owner = client_address(request, settings.TRUSTED_PROXIES)
+    saved = []
+    try:
+        for file in files:
+            saved.append((file.filename, await IngestService.save_temp(file, owner=owner)))
+    except BaseException:
+        for _, path in saved:
+            await upload_store.release(path)
+        raise
+
+    async def events():
+        try:
+            async for event in bulk_ingest_service.ingest(
+                saved, owner, index_owner=index_owner, admit=lambda: admission_controller.charge(request.scope, "bulk-resume")
+            ):
+                yield dumps(event) + b"\n"
+        except Exception as e:
+            yield dumps({"event": "error", "detail": str(e)}) + b"\n"
+        finally:
+            for _, path in saved:
+                await upload_store.release(path)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@router.post("/ats-score", response_model=AnalysisResult)
+async def ats_score(request: Request, data: AtsScoreRequest, response: Response):
+    if data.resume_data is not None:
+        resume_data = data.resume_data.model_dump()
+    else:
+        resume_data = await _resume_from_handle(request, data.resume_id, response)
         
-    jd_data = ats_service.process_jd(jd_text)
-    result = await ats_service.calculate_score(resume_data, jd_data)
+    jd_data = ats_service.process_jd(data.jd_text)
+    result = await deadline.run(request, ats_service.calculate_score(resume_data, jd_data), settings.REQUEST_DEADLINE)
     
     return result
 
-@router.post("/full-analysis")
-async def full_analysis(file: UploadFile = File(...), jd: str = Form(...)):
+@router.post("/full-analysis", response_model=FullAnalysisResponse)
+async def full_analysis(
+    request: Request,
+    response: Response,
+    file: Optional[UploadFile] = File(None),
+    jd: str = Form(...),
+    resume_id: Optional[str] = Form(None)
+):
+    # Already uploaded via /upload-resume: only the scoring call is left
+    if file is None:
+        if not resume_id:
+            raise HTTPException(status_code=400, detail="Provide either a file or a resume_id")
+        resume_data = await _resume_from_handle(request, resume_id, response)
+        try:
+            return await deadline.run(request, pipeline.score_resume(resume_data, jd), settings.REQUEST_DEADLINE)
+        except RequestAborted:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
     # 1. Parse Resume
     await IngestService.validate_file(file)
-    filepath = await IngestService.save_temp(file)
+    filepath = await IngestService.save_temp(file, owner=client_address(request, settings.TRUSTED_PROXIES))
     
     try:
-        doc_data = await OCRService.parse_document(filepath)
-        
-        full_text = "\n".join([page.get('text', '') for page in doc_data['pages']])
-        parsed_data = await parser_service.parse_resume(full_text)
-        resume_data = structurer_service.structure_resume(parsed_data)
-        
-        # 2. Process JD
-        jd_data = ats_service.process_jd(jd)
+        # 2. Process JD and 3. ATS Score
+        budget = PageBudget()
+        result = await deadline.run(request, pipeline.full_analysis(filepath, jd, budget), settings.REQUEST_DEADLINE)
+        _mark_truncated(response, budget)
         
-        # 3. ATS Score
-        ats_result = await ats_service.calculate_score(resume_data, jd_data)
-        
-        return {
-            "parsed_resume": resume_data,
-            "ats_analysis": ats_result
-        }
+        return result
         
+    except (RequestAborted, DocumentRejected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-         if os.path.exists(filepath):
-            os.remove(filepath)
+        await upload_store.release(filepath)
 
 @router.post("/interview")
-async def conduct_interview(request: InterviewRequest):
+async def conduct_interview(request: InterviewRequest, http_request: Request):
+    if request.resume_id:
+        request = interview_service.apply_resume(request, await _resume_from_handle(http_request, request.resume_id))
+    # The stream inherits this; Starlette cancels it (and the upstream call) on disconnect
+    deadline.start(settings.INTERVIEW_TURN_TIMEOUT)
     try:
         # Instead of returning a JSON dict, we return a StreamingResponse
         # the generator will yield the content chunks
@@ -109,3 +268,41 @@ async def conduct_interview(request: InterviewRequest):
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/interview/sessions", response_model=InterviewSessionResponse, status_code=201)
+async def create_interview_session(request: InterviewRequest, http_request: Request):
+    # Same body as /interview; the context is stored once and `history` (if any) seeds the transcript
+    if request.resume_id:
+        request = interview_service.apply_resume(request, await _resume_from_handle(http_request, request.resume_id))
+    return await interview_sessions.create(request)
+
+@router.get("/interview/sessions/{session_id}", response_model=InterviewSessionResponse)
+async def get_interview_session(session_id: str):
+    try:
+        return await interview_sessions.get(session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Interview session not found or expired")
+
+@router.delete("/interview/sessions/{session_id}", status_code=204)
+async def delete_interview_session(session_id: str):
+    try:
+        await interview_sessions.delete(session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Interview session not found or expired")
+
+@router.post("/interview/sessions/{session_id}/turns")
+async def interview_turn(session_id: str, turn: InterviewTurnRequest):
+    # Streams the reply like /interview, but only the new message is sent
+    try:
+        prompt = await interview_sessions.start_turn(session_id, turn.message)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Interview session not found or expired")
+    except SessionBusy:
+        raise HTTPException(status_code=409, detail="The previous turn of this session is still in progress")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    deadline.start(settings.INTERVIEW_TURN_TIMEOUT)
+    return StreamingResponse(
+        interview_sessions.stream_turn(session_id, prompt),
+        media_type="text/event-stream"
+    )
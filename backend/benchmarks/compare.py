@@ -0,0 +1,88 @@
+"""
+Diffs two benchmark reports produced by benchmarks.run.
+
+Usage (from the backend directory):
+    python -m benchmarks.compare before.json after.json [--fail-above 10]
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+METRICS: List[Tuple[str, str]] = [
+    ("p50", "latency_ms.p50"),
+    ("p95", "latency_ms.p95"),
+    ("p99", "latency_ms.p99"),
+    ("thru/s", "throughput_per_s"),
+    ("rss MB", "rss_mb.peak"),
+]
+
+
+def _get(result: Dict[str, Any], dotted: str):
+    value: Any = result
+    for part in dotted.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _delta_pct(before, after) -> float | None:
+    if before in (None, 0) or after is None:
+        return None
+    return (after - before) / before * 100.0
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rows = []
+    names = sorted(set(before["results"]) | set(after["results"]))
+    for name in names:
+        b = before["results"].get(name, {})
+        a = after["results"].get(name, {})
+        row = {"name": name, "metrics": {}}
+        for label, path in METRICS:
+            vb, va = _get(b, path), _get(a, path)
+            row["metrics"][label] = {"before": vb, "after": va, "delta_pct": _delta_pct(vb, va)}
+        rows.append(row)
+    return rows
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--fail-above", type=float, default=None,
+                        help="Exit non-zero if any p95 regresses by more than this percentage")
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    regressions = []
+    header = f"{'benchmark':<42}" + "".join(f"{label:>22}" for label, _ in METRICS)
+    print(header)
+    print("-" * len(header))
+    for row in compare(before, after):
+        cells = []
+        for label, _ in METRICS:
+            m = row["metrics"][label]
+            if m["after"] is None:
+                cells.append(f"{'-':>22}")
+                continue
+            delta = f"{m['delta_pct']:+.1f}%" if m["delta_pct"] is not None else "new"
+            cells.append(f"{m['after']:>13} {delta:>8}")
+        print(f"{row['name']:<42}" + "".join(cells))
+        p95 = row["metrics"]["p95"]["delta_pct"]
+        if args.fail_above is not None and p95 is not None and p95 > args.fail_above:
+            regressions.append(row["name"])
+
+    if regressions:
+        print(f"\np95 regressions above {args.fail_above}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Deterministic resume corpus for the offline benchmarks.
+Generates text-layer PDFs, scanned (image-only) PDFs, DOCX and TeX resumes
+of varying length without touching the network.
+"""
+import os
+import random
+from typing import Dict, List, Any
+
+LENGTHS = {"short": 1, "medium": 2, "long": 4}
+
+SKILLS = [
+    "Python", "FastAPI", "Django", "Flask", "React", "Node.js", "TypeScript",
+    "PostgreSQL", "MongoDB", "Redis", "Docker", "Kubernetes", "AWS", "GCP",
+    "GraphQL", "REST APIs", "CI/CD", "Git", "Next.js", "Express", "MySQL",
+]
+
+VERBS = [
+    "Built", "Designed", "Optimized", "Led", "Migrated", "Implemented",
+    "Automated", "Scaled", "Refactored", "Shipped",
+]
+
+OBJECTS = [
+    "a multi-tenant billing service", "the resume parsing pipeline",
+    "an event-driven notification system", "the public REST API",
+    "a real-time analytics dashboard", "the CI/CD deployment workflow",
+    "a document search index", "the authentication gateway",
+]
+
+OUTCOMES = [
+    "cutting p95 latency by 40%", "serving 2M requests per day",
+    "reducing infrastructure cost by 25%", "improving test coverage to 90%",
+    "halving onboarding time for new engineers", "with zero-downtime rollouts",
+]
+
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries"]
+
+SAMPLE_JD = """Full Stack Developer Intern
+
+We are looking for a Full Stack Developer Intern to join our platform team.
+
+Responsibilities:
+- Build and maintain REST APIs using Python and FastAPI
+- Develop responsive user interfaces with React and TypeScript
+- Work with PostgreSQL and Redis for data storage and caching
+- Containerize services with Docker and deploy to AWS
+
+Requirements:
+- Familiarity with Git and CI/CD workflows
+- Experience with GraphQL or Kubernetes is a plus
+"""
+
+CANONICAL_RESUME: Dict[str, Any] = {
+    "personal_info": {"email": "jane.doe@example.com", "phone": "+1 555 0100"},
+    "skills": ["Python", "FastAPI", "React", "TypeScript", "PostgreSQL", "Docker", "AWS", "Git"],
+    "education": ["B.Tech Computer Science, Example University, 2024"],
+    "experience": [
+        "Software Engineering Intern, Acme Corp: Built the public REST API with FastAPI and PostgreSQL",
+        "Backend Developer, Globex: Containerized services with Docker and deployed to AWS",
+    ],
+    "projects": [
+        "ResumeRank: React and TypeScript dashboard for ranking candidates",
+        "DocSearch: Redis-backed document search index",
+    ],
+}
+
+CANONICAL_ATS: Dict[str, Any] = {
+    "job_title": "Full Stack Developer Intern",
+    "ats_score": 0.0,
+    "matched_skills": ["python", "fastapi", "react", "typescript", "postgresql", "docker", "aws", "git"],
+    "missing_skills": ["graphql", "kubernetes", "redis"],
+    "strong_matches": ["python", "fastapi", "react"],
+    "weak_areas": ["graphql", "kubernetes"],
+    "breakdown": {
+        "skill_match": 82.0,
+        "experience_relevance": 74.0,
+        "role_alignment": 80.0,
+        "education_match": 90.0,
+        "recency_continuity": 70.0,
+    },
+}
+
+
+def resume_lines(n_pages: int, seed: int = 0) -> List[str]:
+    """Returns the plain-text lines of a synthetic resume roughly n_pages long."""
+    rng = random.Random(seed)
+    lines = [
+        "Jane Doe",
+        "jane.doe@example.com | +1 555 0100 | github.com/janedoe",
+        "",
+        "TECHNICAL SKILLS",
+        ", ".join(rng.sample(SKILLS, 12)),
+        "",
+        "EDUCATION",
+        "B.Tech Computer Science, Example University, 2024",
+        "",
+        "EXPERIENCE",
+    ]
+    # ~50 lines fit on a page at the font size used below
+    n_roles = max(1, n_pages * 4 - 2)
+    for i in range(n_roles):
+        company = COMPANIES[i % len(COMPANIES)]
+        lines.append(f"Software Engineer, {company} ({2024 - i // 2} - {2025 - i // 2})")
+        for _ in range(5):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using "
+                         f"{rng.choice(SKILLS)} and {rng.choice(SKILLS)}, {rng.choice(OUTCOMES)}")
+        lines.append("")
+    lines.append("PROJECTS")
+    for i in range(max(2, n_pages * 2)):
+        lines.append(f"- Project {i + 1}: {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(SKILLS)}")
+    return lines
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_text_pdf(path: str, lines: List[str], lines_per_page: int = 50) -> None:
+    """Writes a minimal PDF with a real text layer (Helvetica, one Tj per line)."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects: List[bytes] = []
+    n_pages = len(pages)
+    # 1: catalog, 2: pages, 3: font, then (page, content) pairs
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(n_pages))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {n_pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, page_lines in enumerate(pages):
+        stream = ["BT /F1 10 Tf 14 TL 50 760 Td"]
+        for line in page_lines:
+            stream.append(f"({_pdf_escape(line)}) Tj T*")
+        stream.append("ET")
+        content = "\n".join(stream).encode("latin-1", "replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref_pos = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_pos)
+    with open(path, "wb") as f:
+        f.write(bytes(out))
+
+
+def write_scanned_pdf(path: str, lines: List[str], lines_per_page: int = 50, dpi: int = 150) -> None:
+    """Renders the lines into bitmaps and stores them as an image-only PDF (no text layer)."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    try:
+        font = ImageFont.load_default(size=int(dpi / 7))
+    except TypeError:
+        font = ImageFont.load_default()
+    line_height = int(dpi / 5)
+    images = []
+    for i in range(0, max(1, len(lines)), lines_per_page):
+        img = Image.new("L", (width, height), color=255)
+        draw = ImageDraw.Draw(img)
+        y = int(dpi * 0.6)
+        for line in lines[i:i + lines_per_page]:
+            draw.text((int(dpi * 0.7), y), line, fill=0, font=font)
+            y += line_height
+        images.append(img)
+    images[0].save(path, "PDF", resolution=dpi, save_all=True, append_images=images[1:])
+
+
+def write_docx(path: str, lines: List[str]) -> None:
+    import docx
+
+    document = docx.Document()
+    for line in lines:
+        if line.isupper():
+            document.add_heading(line.title(), level=2)
+        else:
+            document.add_paragraph(line)
+    document.save(path)
+
+
+def write_tex(path: str, lines: List[str]) -> None:
+    """Writes a jake's-resume style LaTeX document."""
+    def esc(s: str) -> str:
+        for a, b in (("\\", r"\textbackslash{}"), ("&", r"\&"), ("%", r"\%"), ("$", r"\$"),
+                     ("#", r"\#"), ("_", r"\_"), ("{", r"\{"), ("}", r"\}")):
+            s = s.replace(a, b)
+        return s
+
+    body = [
+        r"\documentclass[letterpaper,11pt]{article}",
+        r"\usepackage[empty]{fullpage}",
+        r"\usepackage{titlesec}",
+        r"\begin{document}",
+        r"\begin{center}\textbf{\Huge " + esc(lines[0]) + r"}\\ \small " + esc(lines[1]) + r"\end{center}",
+    ]
+    in_list = False
+    for line in lines[2:]:
+        if not line:
+            continue
+        if line.isupper():
+            if in_list:
+                body.append(r"\end{itemize}")
+                in_list = False
+            body.append(r"\section{" + esc(line.title()) + "}")
+        elif line.startswith("- "):
+            if not in_list:
+                body.append(r"\begin{itemize}")
+                in_list = True
+            body.append(r"  \item " + esc(line[2:]))
+        else:
+            if in_list:
+                body.append(r"\end{itemize}")
+                in_list = False
+            body.append(r"\textbf{" + esc(line) + r"} \\")
+    if in_list:
+        body.append(r"\end{itemize}")
+    body.append(r"\end{document}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(body) + "\n")
+
+
+WRITERS = {
+    "pdf-text": (".pdf", write_text_pdf),
+    "pdf-scanned": (".pdf", write_scanned_pdf),
+    "docx": (".docx", write_docx),
+    "tex": (".tex", write_tex),
+}
+
+
+def generate_corpus(out_dir: str, kinds: List[str] = None, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Writes one document per (kind, length) into out_dir and returns a manifest.
+    Kinds whose writer dependencies are unavailable are skipped with a reason.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = []
+    for kind in kinds or list(WRITERS):
+        ext, writer = WRITERS[kind]
+        for length, n_pages in LENGTHS.items():
+            path = os.path.join(out_dir, f"{kind}-{length}{ext}")
+            entry = {"kind": kind, "length": length, "pages": n_pages, "path": path}
+            try:
+                writer(path, resume_lines(n_pages, seed=seed))
+                entry["bytes"] = os.path.getsize(path)
+            except ImportError as e:
+                entry["skipped"] = f"missing dependency: {e.name}"
+            manifest.append(entry)
+    return manifest
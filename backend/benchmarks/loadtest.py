@@ -0,0 +1,431 @@
+"""
+Closed-loop load test for a single app instance with concurrency sweeps.
+
+Usage (from the backend directory):
+    python -m benchmarks.loadtest --levels 10,50,200 --duration 20 --out load.json
+    python -m benchmarks.loadtest --transport http --groq-first-token lognormal:0.3,0.4
+
+Each virtual user repeatedly picks an endpoint from the weighted mix, sends the
+request and waits for the full response before sending the next one. Upstream
+HF, Groq and Supabase calls go to the stand-ins in benchmarks.stubs, so latency
+is controlled by the --*-latency options and no network access is needed.
+
+transport=asgi drives the ASGI app directly in this process; transport=http runs
+uvicorn on localhost inside the same event loop and talks to it over TCP.
+Event-loop lag is sampled on the loop that serves the app, so blocking calls in
+request handlers show up as lag spikes.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.corpus import generate_corpus, SAMPLE_JD, CANONICAL_RESUME
+from benchmarks.run import percentile, peak_rss_mb
+from benchmarks.stubs import StubInferenceClient, StubGroq, StubSupabase, StubAuth
+
+DEFAULT_MIX = "parse-resume=3,ats-score=3,interview=2,increment-metrics=2"
+
+
+class Sample:
+    __slots__ = ("endpoint", "status", "latency", "ttfb", "error")
+
+    def __init__(self, endpoint: str, status: int, latency: float, ttfb: float | None, error: str | None = None):
+        self.endpoint = endpoint
+        self.status = status
+        self.latency = latency
+        self.ttfb = ttfb
+        self.error = error
+
+
+class ASGIDriver:
+    """Minimal in-process ASGI client that records time to first body byte."""
+
+    def __init__(self, app):
+        self.app = app
+
+    @asynccontextmanager
+    async def lifespan(self):
+        queue: asyncio.Queue = asyncio.Queue()
+        events: Dict[str, asyncio.Event] = {
+            "lifespan.startup.complete": asyncio.Event(),
+            "lifespan.shutdown.complete": asyncio.Event(),
+        }
+
+        async def receive():
+            return await queue.get()
+
+        async def send(message):
+            if message["type"] in events:
+                events[message["type"]].set()
+            elif message["type"].endswith(".failed"):
+                raise RuntimeError(message.get("message", "lifespan failed"))
+
+        task = asyncio.create_task(self.app({"type": "lifespan", "asgi": {"version": "3.0"}}, receive, send))
+        await queue.put({"type": "lifespan.startup"})
+        await events["lifespan.startup.complete"].wait()
+        try:
+            yield self
+        finally:
+            await queue.put({"type": "lifespan.shutdown"})
+            await asyncio.wait_for(events["lifespan.shutdown.complete"].wait(), timeout=10)
+            await task
+
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      headers: List[Tuple[bytes, bytes]] = ()) -> Tuple[int, float | None, bytes]:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"loadtest"), (b"content-length", str(len(body)).encode())] + list(headers),
+            "client": ("127.0.0.1", 50000),
+            "server": ("loadtest", 80),
+        }
+        started = time.perf_counter()
+        request_sent = False
+        done = asyncio.Event()
+        status = 0
+        ttfb = None
+        chunks: List[bytes] = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status, ttfb
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                if chunk and ttfb is None:
+                    ttfb = time.perf_counter() - started
+                chunks.append(chunk)
+                if not message.get("more_body", False):
+                    done.set()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            done.set()
+        return status, ttfb, b"".join(chunks)
+
+
+class HTTPDriver:
+    """Talks to a uvicorn server started on localhost in the current event loop."""
+
+    def __init__(self, app, port: int, max_connections: int):
+        self.app = app
+        self.port = port
+        self.max_connections = max_connections
+        self._client = None
+
+    @asynccontextmanager
+    async def lifespan(self):
+        import httpx
+        import uvicorn
+
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning",
+                                backlog=4096, timeout_keep_alive=30)
+        server = uvicorn.Server(config)
+        serve_task = asyncio.create_task(server.serve())
+        while not server.started:
+            if serve_task.done():
+                serve_task.result()
+            await asyncio.sleep(0.05)
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        self._client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{self.port}", limits=limits, timeout=300)
+        try:
+            yield self
+        finally:
+            await self._client.aclose()
+            server.should_exit = True
+            await serve_task
+
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      headers: List[Tuple[bytes, bytes]] = ()) -> Tuple[int, float | None, bytes]:
+        started = time.perf_counter()
+        ttfb = None
+        chunks = []
+        hdrs = [(k.decode(), v.decode()) for k, v in headers]
+        async with self._client.stream(method, path, content=body, headers=hdrs) as response:
+            async for chunk in response.aiter_raw():
+                if chunk and ttfb is None:
+                    ttfb = time.perf_counter() - started
+                chunks.append(chunk)
+        return response.status_code, ttfb, b"".join(chunks)
+
+
+def _multipart(fields: Dict[str, str], files: Dict[str, Tuple[str, bytes]]) -> Tuple[bytes, bytes]:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, data) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode() + data + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}".encode()
+
+
+class Workload:
+    """Builds the request for each endpoint in the mix."""
+
+    def __init__(self, document_path: str):
+        with open(document_path, "rb") as f:
+            self.document = f.read()
+        self.document_name = os.path.basename(document_path)
+        json_ct = (b"content-type", b"application/json")
+        self._ats_body = json.dumps({"resume_data": CANONICAL_RESUME, "jd_text": SAMPLE_JD}).encode()
+        interview = {k: v for k, v in CANONICAL_RESUME.items()}
+        interview["jd"] = SAMPLE_JD
+        interview["history"] = [{"role": "user", "content": "Hi, I'm ready to start."}]
+        self._interview_body = json.dumps(interview).encode()
+        self._metrics_body = json.dumps({"resumes": 1}).encode()
+        self._json_ct = json_ct
+
+    def build(self, endpoint: str, user_id: int) -> Tuple[str, str, bytes, List[Tuple[bytes, bytes]]]:
+        if endpoint == "parse-resume":
+            body, ct = _multipart({}, {"file": (self.document_name, self.document)})
+            return "POST", "/api/parse-resume", body, [(b"content-type", ct)]
+        if endpoint == "ats-score":
+            return "POST", "/api/ats-score", self._ats_body, [self._json_ct]
+        if endpoint == "interview":
+            return "POST", "/api/interview", self._interview_body, [self._json_ct]
+        if endpoint == "increment-metrics":
+            auth = (b"authorization", f"Bearer user-{user_id}".encode())
+            return "POST", "/api/profile/increment-metrics", self._metrics_body, [self._json_ct, auth]
+        raise ValueError(f"Unknown endpoint in mix: {endpoint}")
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up from a fixed-interval sleep."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def _latency_stats(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        "mean": round(sum(values) / len(values) * 1000, 3),
+        "p50": round(percentile(values, 50) * 1000, 3),
+        "p95": round(percentile(values, 95) * 1000, 3),
+        "p99": round(percentile(values, 99) * 1000, 3),
+        "max": round(values[-1] * 1000, 3),
+    }
+
+
+async def run_level(driver, workload: Workload, mix: List[Tuple[str, float]], concurrency: int,
+                    duration: float, think_time: float, seed: int) -> Dict[str, Any]:
+    samples: List[Sample] = []
+    stop_at = time.perf_counter() + duration
+    endpoints = [e for e, _ in mix]
+    weights = [w for _, w in mix]
+
+    async def user(uid: int):
+        rng = random.Random(seed * 100003 + uid)
+        while time.perf_counter() < stop_at:
+            endpoint = rng.choices(endpoints, weights)[0]
+            method, path, body, headers = workload.build(endpoint, uid)
+            t0 = time.perf_counter()
+            try:
+                status, ttfb, _ = await driver.request(method, path, body, headers)
+                samples.append(Sample(endpoint, status, time.perf_counter() - t0, ttfb))
+            except Exception as e:
+                samples.append(Sample(endpoint, 0, time.perf_counter() - t0, None, f"{type(e).__name__}: {e}"))
+            if think_time:
+                await asyncio.sleep(rng.uniform(0, 2 * think_time))
+
+    lag = LoopLagMonitor()
+    lag.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await lag.stop()
+
+    per_endpoint: Dict[str, Any] = {}
+    for endpoint in endpoints:
+        rows = [s for s in samples if s.endpoint == endpoint]
+        ok = [s for s in rows if 200 <= s.status < 300]
+        errors = [s for s in rows if not (200 <= s.status < 300)]
+        stats: Dict[str, Any] = {
+            "requests": len(rows),
+            "errors": len(errors),
+            "throughput_per_s": round(len(ok) / elapsed, 3),
+            "latency_ms": _latency_stats([s.latency for s in ok]),
+        }
+        if errors:
+            stats["error_statuses"] = sorted({s.status for s in errors})
+            stats["first_error"] = next((s.error for s in errors if s.error), None)
+        if endpoint == "interview":
+            stats["ttft_ms"] = _latency_stats([s.ttfb for s in ok if s.ttfb is not None])
+        per_endpoint[endpoint] = stats
+
+    ok_total = sum(1 for s in samples if 200 <= s.status < 300)
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests": len(samples),
+        "errors": len(samples) - ok_total,
+        "throughput_per_s": round(ok_total / elapsed, 3),
+        "latency_ms": _latency_stats([s.latency for s in samples if 200 <= s.status < 300]),
+        "event_loop_lag_ms": _latency_stats(lag.samples),
+        "endpoints": per_endpoint,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def install_stand_ins(args, upload_dir: str) -> Dict[str, Any]:
+    from config import settings
+    from services.parser import parser_service
+    from services.ats import ats_service
+    from services.interview import interview_service
+    import api.payment
+    import api.profile_metrics
+    from api.admission import admission_controller
+
+    settings.UPLOAD_DIR = upload_dir
+    stand_ins = {
+        "hf": StubInferenceClient(delay=args.hf_latency),
+        "groq": StubGroq(first_token=args.groq_first_token, per_token=args.groq_per_token),
+        "supabase": StubSupabase(latency=args.supabase_latency),
+        "auth": StubAuth(latency=args.auth_latency),
+    }
+    parser_service.client = stand_ins["hf"]
+    ats_service.client = stand_ins["hf"]
+    interview_service.client = stand_ins["groq"]
+    api.payment.supabase = stand_ins["supabase"]
+    api.profile_metrics._get_user_id_from_token = stand_ins["auth"].get_user_id
+    # One simulated client IP would otherwise be throttled like an abuser
+    admission_controller.enabled = False
+    return stand_ins
+
+
+def _parse_mix(spec: str) -> List[Tuple[str, float]]:
+    mix = []
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition("=")
+        mix.append((name.strip(), float(weight or 1)))
+    return mix
+
+
+async def _main_async(args) -> Dict[str, Any]:
+    from main import app
+
+    workdir = tempfile.TemporaryDirectory(prefix="resumify-load-")
+    manifest = generate_corpus(os.path.join(workdir.name, "corpus"), kinds=[args.document_kind])
+    document = next(d for d in manifest if d["length"] == "medium")
+    upload_dir = os.path.join(workdir.name, "uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    install_stand_ins(args, upload_dir)
+    workload = Workload(document["path"])
+    mix = _parse_mix(args.mix)
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+
+    results = []
+    if args.transport == "http":
+        driver = HTTPDriver(app, args.port, max(levels))
+    else:
+        driver = ASGIDriver(app)
+    async with driver.lifespan():
+        for level in levels:
+            result = await run_level(driver, workload, mix, level, args.duration, args.think_time, args.seed)
+            results.append(result)
+            lat = result["latency_ms"]
+            ttft = result["endpoints"].get("interview", {}).get("ttft_ms", {})
+            print(f"c={level:<4} {result['throughput_per_s']:>9} req/s  p50={lat.get('p50', '-')}ms "
+                  f"p99={lat.get('p99', '-')}ms  loop-lag p99={result['event_loop_lag_ms'].get('p99', '-')}ms "
+                  f"ttft p50={ttft.get('p50', '-')}ms  errors={result['errors']}")
+    workdir.cleanup()
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "transport": args.transport,
+            "mix": dict(mix),
+            "duration_s": args.duration,
+            "think_time_s": args.think_time,
+            "document_kind": args.document_kind,
+            "latencies": {
+                "hf": args.hf_latency,
+                "groq_first_token": args.groq_first_token,
+                "groq_per_token": args.groq_per_token,
+                "supabase": args.supabase_latency,
+                "auth": args.auth_latency,
+            },
+        },
+        "levels": results,
+    }
+
+
+def main(argv: List[str] | None = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="ResumifyNG closed-loop load test")
+    parser.add_argument("--levels", default="10,50,200", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per concurrency level")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between a user's requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight pairs")
+    parser.add_argument("--transport", choices=["asgi", "http"], default="asgi")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--document-kind", default="pdf-text", choices=["pdf-text", "pdf-scanned", "docx", "tex"])
+    parser.add_argument("--hf-latency", default="lognormal:0.8,0.4")
+    parser.add_argument("--groq-first-token", default="lognormal:0.25,0.3")
+    parser.add_argument("--groq-per-token", default="0.005")
+    parser.add_argument("--supabase-latency", default="lognormal:0.05,0.3")
+    parser.add_argument("--auth-latency", default="lognormal:0.04,0.3")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="load_results.json")
+    parser.add_argument("--verbose", action="store_true", help="Keep backend logging enabled")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+    report = asyncio.run(_main_async(args))
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Wrote {args.out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
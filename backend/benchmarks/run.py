@@ -0,0 +1,259 @@
+"""
+Offline benchmark suite for the ingest -> parse -> score pipeline.
+
+Usage (from the backend directory):
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --only parse_document,full_analysis --llm-delay 0.2
+    python -m benchmarks.compare before.json after.json
+
+Every benchmark runs in its own spawned process so that peak RSS is attributable
+to that benchmark alone. LLM calls go to benchmarks.stubs.StubInferenceClient,
+so no network access or API tokens are needed.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from benchmarks.corpus import generate_corpus, SAMPLE_JD, CANONICAL_RESUME
+
+GROUPS = ["parse_document", "structure_resume", "ats_score", "ats_fallback", "full_analysis"]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5 - 1e-9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+
+async def measure(fn: Callable[[], Awaitable[Any]], iterations: int, warmup: int) -> Dict[str, Any]:
+    errors = 0
+    first_error = None
+    for _ in range(warmup):
+        try:
+            await fn()
+        except Exception:
+            pass
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        try:
+            await fn()
+        except Exception as e:
+            errors += 1
+            first_error = first_error or f"{type(e).__name__}: {e}"
+        latencies.append(time.perf_counter() - t0)
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "errors": errors,
+        "first_error": first_error,
+        "throughput_per_s": round(iterations / wall, 3) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+def _install_stubs(llm_delay: float, upload_dir: str) -> None:
+    from config import settings
+    from services.parser import parser_service
+    from services.ats import ats_service
+    from benchmarks.stubs import StubInferenceClient
+    from api.admission import admission_controller
+
+    settings.UPLOAD_DIR = upload_dir
+    parser_service.client = StubInferenceClient(delay=llm_delay)
+    ats_service.client = StubInferenceClient(delay=llm_delay)
+    # The route cases replay the same request back to back from one address
+    admission_controller.enabled = False
+    # Every iteration has to reach the (stub) model rather than the ATS result cache
+    ats_service._results.max_entries = 0
+
+
+def _build_case(group: str, doc: Dict[str, Any] | None) -> Callable[[], Awaitable[Any]]:
+    if group == "parse_document":
+        from services.ocr import OCRService
+
+        return lambda: OCRService.parse_document(doc["path"])
+
+    if group == "structure_resume":
+        from services.structurer import structurer_service
+
+        async def run_structure():
+            return structurer_service.structure_resume(CANONICAL_RESUME)
+        return run_structure
+
+    if group in ("ats_score", "ats_fallback"):
+        from services.ats import ats_service
+
+        jd_data = ats_service.process_jd(SAMPLE_JD)
+        if group == "ats_score":
+            return lambda: ats_service.calculate_score(CANONICAL_RESUME, jd_data)
+
+        async def run_fallback():
+            return ats_service._compute_fallback(CANONICAL_RESUME, jd_data)
+        return run_fallback
+
+    if group == "full_analysis":
+        import httpx
+        from main import app
+
+        with open(doc["path"], "rb") as f:
+            payload = f.read()
+        filename = os.path.basename(doc["path"])
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+        async def run_route():
+            response = await client.post(
+                "/api/full-analysis",
+                files={"file": (filename, payload)},
+                data={"jd": SAMPLE_JD},
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+            return response
+        return run_route
+
+    raise ValueError(f"Unknown benchmark group: {group}")
+
+
+def _run_case(group: str, doc: Dict[str, Any] | None, config: Dict[str, Any], queue) -> None:
+    """Entry point of the spawned benchmark process."""
+    logging.disable(logging.CRITICAL if not config["verbose"] else logging.NOTSET)
+    try:
+        _install_stubs(config["llm_delay"], config["upload_dir"])
+        fn = _build_case(group, doc)
+        rss_before = peak_rss_mb()
+        result = asyncio.run(measure(fn, config["iterations"], config["warmup"]))
+        result["rss_mb"] = {"before": rss_before, "peak": peak_rss_mb()}
+    except Exception as e:
+        result = {"errors": config["iterations"], "first_error": f"{type(e).__name__}: {e}"}
+    queue.put(result)
+
+
+def _collect(proc, queue, iterations: int, poll: float = 1.0) -> Dict[str, Any]:
+    """The child's result, or a failed result if it died (crash, OOM kill) without sending one."""
+    while True:
+        try:
+            return queue.get(timeout=poll)
+        except queue_module.Empty:
+            if proc.is_alive():
+                continue
+        # It may have put the result right before exiting
+        try:
+            return queue.get(timeout=poll)
+        except queue_module.Empty:
+            return {"errors": iterations, "first_error": f"benchmark process died (exit code {proc.exitcode})"}
+
+
+def _cases(groups: List[str], manifest: List[Dict[str, Any]]):
+    for group in groups:
+        if group in ("parse_document", "full_analysis"):
+            for doc in manifest:
+                if "skipped" not in doc:
+                    yield f"{group}[{doc['kind']}-{doc['length']}]", group, doc
+        else:
+            yield group, group, None
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main(argv: List[str] | None = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="ResumifyNG offline pipeline benchmarks")
+    parser.add_argument("--out", default="bench_results.json", help="Where to write the JSON report")
+    parser.add_argument("--only", default="", help=f"Comma-separated subset of: {', '.join(GROUPS)}")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="Stub LLM latency in seconds")
+    parser.add_argument("--corpus-dir", default=None, help="Reuse/keep the generated corpus here")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Keep backend logging enabled")
+    args = parser.parse_args(argv)
+
+    groups = [g.strip() for g in args.only.split(",") if g.strip()] or GROUPS
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown benchmark group(s): {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.TemporaryDirectory(prefix="resumify-bench-")
+    corpus_dir = args.corpus_dir or os.path.join(workdir.name, "corpus")
+    manifest = generate_corpus(corpus_dir, seed=args.seed)
+    config = {
+        "iterations": args.iterations,
+        "warmup": args.warmup,
+        "llm_delay": args.llm_delay,
+        "upload_dir": os.path.join(workdir.name, "uploads"),
+        "verbose": args.verbose,
+    }
+    os.makedirs(config["upload_dir"], exist_ok=True)
+
+    ctx = multiprocessing.get_context("spawn")
+    results: Dict[str, Any] = {}
+    for name, group, doc in _cases(groups, manifest):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_case, args=(group, doc, config, queue))
+        proc.start()
+        result = _collect(proc, queue, config["iterations"])
+        proc.join()
+        result["group"] = group
+        if doc:
+            result["document"] = {k: doc[k] for k in ("kind", "length", "pages", "bytes")}
+        results[name] = result
+        lat = result.get("latency_ms", {})
+        print(f"{name:<42} p50={lat.get('p50', '-'):>10} p95={lat.get('p95', '-'):>10} "
+              f"rss={result.get('rss_mb', {}).get('peak', '-')}MB errors={result.get('errors', 0)}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {k: v for k, v in config.items() if k != "upload_dir"},
+            "corpus": [{k: v for k, v in d.items() if k != "path"} for d in manifest],
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Wrote {args.out}")
+    workdir.cleanup()
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Local stand-ins for the upstream services (HF Inference, Groq, Supabase) used by
+the benchmarks and the load-test harness.
+
+Latencies are given as a Latency spec string:
+    "0.2"                     constant 200 ms
+    "const:0.2"               constant 200 ms
+    "uniform:0.1,0.5"         uniform between 100 and 500 ms
+    "lognormal:0.3,0.5"       lognormal with median 300 ms and sigma 0.5
+"""
+import asyncio
+import json
+import math
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Union
+
+from benchmarks.corpus import CANONICAL_RESUME, CANONICAL_ATS
+
+
+class Latency:
+    def __init__(self, spec: Union[str, float, int, "Latency", None] = 0.0, seed: int | None = None):
+        self.spec = str(spec if spec is not None else 0.0)
+        self._rng = random.Random(seed)
+        if isinstance(spec, Latency):
+            self.kind, self.params = spec.kind, spec.params
+            return
+        kind, _, args = self.spec.partition(":")
+        if not args:
+            kind, args = "const", kind
+        self.kind = kind
+        self.params = [float(x) for x in args.split(",") if x]
+        expected = {"const": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {self.spec!r}")
+
+    def sample(self) -> float:
+        if self.kind == "const":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self._rng.uniform(*self.params)
+        median, sigma = self.params
+        return self._rng.lognormvariate(math.log(median) if median > 0 else -20, sigma)
+
+    def __repr__(self):
+        return f"Latency({self.spec!r})"
+
+
+def _json_answer(messages: List[Dict[str, Any]], default: Dict[str, Any] | None = None) -> str | None:
+    """Canonical fenced JSON for the parser / ATS prompts, None for anything else (unless a default is given)."""
+    prompt = messages[-1]["content"]
+    if "ATS (Applicant Tracking System)" in prompt:
+        payload = CANONICAL_ATS
+    elif "expert resume parser" in prompt:
+        payload = CANONICAL_RESUME
+    else:
+        payload = default
+    return "```json\n" + json.dumps(payload, indent=2) + "\n```" if payload is not None else None
+
+
+def _completion(content: str) -> SimpleNamespace:
+    message = SimpleNamespace(role="assistant", content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+
+class StubInferenceClient:
+    """
+    Deterministic replacement for huggingface_hub.AsyncInferenceClient.
+    Answers resume-parsing prompts with CANONICAL_RESUME and ATS prompts with
+    CANONICAL_ATS (wrapped in a ```json fence like the real model) after `delay` seconds.
+    With stream=True the answer arrives in `chunk_size`-character deltas, `per_chunk` apart.
+    """
+
+    def __init__(self, delay: Union[str, float, Latency] = 0.0,
+                 per_chunk: Union[str, float, Latency] = 0.0, chunk_size: int = 16):
+        self.latency = Latency(delay)
+        self.per_chunk_latency = Latency(per_chunk)
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    def _answer(self, messages: List[Dict[str, Any]]) -> str:
+        return _json_answer(messages, default=CANONICAL_RESUME)
+
+    async def chat_completion(self, messages: List[Dict[str, Any]], stream: bool = False, **kwargs):
+        self.calls += 1
+        delay = self.latency.sample()
+        if delay:
+            await asyncio.sleep(delay)
+        if stream:
+            return self._iter_chunks(self._answer(messages))
+        return _completion(self._answer(messages))
+
+    async def _iter_chunks(self, answer: str):
+        for i in range(0, len(answer), self.chunk_size):
+            if i:
+                await asyncio.sleep(self.per_chunk_latency.sample())
+            delta = SimpleNamespace(content=answer[i:i + self.chunk_size])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+INTERVIEW_REPLY = (
+    "Hello, I am the AI Technical Interviewer. Thanks for joining today. "
+    "I see you have built REST APIs with FastAPI and PostgreSQL. "
+    "Can you walk me through how you designed the data model and handled migrations?"
+)
+
+
+class _StubStream:
+    """Like groq's AsyncStream: iterable, and closes the underlying stream on `async with` exit."""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    def __aiter__(self):
+        return self._chunks
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._chunks.aclose()
+
+
+class _StubGroqCompletions:
+    def __init__(self, owner: "StubGroq"):
+        self._owner = owner
+
+    async def create(self, model: str, messages: List[Dict[str, Any]], stream: bool = False, **kwargs):
+        owner = self._owner
+        owner.calls += 1
+        owner.last_messages = messages
+        await asyncio.sleep(owner.first_token_latency.sample())
+        # Parser / ATS prompts arrive here when hedged from the HF client
+        reply = _json_answer(messages) or owner.reply
+        if not stream:
+            return _completion(reply)
+        return _StubStream(owner._iter_chunks(reply))
+
+
+class StubGroq:
+    """
+    Replacement for the groq.AsyncGroq client used by InterviewService.
+    Sleeps `first_token` before the first chunk and `per_token` between chunks;
+    the latest prompt is kept in `last_messages` so benchmarks can check its size.
+    """
+
+    def __init__(self, first_token: Union[str, float, Latency] = 0.0,
+                 per_token: Union[str, float, Latency] = 0.0, reply: str = INTERVIEW_REPLY):
+        self.first_token_latency = Latency(first_token)
+        self.per_token_latency = Latency(per_token)
+        self.reply = reply
+        self.calls = 0
+        self.last_messages: List[Dict[str, Any]] = []
+        self.chat = SimpleNamespace(completions=_StubGroqCompletions(self))
+
+    async def _iter_chunks(self, reply: str):
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(self.per_token_latency.sample())
+            delta = SimpleNamespace(content=word + (" " if i < len(words) - 1 else ""))
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class _StubQuery:
+    def __init__(self, owner: "StubSupabase", table: str):
+        self._owner = owner
+        self._table = table
+        self._op = "select"
+        self._payload: Dict[str, Any] | None = None
+        self._filters: Dict[str, Any] = {}
+
+    def select(self, *columns, **kwargs):
+        self._op = "select"
+        return self
+
+    def update(self, payload: Dict[str, Any]):
+        self._op, self._payload = "update", payload
+        return self
+
+    def upsert(self, payload: Dict[str, Any]):
+        self._op, self._payload = "upsert", payload
+        return self
+
+    def eq(self, column: str, value: Any):
+        self._filters[column] = value
+        return self
+
+    def execute(self):
+        owner = self._owner
+        owner.calls += 1
+        # Blocking on purpose, like supabase-py's synchronous client.
+        time.sleep(owner.latency.sample())
+        rows = owner.tables.setdefault(self._table, {})
+        if self._op == "upsert":
+            row = rows.setdefault(self._payload["id"], {})
+            row.update(self._payload)
+            return SimpleNamespace(data=[dict(row)])
+        matched = [r for r in rows.values() if all(r.get(k) == v for k, v in self._filters.items())]
+        if self._op == "update":
+            for r in matched:
+                r.update(self._payload)
+        return SimpleNamespace(data=[dict(r) for r in matched])
+
+
+class StubSupabase:
+    """In-memory replacement for the synchronous supabase-py admin client."""
+
+    def __init__(self, latency: Union[str, float, Latency] = 0.0):
+        self.latency = Latency(latency)
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.calls = 0
+
+    def table(self, name: str) -> _StubQuery:
+        return _StubQuery(self, name)
+
+
+class StubAuth:
+    """
+    Stand-in for the Supabase GoTrue /auth/v1/user lookup used to resolve
+    Bearer tokens. Tokens of the form "user-<id>" resolve to "<id>".
+    """
+
+    def __init__(self, latency: Union[str, float, Latency] = 0.0):
+        self.latency = Latency(latency)
+        self.calls = 0
+
+    async def get_user_id(self, authorization: str | None) -> str | None:
+        self.calls += 1
+        delay = self.latency.sample()
+        if delay:
+            await asyncio.sleep(delay)
+        if not authorization or not authorization.startswith("Bearer user-"):
+            return None
+        return authorization[len("Bearer user-"):]
@@ -11,7 +11,117 @@ class Settings:
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10 MB
     ALLOWED_EXTENSIONS: set = {".pdf", ".docx", ".tex"}
     UPLOAD_DIR: str = os.path.join(os.getcwd(), "uploads")
-    
+    UPLOAD_TTL: int = int(os.getenv("UPLOAD_TTL", "3600"))  # seconds an uploaded file is kept
+    UPLOAD_QUOTA_MB: int = int(os.getenv("UPLOAD_QUOTA_MB", "1024"))  # total size of UPLOAD_DIR (0 = unlimited)
+    UPLOAD_SWEEP_INTERVAL: int = int(os.getenv("UPLOAD_SWEEP_INTERVAL", "60"))
+    UPLOAD_ORPHAN_GRACE: int = int(os.getenv("UPLOAD_ORPHAN_GRACE", "300"))  # unregistered files younger than this are left alone
+
+    # Local state (job queue, upload registry) lives in SQLite files here
+    DATA_DIR: str = os.getenv("DATA_DIR", os.path.join(os.getcwd(), "data"))
+    STORAGE_DB_PATH: str = os.getenv("STORAGE_DB_PATH", os.path.join(DATA_DIR, "storage.sqlite3"))
+
+    # Extraction budget per document (0 = unlimited); anything beyond is dropped
+    MAX_DOCUMENT_PAGES: int = int(os.getenv("MAX_DOCUMENT_PAGES", "10"))
+    MAX_DOCUMENT_CHARS: int = int(os.getenv("MAX_DOCUMENT_CHARS", "30000"))
+
+    # Memory guardrails for document processing (0 disables a limit); over-limit documents get 413 / 422
+    DOC_MEMORY_LIMIT_MB: int = int(os.getenv("DOC_MEMORY_LIMIT_MB", "512"))  # RSS growth allowed while processing one document alone in the worker
+    WORKER_RSS_LIMIT_MB: int = int(os.getenv("WORKER_RSS_LIMIT_MB", "0"))  # stop document work above this process RSS
+    MAX_PAGE_MEGAPIXELS: float = float(os.getenv("MAX_PAGE_MEGAPIXELS", "40"))  # page size at OCR_DPI; A4 at 300 dpi is ~8.7
+    MAX_PAGE_CHARS: int = int(os.getenv("MAX_PAGE_CHARS", "20000"))  # characters in a PDF page's text layer
+    MEMORY_TRACEMALLOC: bool = os.getenv("MEMORY_TRACEMALLOC", "0") == "1"  # also report Python-heap peaks (slows allocation)
+
+    # OCR fallback for scanned / image-only PDF pages
+    OCR_DPI: int = int(os.getenv("OCR_DPI", "300"))
+    OCR_MIN_TEXT_CHARS: int = int(os.getenv("OCR_MIN_TEXT_CHARS", "20"))  # below this a page is treated as scanned
+    OCR_MAX_WORKERS: int = int(os.getenv("OCR_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+    OCR_PAGE_TIMEOUT: int = int(os.getenv("OCR_PAGE_TIMEOUT", "30"))  # seconds, per rasterize/tesseract call
+    OCR_LANG: str = os.getenv("OCR_LANG", "eng")
+
+    # LaTeX ingestion: pure-Python fast path first, then a warm pool of `pandoc server` workers
+    TEX_FAST_PATH: bool = os.getenv("TEX_FAST_PATH", "1") == "1"
+    PANDOC_POOL_SIZE: int = int(os.getenv("PANDOC_POOL_SIZE", "2"))
+    PANDOC_TIMEOUT: int = int(os.getenv("PANDOC_TIMEOUT", "20"))  # seconds
+
+    # Background jobs: SQLite-backed queue for /api/jobs/*
+    JOBS_DB_PATH: str = os.getenv("JOBS_DB_PATH", os.path.join(DATA_DIR, "jobs.sqlite3"))
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))  # concurrent jobs per process
+    JOB_QUEUE_MAX: int = int(os.getenv("JOB_QUEUE_MAX", "100"))  # pending jobs before submissions get 503
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # transient LLM errors are retried; also caps reruns after a worker died mid-job
+    JOB_RETRY_BACKOFF: float = float(os.getenv("JOB_RETRY_BACKOFF", "2"))  # seconds, doubled per attempt
+    JOB_RESULT_TTL: int = int(os.getenv("JOB_RESULT_TTL", "3600"))  # seconds a finished job stays readable
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "600"))  # a running job whose worker stopped renewing this long is reclaimed
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+    JOB_SWEEP_INTERVAL: int = int(os.getenv("JOB_SWEEP_INTERVAL", "60"))
+    RESUME_WAIT_TIMEOUT: float = float(os.getenv("RESUME_WAIT_TIMEOUT", "60"))  # how long a resume_id request waits on its parse
+
+    # Interview sessions: server-side history, older turns folded into a running summary
+    INTERVIEW_DB_PATH: str = os.getenv("INTERVIEW_DB_PATH", os.path.join(DATA_DIR, "interviews.sqlite3"))
+    INTERVIEW_SESSION_TTL: int = int(os.getenv("INTERVIEW_SESSION_TTL", "7200"))  # seconds of inactivity before a session expires
+    INTERVIEW_SUMMARY_TRIGGER_TOKENS: int = int(os.getenv("INTERVIEW_SUMMARY_TRIGGER_TOKENS", "1500"))  # unsummarized history that starts a summary
+    INTERVIEW_KEEP_RECENT_MESSAGES: int = int(os.getenv("INTERVIEW_KEEP_RECENT_MESSAGES", "6"))  # always sent verbatim
+    INTERVIEW_HISTORY_MAX_TOKENS: int = int(os.getenv("INTERVIEW_HISTORY_MAX_TOKENS", "3000"))  # hard cap while a summary is pending
+    INTERVIEW_TURN_TIMEOUT: int = int(os.getenv("INTERVIEW_TURN_TIMEOUT", "120"))  # a stuck turn stops blocking the session after this
+    INTERVIEW_SUMMARY_MODEL: str = os.getenv("INTERVIEW_SUMMARY_MODEL", "llama-3.1-8b-instant")
+    # Opening question generated in the background as soon as an analysis finishes
+    INTERVIEW_OPENING_PREFETCH: bool = os.getenv("INTERVIEW_OPENING_PREFETCH", "1") == "1"
+    INTERVIEW_OPENING_TTL: int = int(os.getenv("INTERVIEW_OPENING_TTL", "900"))  # seconds a prefetched opening stays usable
+    INTERVIEW_OPENING_CACHE_SIZE: int = int(os.getenv("INTERVIEW_OPENING_CACHE_SIZE", "256"))
+
+    # LLM tail latency: a slow HF call is duplicated to Groq after the observed p90, under a hard deadline
+    LLM_HEDGE_MODEL: str = os.getenv("LLM_HEDGE_MODEL", "llama-3.3-70b-versatile")  # empty disables hedging
+    LLM_HEDGE_QUANTILE: float = float(os.getenv("LLM_HEDGE_QUANTILE", "0.9"))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))  # below this the initial delay is used
+    LLM_HEDGE_INITIAL_DELAY: float = float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "8"))  # seconds
+    LLM_HEDGE_MIN_DELAY: float = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1"))  # seconds
+    LLM_PARSE_HEDGE: bool = os.getenv("LLM_PARSE_HEDGE", "1") == "1"
+    LLM_PARSE_DEADLINE: float = float(os.getenv("LLM_PARSE_DEADLINE", "60"))  # seconds
+    LLM_ATS_HEDGE: bool = os.getenv("LLM_ATS_HEDGE", "1") == "1"
+    LLM_ATS_DEADLINE: float = float(os.getenv("LLM_ATS_DEADLINE", "60"))  # seconds
+
+    # Whole-request budget for the synchronous parse / analysis / scoring routes; work stops when it runs out
+    # or the client disconnects. Interview streams are bounded by INTERVIEW_TURN_TIMEOUT instead.
+    REQUEST_DEADLINE: float = float(os.getenv("REQUEST_DEADLINE", "90"))  # seconds
+
+    # Bulk ingestion (/api/parse-resume/bulk): ZIP archives or several files in, NDJSON out
+    BULK_EXTRACT_WORKERS: int = int(os.getenv("BULK_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))  # extraction processes (0 = in-process)
+    BULK_LLM_CONCURRENCY: int = int(os.getenv("BULK_LLM_CONCURRENCY", "4"))  # parse calls in flight across all bulk requests
+    BULK_MAX_IN_FLIGHT: int = int(os.getenv("BULK_MAX_IN_FLIGHT", "8"))  # resumes copied out of the archive but not finished, per request
+    BULK_MAX_FILES: int = int(os.getenv("BULK_MAX_FILES", "500"))
+    BULK_MAX_ARCHIVE_MB: int = int(os.getenv("BULK_MAX_ARCHIVE_MB", "100"))
+    BULK_MAX_TOTAL_MB: int = int(os.getenv("BULK_MAX_TOTAL_MB", "1024"))  # uncompressed size of all entries together
+    BULK_MAX_COMPRESSION_RATIO: float = float(os.getenv("BULK_MAX_COMPRESSION_RATIO", "100"))  # zip-bomb guard, per entry
+
+    # Candidate index (/api/candidates): per-user resume store ranked against a JD
+    CANDIDATE_DB_PATH: str = os.getenv("CANDIDATE_DB_PATH", os.path.join(DATA_DIR, "candidates.sqlite3"))
+    RANK_MAX_TOP_K: int = int(os.getenv("RANK_MAX_TOP_K", "100"))
+    RANK_MAX_DF: float = float(os.getenv("RANK_MAX_DF", "0.5"))  # words in more than this share of resumes are ignored
+    RANK_LLM_CONCURRENCY: int = int(os.getenv("RANK_LLM_CONCURRENCY", "4"))
+    RANK_LLM_MAX_CANDIDATES: int = int(os.getenv("RANK_LLM_MAX_CANDIDATES", "10"))  # llm_score sends at most this many to the LLM
+    RANK_LLM_MIN_RELATIVE_SCORE: float = float(os.getenv("RANK_LLM_MIN_RELATIVE_SCORE", "0.3"))  # vs. the best match; below it no LLM call
+
+    # Near-duplicate JDs share a canonical id, which keys the ATS result and opening question caches
+    JD_DB_PATH: str = os.getenv("JD_DB_PATH", os.path.join(DATA_DIR, "jds.sqlite3"))
+    JD_DEDUP_THRESHOLD: float = float(os.getenv("JD_DEDUP_THRESHOLD", "0.85"))  # estimated shingle Jaccard; 1 = identical words only
+    JD_MINHASH_PERMUTATIONS: int = int(os.getenv("JD_MINHASH_PERMUTATIONS", "128"))
+    JD_SHINGLE_WORDS: int = int(os.getenv("JD_SHINGLE_WORDS", "3"))
+    JD_REGISTRY_TTL_DAYS: float = float(os.getenv("JD_REGISTRY_TTL_DAYS", "90"))  # forget JDs not seen for this long; 0 = never
+    ATS_CACHE_TTL: int = int(os.getenv("ATS_CACHE_TTL", "3600"))  # seconds an ATS result is reused for the same resume + JD
+    ATS_CACHE_SIZE: int = int(os.getenv("ATS_CACHE_SIZE", "1024"))
+
+    # Admission control: token buckets per user (or IP for anonymous callers) on the expensive endpoints
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "1") == "1"
+    ADMISSION_DB_PATH: str = os.getenv("ADMISSION_DB_PATH", os.path.join(DATA_DIR, "admission.sqlite3"))
+    ADMISSION_LIMITS: str = os.getenv("ADMISSION_LIMITS", "anonymous=24/0.1,guest=40/0.2,member=120/0.5")  # tier=capacity/refill per second
+    ADMISSION_COSTS: str = os.getenv("ADMISSION_COSTS", "full-analysis=6,parse-resume=4,ats-score=2,interview=1,bulk-parse=4,bulk-resume=4,rank=4,rank-llm=2,token-check=1")  # tokens per request; bulk-resume is per resume of a batch
+    # Peers whose X-Forwarded-For is believed (comma-separated IPs, "*" for any); empty = use the socket address
+    TRUSTED_PROXIES: frozenset = frozenset(p.strip() for p in os.getenv("TRUSTED_PROXIES", "").split(",") if p.strip())
+    ADMISSION_IDENTITY_TTL: int = int(os.getenv("ADMISSION_IDENTITY_TTL", "300"))  # seconds a validated token -> user/tier is cached
+
+    # Startup: heavy modules and API clients load lazily; the warm-up preloads them in the background
+    STARTUP_WARMUP: bool = os.getenv("STARTUP_WARMUP", "1") == "1"
+    STARTUP_WARMUP_DELAY: float = float(os.getenv("STARTUP_WARMUP_DELAY", "1"))  # seconds after the app is ready
+
     # AI Models
     LLM_MODEL: str = "meta-llama/Meta-Llama-3-8B-Instruct"
     HF_API_TOKEN: str = os.getenv("HF_API_TOKEN", "")
@@ -32,6 +142,9 @@ class Settings:
     # Frontend URL (for OAuth redirects)
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "https://resumifyng.vercel.app")
     
+    # Response compression (gzip, or brotli when the package is installed)
+    COMPRESS_MIN_SIZE: int = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))  # bytes
+
     # CORS
     CORS_ORIGINS: list = [
         "http://localhost:5173", # Local dev default
@@ -1,15 +1,85 @@
-from fastapi import FastAPI
+from utils.startup import startup_profile, warm_up
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
-from api.routes import router as api_router
-from api.auth import router as auth_router
+with startup_profile.timed("import", "api"):
+    from api.routes import router as api_router
+    from api.auth import router as auth_router
+    from api.payment import get_razorpay_client, get_supabase
+from services.parser import parser_service
+from services.ats import ats_service
+from services.interview import interview_service
+from services.pandoc_pool import pandoc_pool
+from services.jobs import job_queue
+from services.storage import upload_store
+from services.interview_sessions import interview_sessions
+from services.bulk import bulk_ingest_service
+from services.candidate_index import candidate_index
+from services.jd_registry import jd_registry
+from utils.compression import CompressionMiddleware
+from api.admission import AdmissionMiddleware, admission_controller
+from utils.deadline import RequestAborted, ClientDisconnected
+from utils.memory import DocumentRejected
 import uvicorn
 
+logger = logging.getLogger("backend")
+
+# Imported / created lazily on first use; the warm-up gets them ready once the server is up
+WARMUP_MODULES = [
+    "numpy", "pdfplumber", "pdfplumber.utils.text", "pdf2image", "pytesseract",
+    "pypandoc", "huggingface_hub", "groq", "authlib.integrations.httpx_client",
+]
+WARMUP_INITIALIZERS = [
+    lambda: parser_service.client,
+    lambda: ats_service.client,
+    lambda: interview_service.client,
+    lambda: jd_registry.hasher,
+    get_supabase,
+    get_razorpay_client,
+]
+
+async def _delayed_warm_up():
+    # Give the server a moment to bind and answer its first health checks
+    await asyncio.sleep(settings.STARTUP_WARMUP_DELAY)
+    await asyncio.to_thread(warm_up, WARMUP_MODULES, WARMUP_INITIALIZERS)
+    logger.info(f"Warm-up finished {startup_profile.report()['milestones_ms'].get('warmup_done')} ms after process start")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the pandoc workers in the background so startup isn't blocked on them
+    pandoc_warmup = asyncio.create_task(pandoc_pool.start())
+    warmup = asyncio.create_task(_delayed_warm_up()) if settings.STARTUP_WARMUP else None
+    await job_queue.start()
+    # Drop files left behind by earlier runs, keeping inputs of jobs that will resume
+    await upload_store.start(keep_job_files=await job_queue.pending_files())
+    startup_profile.mark("app_ready")
+    logger.info(f"App ready {startup_profile.report()['milestones_ms']['app_ready']} ms after process start")
+    yield
+    pandoc_warmup.cancel()
+    if warmup is not None:
+        warmup.cancel()
+    await job_queue.close()
+    await upload_store.close()
+    await interview_sessions.close()
+    bulk_ingest_service.close()
+    candidate_index.close()
+    jd_registry.close()
+    admission_controller.store.close()
+    await pandoc_pool.close()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    version=settings.PROJECT_VERSION
+    version=settings.PROJECT_VERSION,
+    lifespan=lifespan
 )
 
+# Rate limits for the expensive endpoints; added first so CORS headers still reach 429 responses
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 # CORS Security
 app.add_middleware(
     CORSMiddleware,
@@ -17,8 +87,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Document-Truncated", "Retry-After", "X-RateLimit-Remaining"],
 )
 
+# gzip / brotli for larger JSON responses (streams are left alone)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESS_MIN_SIZE)
+
+@app.exception_handler(RequestAborted)
+async def request_aborted_handler(request: Request, exc: RequestAborted):
+    # 499 (nginx's "client closed request") is only logged, nobody is left to read it
+    status = 499 if isinstance(exc, ClientDisconnected) else 504
+    logger.info(f"{request.method} {request.url.path} aborted: {exc}")
+    return JSONResponse(status_code=status, content={"detail": str(exc)})
+
+@app.exception_handler(DocumentRejected)
+async def document_rejected_handler(request: Request, exc: DocumentRejected):
+    # 413 over the memory limits, 422 for structurally oversized documents
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)})
+
 # Include API Routes
 app.include_router(api_router, prefix="/api")
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
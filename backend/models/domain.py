@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from typing import Any, List, Dict, Optional, Union
 
 class ResumeParsingResult(BaseModel):
     files: List[str]
@@ -9,10 +9,113 @@ class JobDescription(BaseModel):
     text: str
     role_intent: Optional[str] = None
 
+class PersonalInfo(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    email: Optional[str] = None
+    phone: Optional[str] = None
+
+# The LLM returns education/experience/projects entries as strings or small objects
+ResumeEntry = Union[str, Dict[str, Any]]
+
+class ParsedResume(BaseModel):
+    """Structured resume returned by /parse-resume (LLM output after StructurerService)."""
+    model_config = ConfigDict(extra="allow")
+
+    personal_info: PersonalInfo = Field(default_factory=PersonalInfo)
+    skills: List[str] = []
+    education: List[ResumeEntry] = []
+    experience: List[ResumeEntry] = []
+    projects: List[ResumeEntry] = []
+
+    @field_validator("personal_info", mode="before")
+    @classmethod
+    def _null_personal_info(cls, v):
+        return v if v is not None else {}
+
+    @field_validator("skills", "education", "experience", "projects", mode="before")
+    @classmethod
+    def _coerce_entries(cls, v):
+        # Tolerate odd LLM output (null, a bare string, numbers) rather than failing the response
+        if v is None:
+            return []
+        if not isinstance(v, list):
+            v = [v]
+        return [x if isinstance(x, (str, dict)) else str(x) for x in v if x is not None]
+
 class AnalysisResult(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    job_title: str = "Unknown Target"
     ats_score: float
-    matched_skills: List[str]
-    missing_skills: List[str]
-    strong_matches: List[str]
-    weak_areas: List[str]
+    matched_skills: List[str] = []
+    missing_skills: List[str] = []
+    strong_matches: List[str] = []
+    weak_areas: List[str] = []
     breakdown: Dict[str, float]
+
+class FullAnalysisResponse(BaseModel):
+    parsed_resume: ParsedResume
+    ats_analysis: AnalysisResult
+
+class AtsScoreRequest(BaseModel):
+    resume_data: Optional[ParsedResume] = None
+    resume_id: Optional[str] = None  # handle from /upload-resume, instead of resume_data
+    jd_text: str = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def _needs_resume(self):
+        if self.resume_data is None and not self.resume_id:
+            raise ValueError("Provide resume_data or resume_id")
+        return self
+
+class CandidateRequest(BaseModel):
+    resume_data: ParsedResume
+    name: Optional[str] = None
+    candidate_id: Optional[str] = Field(default=None, max_length=128)  # replaces the stored candidate with this id
+
+class CandidateResponse(BaseModel):
+    id: str
+    name: Optional[str] = None
+    resume: ParsedResume
+    created_at: float
+    updated_at: float
+
+class RankRequest(BaseModel):
+    jd_text: str = Field(min_length=1)
+    top_k: int = Field(default=20, ge=1)
+    llm_score: bool = False  # ATS-score the retrieved candidates with the LLM (costs one call each)
+
+class RankedCandidate(CandidateResponse):
+    score: float
+    matched_skills: List[str] = []
+    ats_analysis: Optional[AnalysisResult] = None
+
+class RankResponse(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    candidates: List[RankedCandidate]
+    total_candidates: int
+    matching_candidates: int
+    retrieval_ms: float
+    llm_scored: int = 0
+
+class UploadResponse(BaseModel):
+    filename: str
+    resume_id: str
+    status: str
+    message: str
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    attempts: int
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    expires_at: Optional[str] = None
+    truncated: bool = False
+    result: Optional[Union[FullAnalysisResponse, ParsedResume]] = None
+    error: Optional[str] = None
+    status_url: str
+    events_url: str
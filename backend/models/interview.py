@@ -17,3 +17,19 @@ class InterviewRequest(BaseModel):
     projects: Optional[List[str]] = []
     jd: str
     history: Optional[List[MessageModel]] = []
+    # Handle from /upload-resume; fills any background fields left empty above
+    resume_id: Optional[str] = None
+
+class InterviewTurnRequest(BaseModel):
+    # Candidate's answer; leave empty on the first turn to get the opening question
+    message: Optional[str] = None
+
+class InterviewSessionResponse(BaseModel):
+    session_id: str
+    busy: bool
+    summary: Optional[str] = None
+    summarized_messages: int
+    messages: List[MessageModel]
+    created_at: str
+    updated_at: str
+    expires_at: str
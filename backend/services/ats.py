@@ -1,10 +1,20 @@
+import asyncio
+import copy
+import hashlib
 import logging
 import json
 import re
-import random
+import threading
 from config import settings
-from typing import Dict, Any
-from huggingface_hub import AsyncInferenceClient
+from typing import Dict, Any, List, Optional, Tuple
+from utils.cache import TTLCache
+from utils.startup import startup_profile
+from utils.nlp import entry_text, estimate_tokens, extract_jd_responsibilities, extract_role_intent
+from utils.similarity import cosine_matrix, relevance_score
+from utils.prompt_encoding import encode_resume
+from utils.deadline import RequestAborted
+from services.llm import TransientLLMError, is_transient_error, hedged_chat_json
+from services.jd_registry import jd_registry
 
 logger = logging.getLogger("backend")
 
@@ -57,6 +67,16 @@ def _extract_job_title(jd_text: str) -> str:
     return lines[0] if lines else "Unknown Target"
 
 
+def _entry_headline(entry: Any) -> str:
+    """The role/title part of an entry: its title-like field, or the text before the first separator."""
+    if isinstance(entry, dict):
+        for key in ("title", "role", "position", "designation", "name"):
+            if entry.get(key):
+                return str(entry[key])
+        return entry_text(entry)[:80]
+    return re.split(r"[:|,;\n(]| - | at | @ ", str(entry or ""), maxsplit=1)[0]
+
+
 SCORING_WEIGHTS = {
     "skill_match": 0.40,
     "experience_relevance": 0.25,
@@ -67,17 +87,38 @@ SCORING_WEIGHTS = {
 
 class ATSService:
     _instance = None
+    _client_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ATSService, cls).__new__(cls)
-            cls._instance.client = None
-            if settings.HF_API_TOKEN:
-                cls._instance.client = AsyncInferenceClient(model=settings.LLM_MODEL, token=settings.HF_API_TOKEN)
-            else:
-                logger.warning("HF_API_TOKEN not found. LLM ATS Scoring disabled.")
+            cls._instance._client = None
+            cls._instance._client_ready = False
+            # (canonical JD id, resume hash) -> LLM result; near-duplicate JDs share the entry
+            cls._instance._results = TTLCache(ttl=settings.ATS_CACHE_TTL, max_entries=settings.ATS_CACHE_SIZE)
         return cls._instance
 
+    @property
+    def client(self):
+        # Built on first use so importing the service doesn't pull in huggingface_hub
+        # The lock makes a request wait for a warm-up thread still building it instead of seeing None
+        if not self._client_ready:
+            with self._client_lock:
+                if not self._client_ready:
+                    if settings.HF_API_TOKEN:
+                        with startup_profile.timed("initializer", "hf_ats_client"):
+                            from huggingface_hub import AsyncInferenceClient
+                            self._client = AsyncInferenceClient(model=settings.LLM_MODEL, token=settings.HF_API_TOKEN)
+                    else:
+                        logger.warning("HF_API_TOKEN not found. LLM ATS Scoring disabled.")
+                    self._client_ready = True
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+        self._client_ready = True
+
     def process_jd(self, jd_text: str) -> Dict[str, Any]:
         """
         Provides job description processing to prepare data for the LLM ATS analysis.
@@ -85,20 +126,40 @@ class ATSService:
         return {
             "text": jd_text,
             "extracted_skills": [],
-            "responsibilities": jd_text,
-            "role_intent": jd_text[:100]
+            "responsibilities": extract_jd_responsibilities(jd_text),
+            "role_intent": extract_role_intent(jd_text)
         }
 
-    async def calculate_score(self, resume_data: Dict[str, Any], jd_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _cache_key(self, resume_data: Dict[str, Any], jd_data: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Result cache key; also stores the canonical id in jd_data["jd_id"] for later JD-keyed lookups."""
+        jd_id = jd_data.get("jd_id")
+        if not jd_id:
+            try:
+                jd_id = await asyncio.to_thread(jd_registry.canonical_id, jd_data.get("text", ""))
+            except Exception as e:
+                logger.warning(f"JD registry lookup failed, ATS result not cached: {e}")
+                return None
+            jd_data["jd_id"] = jd_id
+        resume_hash = hashlib.sha256(json.dumps(resume_data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return jd_id, resume_hash
+
+    async def calculate_score(self, resume_data: Dict[str, Any], jd_data: Dict[str, Any], raise_transient: bool = False) -> Dict[str, Any]:
         """
         Uses an LLM to evaluate the resume against the JD and return a strict JSON scoring object.
+        With raise_transient, retryable LLM failures raise TransientLLMError instead of using the fallback score.
         """
         if not self.client:
            logger.error("LLM Client not initialized. Returning fallback score.")
            return self._default_score(resume_data, jd_data)
+
+        cache_key = await self._cache_key(resume_data, jd_data)
+        cached = self._results.get(cache_key) if cache_key else None
+        if cached is not None:
+            return copy.deepcopy(cached)
            
         jd_text = jd_data.get('text', '')
-        resume_json_str = json.dumps(resume_data, indent=2)
+        # Compact sectioned text instead of indented JSON: fewer prompt tokens, same evidence
+        resume_text = encode_resume(resume_data)
 
         prompt = f"""You are an expert ATS (Applicant Tracking System). Evaluate the following resume against the job description.
 DO NOT decide the final ATS score.
@@ -136,28 +197,22 @@ Job Description Target:
 {jd_text}
 
 Applicant Resume:
-{resume_json_str}
+{resume_text}
 """
+        logger.info(f"ATS prompt: ~{estimate_tokens(prompt)} tokens (resume ~{estimate_tokens(resume_text)})")
 
+        content = ""
         try:
-            response = await self.client.chat_completion(
-                messages=[{"role": "user", "content": prompt}],
+            # Streamed and repaired: a truncated or slightly invalid answer still yields its scores
+            score_data, content = await hedged_chat_json(
+                "ats",
+                self.client,
+                [{"role": "user", "content": prompt}],
                 max_tokens=2048,
                 temperature=0.0
             )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Clean up potential markdown
-            if content.startswith("```json"):
-                content = content[7:]
-            elif content.startswith("```"):
-                content = content[3:]
-                
-            if content.endswith("```"):
-                content = content[:-3]
-            
-            score_data = json.loads(content.strip())
+            if not isinstance(score_data, dict):
+                raise ValueError(f"expected a JSON object, got {type(score_data).__name__}")
             
             # Ensure proper schema fields
             if "ats_score" not in score_data:
@@ -213,13 +268,19 @@ Applicant Resume:
                 score_data["strong_matches"] = list({s.lower() for s in score_data["strong_matches"]})
             if "weak_areas" in score_data:
                 score_data["weak_areas"] = list({s.lower() for s in score_data["weak_areas"]})
-                
+
+            if cache_key:
+                self._results.set(cache_key, copy.deepcopy(score_data))
             return score_data
             
-        except json.JSONDecodeError as decode_err:
+        except RequestAborted:
+            raise
+        except ValueError as decode_err:
             logger.error(f"Failed to decode ATS JSON from LLM: {decode_err}\nContent received: {content}")
             return self._default_score(resume_data, jd_data)
         except Exception as e:
+            if raise_transient and is_transient_error(e):
+                raise TransientLLMError(f"LLM ATS Scoring error: {e}") from e
             logger.error(f"LLM ATS Scoring error: {e}")
             return self._default_score(resume_data, jd_data)
             
@@ -253,6 +314,8 @@ Applicant Resume:
         """
         Derives a plausible ATS result from resume structure and JD/resume overlap.
         Score varies in 60-80 range; matched/missing skills from simple keyword scan.
+        Experience relevance and role alignment come from n-gram TF-IDF similarity of
+        the experience/project entries to the JD responsibilities and job title.
         """
         jd_text = (jd_data or {}).get("text", "")
         resume_text = self._resume_to_text(resume_data or {})
@@ -261,10 +324,13 @@ Applicant Resume:
         matched = [s for s in skills if _token_in_text(s, jd_text)]
         missing = [s for s in jd_skills if s and not _token_in_text(s, resume_text)][:12]
         n_sections = sum(1 for k in ["skills", "education", "experience", "projects"] if (resume_data or {}).get(k))
+        job_title = _extract_job_title(jd_text)
+        relevance, alignment = self._text_similarity(resume_data or {}, jd_data or {}, job_title)
         base = 58 + min(20, n_sections * 4) + min(10, len(matched) * 2)
-        score = round(min(80, max(60, base + random.uniform(-3, 5))), 1)
+        # -3..+5 depending on how closely the entries read like the JD
+        score = round(min(80, max(60, base - 3 + 8 * (relevance + alignment) / 200)), 1)
         return {
-            "job_title": _extract_job_title(jd_text),
+            "job_title": job_title,
             "ats_score": score,
             "matched_skills": list({s.lower() for s in matched})[:15],
             "missing_skills": list({s.lower() for s in missing}),
@@ -272,13 +338,35 @@ Applicant Resume:
             "weak_areas": list({s.lower() for s in missing})[:10],
             "breakdown": {
                 "skill_match": min(100, 50 + len(matched) * 8),
-                "experience_relevance": min(100, 50 + n_sections * 12),
-                "role_alignment": 75.0,
+                "experience_relevance": relevance,
+                "role_alignment": alignment,
                 "education_match": 80.0 if (resume_data or {}).get("education") else 50.0,
                 "recency_continuity": 65.0
             }
         }
 
+    def _text_similarity(self, resume_data: Dict[str, Any], jd_data: Dict[str, Any], job_title: str) -> tuple:
+        """
+        (experience_relevance, role_alignment) on 0-100: every experience/project entry
+        against the JD responsibilities, and every entry headline against the job
+        title, scored in one batched cosine matrix.
+        """
+        entries: List[Any] = [e for k in ("experience", "projects") for e in (resume_data.get(k) or []) if e]
+        if not entries:
+            return 0.0, 50.0
+        jd_text = jd_data.get("text", "")
+        responsibilities = jd_data.get("responsibilities") or extract_jd_responsibilities(jd_text)
+        title = job_title if job_title != "Unknown Target" else ""
+        n = len(entries)
+        sims = cosine_matrix(
+            [responsibilities, title],
+            [entry_text(e) for e in entries] + [_entry_headline(e) for e in entries],
+        )
+        relevance = relevance_score(sims[0, :n])
+        # Without a recognizable title there is nothing to align against
+        alignment = relevance_score(sims[1, n:]) if title else 50.0
+        return relevance, alignment
+
     def _resume_to_text(self, data: Dict[str, Any]) -> str:
         """Flattens resume dict into searchable text."""
         parts = []
@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from config import settings
+from models.domain import ParsedResume
+from services.ocr import OCRService, PageBudget, extract_text_sync
+from services.parser import parser_service
+from services.structurer import structurer_service
+from services.storage import upload_store, StorageFull
+from services.candidate_index import candidate_index
+
+logger = logging.getLogger("backend")
+
+ARCHIVE_EXTENSIONS = {".zip"}
+# Entries that are archive metadata rather than resumes
+_IGNORED_PREFIXES = ("__MACOSX/",)
+
+
+@dataclass
+class BulkEntry:
+    index: int
+    name: str
+    path: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkIngestService:
+    """
+    Parses a batch of resumes (ZIP archives and/or plain files) and yields one
+    event per resume as soon as it finishes, in completion order.
+
+    Archive entries are copied out one at a time, only when there is room in
+    the in-flight window (BULK_MAX_IN_FLIGHT), so disk and memory use stay
+    bounded whatever the archive size. Extraction runs on a process pool
+    (BULK_EXTRACT_WORKERS) so PDF layout work scales with cores, and LLM
+    parsing is capped per worker process by BULK_LLM_CONCURRENCY across all
+    bulk requests.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._llm = asyncio.Semaphore(max(1, settings.BULK_LLM_CONCURRENCY))
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: children must not inherit the event loop, sockets and thread pools of the server
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.BULK_EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def _extract(self, filepath: str) -> Tuple[str, bool]:
+        budget = PageBudget()
+        # LaTeX goes through the in-process pandoc pool; it is cheap and its workers can't be shared
+        if settings.BULK_EXTRACT_WORKERS <= 0 or filepath.endswith(".tex"):
+            return await OCRService.extract_text(filepath, budget), budget.truncated
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._executor(), extract_text_sync, filepath, budget.max_pages, budget.max_chars
+            )
+        except BrokenProcessPool:
+            # A worker died (usually killed for memory); start a fresh pool for the remaining files
+            pool, self._pool = self._pool, None
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise RuntimeError("Extraction worker crashed on this file; it may be malformed or too large")
+
+    async def _process(self, entry: BulkEntry, index_owner: Optional[str] = None) -> Dict[str, Any]:
+        event = {"index": entry.index, "file": entry.name}
+        if entry.error:
+            return {"event": "error", **event, "detail": entry.error}
+        started = time.perf_counter()
+        try:
+            text, truncated = await self._extract(entry.path)
+            async with self._llm:
+                parsed = await parser_service.parse_resume(text, raise_transient=True)
+            if not parsed:
+                raise ValueError("The resume could not be parsed")
+            data = ParsedResume.model_validate(structurer_service.structure_resume(parsed)).model_dump(mode="json")
+            if index_owner:
+                event["candidate_id"] = await asyncio.to_thread(
+                    candidate_index.upsert, index_owner, data, os.path.basename(entry.name)
+                )
+            return {"event": "result", **event, "data": data, "truncated": truncated,
+                    "seconds": round(time.perf_counter() - started, 3)}
+        except Exception as e:
+            logger.warning(f"Bulk parse failed for {entry.name}: {e}")
+            return {"event": "error", **event, "detail": str(e)}
+        finally:
+            await upload_store.release(entry.path)
+
+    async def _save(self, source, ext: str, size: int, owner: str) -> str:
+        """Copies a resume (file object) into the upload dir, refusing anything over MAX_UPLOAD_SIZE."""
+        filepath = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4()}{ext}")
+        await upload_store.reserve(size)
+        try:
+            copied = await asyncio.to_thread(_copy_limited, source, filepath, settings.MAX_UPLOAD_SIZE)
+            if copied > settings.MAX_UPLOAD_SIZE:
+                raise ValueError(f"File too large. Max size: {settings.MAX_UPLOAD_SIZE / (1024 * 1024)}MB")
+            await upload_store.register(filepath, owner)
+            return filepath
+        except BaseException:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            raise
+
+    async def _entries(self, paths: List[Tuple[str, str]], owner: str) -> AsyncIterator[BulkEntry]:
+        """
+        Yields the resumes of the batch one at a time. `paths` are (original name,
+        saved path) of the uploaded files; archives are read entry by entry.
+        Zip-bomb guards: entry count, per-entry size, compression ratio and the
+        total uncompressed size are all capped, using both the declared sizes
+        and the bytes actually read.
+        """
+        index = 0
+        total = 0
+        for name, path in paths:
+            ext = os.path.splitext(name)[1].lower()
+            if ext not in ARCHIVE_EXTENSIONS:
+                if index >= settings.BULK_MAX_FILES:
+                    yield BulkEntry(index, name, error=f"Batch is limited to {settings.BULK_MAX_FILES} resumes")
+                    return
+                # Already saved by the route
+                yield BulkEntry(index, name, path=path)
+                index += 1
+                continue
+            try:
+                archive = await asyncio.to_thread(zipfile.ZipFile, path)
+            except (zipfile.BadZipFile, OSError) as e:
+                yield BulkEntry(index, name, error=f"Not a valid ZIP archive: {e}")
+                index += 1
+                continue
+            with archive:
+                for info in archive.infolist():
+                    entry_name = f"{name}/{info.filename}"
+                    basename = os.path.basename(info.filename)
+                    if info.is_dir() or info.filename.startswith(_IGNORED_PREFIXES) or basename.startswith("."):
+                        continue
+                    if index >= settings.BULK_MAX_FILES:
+                        yield BulkEntry(index, entry_name, error=f"Batch is limited to {settings.BULK_MAX_FILES} resumes")
+                        return
+                    error = _entry_error(info)
+                    if error is None:
+                        try:
+                            with archive.open(info) as source:
+                                entry_path = await self._save(
+                                    source, os.path.splitext(basename)[1].lower(), info.file_size, owner
+                                )
+                            total += os.path.getsize(entry_path)
+                        except StorageFull:
+                            error = "Upload storage is full, try again later"
+                        except Exception as e:
+                            # Corrupt data (zlib.error, BadZipFile), encrypted entries (RuntimeError),
+                            # unsupported compression (NotImplementedError): only this entry fails.
+                            # _save has already removed the partial copy.
+                            error = str(e) or type(e).__name__
+                    yield BulkEntry(index, entry_name, path=None if error else entry_path, error=error)
+                    index += 1
+                    if total > settings.BULK_MAX_TOTAL_MB * 1024 * 1024:
+                        yield BulkEntry(index, name, error=f"Archive expands to more than {settings.BULK_MAX_TOTAL_MB}MB")
+                        return
+
+    async def ingest(
+        self,
+        paths: List[Tuple[str, str]],
+        owner: str,
+        index_owner: Optional[str] = None,
+        admit: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams {"event": "result" | "error", "index", "file", ...} per resume,
+        then a final {"event": "done"} summary. Stopping the iteration (client
+        disconnect) cancels the resumes still in progress. With index_owner,
+        parsed resumes are added to that user's candidate index. `admit` is
+        awaited before each resume is dispatched (the caller's rate limit);
+        once it returns False that resume is reported and the batch stops.
+        """
+        started = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue()
+        window = asyncio.Semaphore(max(1, settings.BULK_MAX_IN_FLIGHT))
+        tasks: Set[asyncio.Task] = set()
+
+        async def run(entry: BulkEntry):
+            try:
+                queue.put_nowait(await self._process(entry, index_owner))
+            finally:
+                window.release()
+
+        async def produce():
+            entries = self._entries(paths, owner)
+            try:
+                while True:
+                    await window.acquire()
+                    entry = await entries.__anext__()
+                    stop = entry.error is None and admit is not None and not await admit()
+                    if stop:
+                        await upload_store.release(entry.path)
+                        entry = BulkEntry(
+                            entry.index, entry.name, error="Rate limit reached, the rest of the batch was not parsed"
+                        )
+                    task = asyncio.create_task(run(entry))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    if stop:
+                        break
+            except StopAsyncIteration:
+                window.release()
+            finally:
+                await entries.aclose()
+                if tasks:
+                    await asyncio.gather(*list(tasks))
+                queue.put_nowait(None)
+
+        producer = asyncio.create_task(produce())
+        counts = {"result": 0, "error": 0}
+        try:
+            while (event := await queue.get()) is not None:
+                counts[event["event"]] += 1
+                yield event
+            await producer  # surfaces errors from reading the batch
+            yield {
+                "event": "done",
+                "total": counts["result"] + counts["error"],
+                "succeeded": counts["result"],
+                "failed": counts["error"],
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+        finally:
+            producer.cancel()
+            for task in list(tasks):
+                task.cancel()
+            await asyncio.gather(producer, *list(tasks), return_exceptions=True)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def _entry_error(info: zipfile.ZipInfo) -> Optional[str]:
+    ext = os.path.splitext(info.filename)[1].lower()
+    if ext not in settings.ALLOWED_EXTENSIONS:
+        return f"Invalid file type. Allowed types: {settings.ALLOWED_EXTENSIONS}"
+    if info.file_size > settings.MAX_UPLOAD_SIZE:
+        return f"File too large. Max size: {settings.MAX_UPLOAD_SIZE / (1024 * 1024)}MB"
+    if info.compress_size and info.file_size / info.compress_size > settings.BULK_MAX_COMPRESSION_RATIO:
+        return "Suspicious compression ratio, entry skipped"
+    return None
+
+
+def _copy_limited(source, filepath: str, limit: int) -> int:
+    """Copies at most limit + 1 bytes; a result above `limit` means the source was too large."""
+    copied = 0
+    with open(filepath, "wb") as target:
+        while copied <= limit:
+            chunk = source.read(min(1024 * 1024, limit + 1 - copied))
+            if not chunk:
+                break
+            target.write(chunk)
+            copied += len(chunk)
+    return copied
+
+
+bulk_ingest_service = BulkIngestService()
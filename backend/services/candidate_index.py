@@ -0,0 +1,381 @@
+import asyncio
+import json
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from config import settings
+from services.ats import ats_service
+from utils.nlp import STOPWORDS, canonical_skill, content_terms, entry_text, extract_jd_skill_section, tokenize
+from utils.sqlite import connect as sqlite_connect
+
+logger = logging.getLogger("backend")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    owner      TEXT NOT NULL,
+    id         TEXT NOT NULL,
+    name       TEXT,
+    resume     TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (owner, id)
+);
+-- Inverted index: one row per (term, field, candidate), with the candidate's field length for BM25
+CREATE TABLE IF NOT EXISTS postings (
+    owner        TEXT NOT NULL,
+    term         TEXT NOT NULL,
+    field        TEXT NOT NULL,
+    candidate_id TEXT NOT NULL,
+    tf           INTEGER NOT NULL,
+    dl           INTEGER NOT NULL,
+    PRIMARY KEY (owner, term, field, candidate_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_candidate ON postings (owner, candidate_id);
+-- Document frequency per term, read before any postings so very common terms are never scanned
+CREATE TABLE IF NOT EXISTS terms (
+    owner TEXT NOT NULL,
+    term  TEXT NOT NULL,
+    field TEXT NOT NULL,
+    df    INTEGER NOT NULL,
+    PRIMARY KEY (owner, term, field)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS field_stats (
+    owner     TEXT NOT NULL,
+    field     TEXT NOT NULL,
+    docs      INTEGER NOT NULL,
+    total_len INTEGER NOT NULL,
+    PRIMARY KEY (owner, field)
+);
+"""
+
+# Indexed fields and their weight in the score; skills are canonical skill keys, the rest are words
+FIELD_WEIGHTS = {"skills": 3.0, "experience": 1.0, "projects": 0.8, "education": 0.4}
+TEXT_FIELDS = ("experience", "projects", "education")
+BM25_K1 = 1.2
+BM25_B = 0.75
+# JD phrases up to this many words are tried as skill names ("machine learning", "google cloud platform")
+MAX_SKILL_WORDS = 3
+_IN_CHUNK = 500  # bound on SQLite host parameters per IN (...)
+MIN_DOCS_FOR_DF_CUT = 20  # small corpora keep every term
+# Skill keys this short ("go", "c", "r") are ordinary words too; they are matched by exact spelling
+SHORT_SKILL_LEN = 2
+# Skill phrases never span punctuation or sentences ("experience. Google" is not a skill)
+_CLAUSE = re.compile(r"[\n,;:!?()\[\]|•]+|\.(?=\s|$)")
+# "R&D", "Q&A": not the R or Q languages
+_AMPERSAND_WORD = re.compile(r"\w+&\w+")
+
+
+def skill_term(skill: str) -> str:
+    """Index term for a skill: its canonical key, except that short names keep their spelling ("Go", "C", "R")."""
+    key = canonical_skill(skill)
+    if len(key) > SHORT_SKILL_LEN:
+        return key
+    return re.sub(r"\s+", "", str(skill))
+
+
+def resume_terms(resume: Dict[str, Any]) -> Dict[str, Counter]:
+    """Term frequencies per indexed field of a structured resume."""
+    skills = resume.get("skills") or []
+    fields = {"skills": Counter(k for k in (skill_term(s) for s in skills) if k)}
+    for field in TEXT_FIELDS:
+        fields[field] = Counter(content_terms(entry_text(resume.get(field) or [])))
+    return fields
+
+
+def jd_terms(jd_text: str) -> Dict[str, List[str]]:
+    """
+    Query terms per field: content words for the text fields, and for skills the
+    terms of the JD's 1-3 word phrases, built within a clause and without filler
+    words. Short names only match as written ("Go", not "go ahead"); in the JD's
+    skills section any spelling counts.
+    """
+    skill_terms = set()
+    for clause in _CLAUSE.split(_AMPERSAND_WORD.sub(" ", jd_text or "")):
+        words = tokenize(clause, keep_case=True)
+        for n in range(1, MAX_SKILL_WORDS + 1):
+            for i in range(len(words) - n + 1):
+                gram = words[i:i + n]
+                if any(w.lower() in STOPWORDS or w.isdigit() for w in gram):
+                    continue
+                term = skill_term(" ".join(gram))
+                # A capitalized short word opening a sentence ("Go beyond ...") is prose, not a skill
+                if n == 1 and len(term) <= SHORT_SKILL_LEN and i == 0 and len(words) > 1 and words[1].islower() \
+                        and not term.isupper():
+                    continue
+                if term:
+                    skill_terms.add(term)
+    for word in tokenize(_AMPERSAND_WORD.sub(" ", extract_jd_skill_section(jd_text)), keep_case=True):
+        if len(canonical_skill(word)) <= SHORT_SKILL_LEN and word.lower() not in STOPWORDS:
+            skill_terms.update({word, word.lower(), word.upper(), word.capitalize()})
+    text_terms = sorted(set(content_terms(jd_text)))
+    return {"skills": sorted(skill_terms), **{field: text_terms for field in TEXT_FIELDS}}
+
+
+def _chunks(items: List[Any], size: int = _IN_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class CandidateIndex:
+    """
+    Per-owner candidate store with an inverted index over canonical skills and
+    per-section words, persisted in SQLite. rank() scores with BM25 summed over
+    weighted fields. It reads document frequencies first, drops terms present
+    in more than RANK_MAX_DF of the corpus, and then reads only the postings of
+    the remaining terms. Query cost follows the postings the JD actually hits,
+    not the number of resumes. Blocking; call through asyncio.to_thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite_connect(self.path, _SCHEMA)
+        return self._conn
+
+    def _unindex(self, conn: sqlite3.Connection, owner: str, candidate_id: str) -> bool:
+        rows = conn.execute(
+            "SELECT term, field, dl FROM postings WHERE owner = ? AND candidate_id = ?", (owner, candidate_id)
+        ).fetchall()
+        if not rows:
+            return False
+        conn.executemany(
+            "UPDATE terms SET df = df - 1 WHERE owner = ? AND term = ? AND field = ?",
+            [(owner, r["term"], r["field"]) for r in rows],
+        )
+        conn.executemany(
+            "DELETE FROM terms WHERE owner = ? AND term = ? AND field = ? AND df <= 0",
+            [(owner, r["term"], r["field"]) for r in rows],
+        )
+        lengths = {r["field"]: r["dl"] for r in rows}
+        conn.executemany(
+            "UPDATE field_stats SET docs = docs - 1, total_len = total_len - ? WHERE owner = ? AND field = ?",
+            [(dl, owner, field) for field, dl in lengths.items()],
+        )
+        conn.execute("DELETE FROM postings WHERE owner = ? AND candidate_id = ?", (owner, candidate_id))
+        return True
+
+    def upsert(self, owner: str, resume: Dict[str, Any], name: Optional[str] = None, candidate_id: Optional[str] = None) -> str:
+        """Adds or replaces a candidate; returns its id."""
+        candidate_id = candidate_id or uuid.uuid4().hex
+        now = time.time()
+        fields = resume_terms(resume)
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._unindex(conn, owner, candidate_id)
+                conn.execute(
+                    "INSERT INTO candidates (owner, id, name, resume, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (owner, id) DO UPDATE SET name = excluded.name, resume = excluded.resume, "
+                    "updated_at = excluded.updated_at",
+                    (owner, candidate_id, name, json.dumps(resume), now, now),
+                )
+                for field, counts in fields.items():
+                    if not counts:
+                        continue
+                    dl = sum(counts.values())
+                    conn.executemany(
+                        "INSERT INTO postings (owner, term, field, candidate_id, tf, dl) VALUES (?, ?, ?, ?, ?, ?)",
+                        [(owner, term, field, candidate_id, tf, dl) for term, tf in counts.items()],
+                    )
+                    conn.executemany(
+                        "INSERT INTO terms (owner, term, field, df) VALUES (?, ?, ?, 1) "
+                        "ON CONFLICT (owner, term, field) DO UPDATE SET df = df + 1",
+                        [(owner, term, field) for term in counts],
+                    )
+                    conn.execute(
+                        "INSERT INTO field_stats (owner, field, docs, total_len) VALUES (?, ?, 1, ?) "
+                        "ON CONFLICT (owner, field) DO UPDATE SET docs = docs + 1, total_len = total_len + excluded.total_len",
+                        (owner, field, dl),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return candidate_id
+
+    def delete(self, owner: str, candidate_id: str) -> bool:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._unindex(conn, owner, candidate_id)
+                deleted = conn.execute(
+                    "DELETE FROM candidates WHERE owner = ? AND id = ?", (owner, candidate_id)
+                ).rowcount > 0
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return deleted
+
+    def get(self, owner: str, candidate_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT id, name, resume, created_at, updated_at FROM candidates WHERE owner = ? AND id = ?",
+                (owner, candidate_id),
+            ).fetchone()
+        return self._candidate(row) if row else None
+
+    def count(self, owner: str) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM candidates WHERE owner = ?", (owner,)).fetchone()[0]
+
+    @staticmethod
+    def _candidate(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "resume": json.loads(row["resume"]),
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def rank(self, owner: str, jd_text: str, top_k: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Top-k candidates for a JD by lexical score. Returns (candidates, stats); each
+        candidate has its stored resume, `score` and the JD skills it matched.
+        """
+        query = jd_terms(jd_text)
+        # (term, field, weight * idf, average field length) per query term worth reading
+        weighted: List[Tuple[str, str, float, float]] = []
+        postings_read = skipped_terms = 0
+        with self._lock:
+            conn = self._connect()
+            stats = {
+                r["field"]: (r["docs"], r["total_len"])
+                for r in conn.execute("SELECT field, docs, total_len FROM field_stats WHERE owner = ?", (owner,))
+            }
+            for field, terms in query.items():
+                docs, total_len = stats.get(field, (0, 0))
+                if not docs or not terms:
+                    continue
+                dfs = {}
+                for chunk in _chunks(terms):
+                    dfs.update(conn.execute(
+                        f"SELECT term, df FROM terms WHERE owner = ? AND field = ? AND term IN ({','.join('?' * len(chunk))})",
+                        (owner, field, *chunk),
+                    ).fetchall())
+                # Near-universal words cost the most postings and barely change the order; skills are always kept
+                max_df = docs * settings.RANK_MAX_DF
+                for term, df in dfs.items():
+                    if field != "skills" and df > max_df and docs >= MIN_DOCS_FOR_DF_CUT:
+                        skipped_terms += 1
+                        continue
+                    idf = math.log(1 + (docs - df + 0.5) / (df + 0.5))
+                    weighted.append((term, field, FIELD_WEIGHTS[field] * idf, total_len / docs))
+                    postings_read += df
+
+            # BM25 summed over fields, aggregated and cut to k inside SQLite
+            top: List[Tuple[str, float, int]] = []
+            if weighted:
+                # Postings of each query term are read through the (owner, term, field) primary key
+                values = ",".join("(?, ?, ?, ?)" for _ in weighted)
+                top = conn.execute(
+                    f"WITH q(term, field, w, avgdl) AS (VALUES {values}) "
+                    f"SELECT p.candidate_id, SUM(q.w * p.tf * {BM25_K1 + 1} / "
+                    f"(p.tf + {BM25_K1} * (1 - {BM25_B} + {BM25_B} * p.dl / q.avgdl))) AS score, "
+                    # Window over the groups, evaluated before LIMIT: how many candidates matched at all
+                    "COUNT(*) OVER () AS matching "
+                    "FROM q JOIN postings p ON p.owner = ? AND p.term = q.term AND p.field = q.field "
+                    "GROUP BY p.candidate_id ORDER BY score DESC LIMIT ?",
+                    (*(v for row in weighted for v in row), owner, top_k),
+                ).fetchall()
+            rows = {}
+            for chunk in _chunks([row[0] for row in top]):
+                rows.update(
+                    (r["id"], r) for r in conn.execute(
+                        f"SELECT id, name, resume, created_at, updated_at FROM candidates "
+                        f"WHERE owner = ? AND id IN ({','.join('?' * len(chunk))})",
+                        (owner, *chunk),
+                    )
+                )
+            total = conn.execute("SELECT COUNT(*) FROM candidates WHERE owner = ?", (owner,)).fetchone()[0]
+
+        skill_keys = {term for term, field, _, _ in weighted if field == "skills"}
+        results = []
+        for candidate_id, score, _ in top:
+            if candidate_id not in rows:
+                continue
+            candidate = self._candidate(rows[candidate_id])
+            candidate["score"] = round(score, 3)
+            candidate["matched_skills"] = [
+                s for s in candidate["resume"].get("skills") or [] if skill_term(s) in skill_keys
+            ]
+            results.append(candidate)
+        return results, {
+            "total_candidates": total,
+            "matching_candidates": top[0][2] if top else 0,
+            "query_terms": len(weighted),
+            "skipped_common_terms": skipped_terms,
+            "postings_read": postings_read,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CandidateRanker:
+    """Lexical top-k from the index, then (optionally) LLM ATS scoring of just those k."""
+
+    def __init__(self, index: CandidateIndex):
+        self.index = index
+        self._llm = asyncio.Semaphore(max(1, settings.RANK_LLM_CONCURRENCY))
+
+    async def rank(
+        self,
+        owner: str,
+        jd_text: str,
+        top_k: int,
+        llm_score: bool = False,
+        admit: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        With llm_score, the best RANK_LLM_MAX_CANDIDATES of the k are ATS-scored by the
+        LLM. `admit` is awaited before each of those calls (the caller's rate limit); a
+        candidate it refuses keeps only its lexical score.
+        """
+        started = time.perf_counter()
+        candidates, stats = await asyncio.to_thread(self.index.rank, owner, jd_text, top_k)
+        stats["retrieval_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        if llm_score and candidates:
+            await self._llm_score(candidates, jd_text, admit)
+            stats["llm_scored"] = sum(1 for c in candidates if "ats_analysis" in c)
+        return {"candidates": candidates, **stats}
+
+    async def _llm_score(
+        self, candidates: List[Dict[str, Any]], jd_text: str, admit: Optional[Callable[[], Awaitable[bool]]]
+    ):
+        # Obvious non-fits (far below the best lexical match) are not worth an LLM call
+        cutoff = candidates[0]["score"] * settings.RANK_LLM_MIN_RELATIVE_SCORE
+        shortlist = [c for c in candidates[:settings.RANK_LLM_MAX_CANDIDATES] if c["score"] >= cutoff]
+        jd_data = ats_service.process_jd(jd_text)
+
+        async def score(candidate: Dict[str, Any]):
+            if admit is not None and not await admit():
+                return
+            async with self._llm:
+                candidate["ats_analysis"] = await ats_service.calculate_score(candidate["resume"], jd_data)
+
+        await asyncio.gather(*(score(c) for c in shortlist))
+        # LLM-scored candidates by ATS score, then the rest in lexical order
+        candidates.sort(key=lambda c: (
+            "ats_analysis" in c, c.get("ats_analysis", {}).get("ats_score", 0.0), c["score"]
+        ), reverse=True)
+
+
+candidate_index = CandidateIndex(settings.CANDIDATE_DB_PATH)
+candidate_ranker = CandidateRanker(candidate_index)
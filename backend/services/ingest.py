@@ -3,6 +3,7 @@ import os
 import uuid
 from fastapi import UploadFile, HTTPException
 from config import settings
+from services.storage import upload_store, StorageFull, REQUEST
 import logging
 
 logger = logging.getLogger("backend")
@@ -29,17 +30,25 @@ class IngestService:
         return True
 
     @staticmethod
-    async def save_temp(file: UploadFile) -> str:
+    async def save_temp(file: UploadFile, owner: str = "anonymous", purpose: str = REQUEST) -> str:
         # Generate unique filename
         ext = os.path.splitext(file.filename)[1].lower()
         filename = f"{uuid.uuid4()}{ext}"
         filepath = os.path.join(settings.UPLOAD_DIR, filename)
         
         try:
+            # Evict old uploads up front if this one would push us over the quota
+            await upload_store.reserve(file.size or 0)
             with open(filepath, "wb") as buffer:
                 shutil.copyfileobj(file.file, buffer)
+            await upload_store.register(filepath, owner, purpose)
             logger.info(f"File saved to {filepath}")
             return filepath
+        except StorageFull as e:
+            logger.error(f"Rejected upload: {e}")
+            raise HTTPException(status_code=507, detail="Upload storage is full, try again later")
         except Exception as e:
             logger.error(f"Error saving file: {e}")
+            if os.path.exists(filepath):
+                os.remove(filepath)
             raise HTTPException(status_code=500, detail="Failed to save file")
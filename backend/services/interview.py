@@ -1,16 +1,66 @@
+import asyncio
+import hashlib
+import logging
 import os
-from groq import Groq
-from models.interview import InterviewRequest, MessageModel
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from models.interview import InterviewRequest, MessageModel, PersonalInfoModel
 from config import settings
+from utils.cache import TTLCache
+from utils import deadline
+from utils.startup import startup_profile
+from services.jd_registry import jd_registry
+
+logger = logging.getLogger("backend")
+
+_JD_HEADER = "\nHere is the Job Description they are interviewing for:\n"
+_INSTRUCTIONS_HEADER = "\n\nInstructions:\n"
 
 class InterviewService:
     def __init__(self):
         self.api_key = settings.GROQ_API_KEY
-        # If API key is missing, this will fail or we can handle it
-        self.client = Groq(api_key=self.api_key) if self.api_key else None
         self.model = "llama-3.3-70b-versatile"
+        self.summary_model = settings.INTERVIEW_SUMMARY_MODEL
+        self._client = None
+        self._client_ready = False
+        self._client_lock = threading.Lock()
+        # Opening questions generated speculatively after an analysis, keyed by system prompt hash
+        # (with the JD's canonical id in place of its text)
+        self._openings = TTLCache(ttl=settings.INTERVIEW_OPENING_TTL, max_entries=settings.INTERVIEW_OPENING_CACHE_SIZE)
+        self._pending_openings: Dict[str, asyncio.Task] = {}
+        self._jd_lookups: Set[asyncio.Task] = set()  # prefetches still resolving their JD id
+
+    @property
+    def client(self):
+        # Created on first use; None when the API key is missing. The lock makes a request
+        # wait for a warm-up thread still building it instead of seeing None
+        if not self._client_ready:
+            with self._client_lock:
+                if not self._client_ready:
+                    if self.api_key:
+                        with startup_profile.timed("initializer", "groq_client"):
+                            from groq import AsyncGroq
+                            self._client = AsyncGroq(api_key=self.api_key)
+                    self._client_ready = True
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+        self._client_ready = True
+
+    @staticmethod
+    def apply_resume(request: InterviewRequest, resume_data: Dict[str, Any]) -> InterviewRequest:
+        """Fills the candidate background from a parsed resume, keeping anything the client sent explicitly."""
+        update = {}
+        for key in ("skills", "education", "experience", "projects"):
+            if not getattr(request, key) and isinstance(resume_data.get(key), list):
+                update[key] = [str(x) for x in resume_data[key]]
+        if request.personal_info is None and isinstance(resume_data.get("personal_info"), dict):
+            update["personal_info"] = PersonalInfoModel(**resume_data["personal_info"])
+        return request.model_copy(update=update)
 
-    def _build_system_prompt(self, request: InterviewRequest) -> str:
+    def build_system_prompt(self, request: InterviewRequest) -> str:
         prompt = (
             "You are an expert technical interviewer conducting an interview. "
             "Your goal is to be natural, professional, and engaging. "
@@ -30,9 +80,8 @@ class InterviewService:
         if request.projects:
             prompt += f"Projects: {'; '.join(request.projects)}\n"
             
-        prompt += f"\nHere is the Job Description they are interviewing for:\n{request.jd}\n\n"
+        prompt += f"{_JD_HEADER}{request.jd}{_INSTRUCTIONS_HEADER}"
         prompt += (
-            "Instructions:\n"
             "1. If this is the first message (no history), start by introducing yourself briefly and asking an opening question based on their background or the JD.\n"
             "2. IMPORTANT: Do NOT give yourself a human name (e.g. 'Rohan', 'John'). You are strictly an AI interviewer. Introduce yourself as the 'AI Hiring Manager' or 'AI Technical Interviewer'.\n"
             "3. If there is history, continue the conversation naturally based on their last response.\n"
@@ -41,12 +90,137 @@ class InterviewService:
         )
         return prompt
 
+    @staticmethod
+    def _jd_id(jd: str) -> Optional[str]:
+        try:
+            return jd_registry.canonical_id(jd)
+        except Exception as e:
+            logger.warning(f"JD registry lookup failed: {e}")
+            return None
+
+    @staticmethod
+    def _opening_key(system_prompt: str, jd_id: Optional[str] = None) -> str:
+        # The system prompt is exactly the resume + JD context the model sees; with the JD
+        # replaced by its canonical id, near-duplicate postings share the opening question
+        if jd_id:
+            background, _, rest = system_prompt.partition(_JD_HEADER)
+            instructions = rest.rpartition(_INSTRUCTIONS_HEADER)[2]
+            system_prompt = f"{background}{_JD_HEADER}{jd_id}{_INSTRUCTIONS_HEADER}{instructions}"
+        return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+
+    def prefetch_opening(self, resume_data: Dict[str, Any], jd: str, jd_id: Optional[str] = None):
+        """
+        Starts generating the opening question for this resume + JD in the
+        background, so the first interview turn can be served without waiting
+        on the model. Called when an analysis finishes; never raises.
+        `jd_id` is the JD's canonical id when the caller already has it.
+        """
+        if not settings.INTERVIEW_OPENING_PREFETCH or not self.client:
+            return
+        try:
+            request = self.apply_resume(InterviewRequest(jd=jd), resume_data)
+        except Exception as e:
+            logger.warning(f"Opening question prefetch skipped: {e}")
+            return
+        system_prompt = self.build_system_prompt(request)
+        if jd_id:
+            self._start_opening(self._opening_key(system_prompt, jd_id), system_prompt)
+            return
+        # The JD id lookup hits SQLite, so it runs in a thread from the background task
+        task = asyncio.create_task(deadline.detached(self._prefetch_with_jd_id(system_prompt, jd)))
+        self._jd_lookups.add(task)
+        task.add_done_callback(self._jd_lookups.discard)
+
+    async def _prefetch_with_jd_id(self, system_prompt: str, jd: str):
+        jd_id = await asyncio.to_thread(self._jd_id, jd)
+        self._start_opening(self._opening_key(system_prompt, jd_id), system_prompt)
+
+    def _start_opening(self, key: str, system_prompt: str):
+        if key in self._pending_openings or self._openings.get(key) is not None:
+            return
+        # Outlives the analysis request that triggered it, so it must not inherit its deadline
+        task = asyncio.create_task(deadline.detached(self._generate_opening(key, system_prompt)))
+        self._pending_openings[key] = task
+        task.add_done_callback(lambda _: self._pending_openings.pop(key, None))
+
+    async def _generate_opening(self, key: str, system_prompt: str) -> Optional[str]:
+        try:
+            opening = "".join([c async for c in self._stream_completion([{"role": "system", "content": system_prompt}])])
+        except Exception as e:
+            logger.warning(f"Opening question prefetch failed: {e}")
+            return None
+        if opening:
+            self._openings.set(key, opening)
+        return opening or None
+
+    async def _prefetched_opening(self, system_prompt: str) -> Optional[str]:
+        """Opening question for this context if one was prefetched (joining a generation still running)."""
+        jd_id = None
+        if _JD_HEADER in system_prompt:
+            jd = system_prompt.partition(_JD_HEADER)[2].rpartition(_INSTRUCTIONS_HEADER)[0]
+            jd_id = await asyncio.to_thread(self._jd_id, jd)
+        key = self._opening_key(system_prompt, jd_id)
+        opening = self._openings.get(key)
+        if opening is None and key in self._pending_openings:
+            opening = await asyncio.shield(self._pending_openings[key])
+        return opening
+
+    async def stream_reply(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Streams the interviewer's next message for a prepared prompt; errors propagate to the caller."""
+        if len(messages) == 1 and messages[0]["role"] == "system":
+            # Opening turn: served from the prefetch when the analysis already produced it
+            opening = await self._prefetched_opening(messages[0]["content"])
+            if opening:
+                yield opening
+                return
+        async for content in self._stream_completion(messages):
+            yield content
+
+    async def _stream_completion(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        if not self.client:
+            raise ValueError("GROQ_API_KEY is not configured.")
+        deadline.check("interview reply")
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=1000,
+            temperature=0.7,
+            stream=True
+        )
+        # Closing the stream (client gone, deadline hit) closes the upstream connection too
+        async with stream:
+            async for chunk in stream:
+                deadline.check("interview reply")
+                if chunk.choices[0].delta.content is not None:
+                    yield chunk.choices[0].delta.content
+
+    async def summarize(self, previous_summary: Optional[str], transcript: List[Dict[str, str]]) -> str:
+        """Folds older interview turns into the running summary used in place of the full history."""
+        if not self.client:
+            raise ValueError("GROQ_API_KEY is not configured.")
+        lines = [f"{'Interviewer' if m['role'] == 'assistant' else 'Candidate'}: {m['content']}" for m in transcript]
+        prompt = (
+            "You keep running notes of a technical interview so it can continue without the full transcript.\n"
+            "Update the notes with the new exchanges below. Keep every question already asked, the candidate's "
+            "answers with concrete details (technologies, numbers, claims), strengths, weak spots and any "
+            "follow-up the interviewer intended. Write compact bullet points, at most 250 words.\n\n"
+            f"Current notes:\n{previous_summary or '(none yet)'}\n\n"
+            "New exchanges:\n" + "\n".join(lines)
+        )
+        completion = await self.client.chat.completions.create(
+            model=self.summary_model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=500,
+            temperature=0.2,
+        )
+        return (completion.choices[0].message.content or "").strip()
+
     async def generate_response_stream(self, request: InterviewRequest):
         if not self.client:
             raise ValueError("GROQ_API_KEY is not configured.")
 
         messages = [
-            {"role": "system", "content": self._build_system_prompt(request)}
+            {"role": "system", "content": self.build_system_prompt(request)}
         ]
 
         # Append history
@@ -55,17 +229,8 @@ class InterviewService:
                 messages.append({"role": msg.role, "content": msg.content})
 
         try:
-            stream = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=1000,
-                temperature=0.7,
-                stream=True
-            )
-            for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
-                    # Yielding in SSE format: "data: ...\n\n"
-                    yield chunk.choices[0].delta.content
+            async for content in self.stream_reply(messages):
+                yield content
         except Exception as e:
             # Yield error if it happens during streaming or connection
             yield f"Error: {str(e)}"
@@ -0,0 +1,337 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from config import settings
+from models.interview import InterviewRequest
+from services.interview import interview_service
+from utils.nlp import estimate_tokens
+from utils import deadline
+from utils.sqlite import connect as sqlite_connect
+
+logger = logging.getLogger("backend")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id              TEXT PRIMARY KEY,
+    system_prompt   TEXT NOT NULL,
+    summary         TEXT,
+    summarized_upto INTEGER NOT NULL DEFAULT 0,
+    busy_until      REAL,
+    created_at      REAL NOT NULL,
+    updated_at      REAL NOT NULL,
+    expires_at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expires_at);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    role       TEXT NOT NULL,
+    content    TEXT NOT NULL,
+    tokens     INTEGER NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+"""
+
+
+class SessionNotFound(Exception):
+    """Raised for unknown or expired session ids."""
+
+
+class SessionBusy(Exception):
+    """Raised when a turn is requested while the previous one is still generating."""
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+
+class InterviewSessionStore:
+    """
+    SQLite persistence for interview sessions: the system prompt (resume + JD
+    context) is stored once, messages are appended per turn and a running
+    summary replaces the messages up to `summarized_upto` in the prompt.
+    Blocking and serialized on one connection, like JobStore.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite_connect(self.path, _SCHEMA)
+        return self._conn
+
+    def create(self, session_id: str, system_prompt: str, history: List[Dict[str, str]]):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT INTO sessions (id, system_prompt, created_at, updated_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                    (session_id, system_prompt, now, now, now + settings.INTERVIEW_SESSION_TTL),
+                )
+                conn.executemany(
+                    "INSERT INTO messages (session_id, seq, role, content, tokens) VALUES (?, ?, ?, ?, ?)",
+                    [(session_id, i, m["role"], m["content"], estimate_tokens(m["content"]))
+                     for i, m in enumerate(history, start=1)],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT * FROM sessions WHERE id = ? AND expires_at >= ?", (session_id, time.time())
+            ).fetchone()
+        return dict(row) if row else None
+
+    def messages(self, session_id: str, after_seq: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT seq, role, content, tokens FROM messages WHERE session_id = ? AND seq > ? ORDER BY seq",
+                (session_id, after_seq),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def begin_turn(self, session_id: str, lease_seconds: float) -> bool:
+        """Atomically marks the session busy; False if another turn holds it (or it expired)."""
+        now = time.time()
+        with self._lock:
+            cursor = self._connect().execute(
+                "UPDATE sessions SET busy_until = ? WHERE id = ? AND expires_at >= ? "
+                "AND (busy_until IS NULL OR busy_until < ?)",
+                (now + lease_seconds, session_id, now, now),
+            )
+        return cursor.rowcount == 1
+
+    def end_turn(self, session_id: str):
+        with self._lock:
+            self._connect().execute("UPDATE sessions SET busy_until = NULL WHERE id = ?", (session_id,))
+
+    def append(self, session_id: str, role: str, content: str):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO messages (session_id, seq, role, content, tokens) "
+                "SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ?, ? FROM messages WHERE session_id = ?",
+                (session_id, role, content, estimate_tokens(content), session_id),
+            )
+            conn.execute(
+                "UPDATE sessions SET updated_at = ?, expires_at = ? WHERE id = ?",
+                (now, now + settings.INTERVIEW_SESSION_TTL, session_id),
+            )
+
+    def apply_summary(self, session_id: str, summary: str, upto_seq: int) -> bool:
+        """Stores a summary covering messages up to `upto_seq`, unless a newer one already landed."""
+        with self._lock:
+            cursor = self._connect().execute(
+                "UPDATE sessions SET summary = ?, summarized_upto = ? WHERE id = ? AND summarized_upto < ?",
+                (summary, upto_seq, session_id, upto_seq),
+            )
+        return cursor.rowcount == 1
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            cursor = conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        return cursor.rowcount == 1
+
+    def delete_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "DELETE FROM messages WHERE session_id IN (SELECT id FROM sessions WHERE expires_at < ?)", (now,)
+            )
+            cursor = conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class InterviewSessions:
+    """
+    Server-side interview state so clients send only the new message per turn.
+
+    The prompt for a turn is the stored system prompt, the running summary and
+    the messages after it, so its size stays bounded however long the
+    interview runs: once the unsummarized history passes
+    INTERVIEW_SUMMARY_TRIGGER_TOKENS, a background task folds everything but
+    the last INTERVIEW_KEEP_RECENT_MESSAGES into the summary. Each session
+    runs at most one turn at a time (a lease in SQLite, so this holds across
+    workers); a second submit while one is generating gets SessionBusy.
+    """
+
+    def __init__(self, store: InterviewSessionStore):
+        self.store = store
+        self._summarizing: Set[str] = set()
+        self._background: Set[asyncio.Task] = set()
+
+    async def create(self, request: InterviewRequest) -> Dict[str, Any]:
+        expired = await asyncio.to_thread(self.store.delete_expired)
+        if expired:
+            logger.info(f"Removed {expired} expired interview session(s)")
+        session_id = uuid.uuid4().hex
+        history = [{"role": m.role, "content": m.content} for m in request.history or []]
+        await asyncio.to_thread(self.store.create, session_id, interview_service.build_system_prompt(request), history)
+        self._maybe_summarize(session_id, history)
+        return await self.get(session_id)
+
+    async def get(self, session_id: str) -> Dict[str, Any]:
+        """Public view of a session with its full transcript; raises SessionNotFound."""
+        session = await asyncio.to_thread(self.store.get, session_id)
+        if session is None:
+            raise SessionNotFound(session_id)
+        messages = await asyncio.to_thread(self.store.messages, session_id)
+        return {
+            "session_id": session["id"],
+            "busy": bool(session["busy_until"] and session["busy_until"] >= time.time()),
+            "summary": session["summary"],
+            "summarized_messages": session["summarized_upto"],
+            "messages": [{"role": m["role"], "content": m["content"]} for m in messages],
+            "created_at": _iso(session["created_at"]),
+            "updated_at": _iso(session["updated_at"]),
+            "expires_at": _iso(session["expires_at"]),
+        }
+
+    async def delete(self, session_id: str):
+        if not await asyncio.to_thread(self.store.delete, session_id):
+            raise SessionNotFound(session_id)
+
+    async def start_turn(self, session_id: str, message: Optional[str]) -> List[Dict[str, str]]:
+        """
+        Claims the session for one turn, records the candidate's message and
+        returns the prompt for the model. Must be followed by stream_turn,
+        which releases the session. An empty message is only valid as the
+        opening turn.
+        """
+        if not await asyncio.to_thread(self.store.begin_turn, session_id, settings.INTERVIEW_TURN_TIMEOUT):
+            if await asyncio.to_thread(self.store.get, session_id) is None:
+                raise SessionNotFound(session_id)
+            raise SessionBusy(session_id)
+        try:
+            session = await asyncio.to_thread(self.store.get, session_id)
+            if session is None:
+                raise SessionNotFound(session_id)
+            message = (message or "").strip()
+            if message:
+                await asyncio.to_thread(self.store.append, session_id, "user", message)
+            messages = await asyncio.to_thread(self.store.messages, session_id, session["summarized_upto"])
+            if not message and messages:
+                raise ValueError("message is required after the opening turn")
+            return self._prompt(session, messages)
+        except BaseException:
+            await asyncio.to_thread(self.store.end_turn, session_id)
+            raise
+
+    async def stream_turn(self, session_id: str, prompt: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Streams the interviewer's reply, then stores it and releases the session."""
+        reply: List[str] = []
+        interrupted = True
+        try:
+            async for content in interview_service.stream_reply(prompt):
+                reply.append(content)
+                yield content
+            interrupted = False
+        except Exception as e:
+            interrupted = False
+            logger.error(f"Interview turn failed for session {session_id}: {e}")
+            yield f"Error: {str(e)}"
+        finally:
+            finish = self._finish_turn(session_id, "".join(reply))
+            if interrupted:
+                # Client went away mid-stream: the generator is being closed/cancelled, so
+                # keep what was already shown and free the session outside of it
+                self._spawn(finish)
+            else:
+                await finish
+
+    async def close(self):
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        self.store.close()
+
+    def _prompt(self, session: Dict[str, Any], messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        prompt = [{"role": "system", "content": session["system_prompt"]}]
+        if session["summary"]:
+            prompt.append({
+                "role": "system",
+                "content": "Notes on the interview so far (earlier turns are not shown):\n" + session["summary"],
+            })
+        # Safety net while a summary is still pending: drop the oldest verbatim turns
+        budget, start = settings.INTERVIEW_HISTORY_MAX_TOKENS, len(messages)
+        while start > 0 and (start == len(messages) or budget - messages[start - 1]["tokens"] >= 0):
+            budget -= messages[start - 1]["tokens"]
+            start -= 1
+        if start:
+            logger.warning(f"Interview prompt over budget, dropped {start} unsummarized message(s)")
+        prompt.extend({"role": m["role"], "content": m["content"]} for m in messages[start:])
+        return prompt
+
+    async def _finish_turn(self, session_id: str, reply: str):
+        try:
+            if reply:
+                await asyncio.to_thread(self.store.append, session_id, "assistant", reply)
+        finally:
+            await asyncio.to_thread(self.store.end_turn, session_id)
+        session = await asyncio.to_thread(self.store.get, session_id)
+        if session is not None:
+            self._maybe_summarize(session_id, await asyncio.to_thread(
+                self.store.messages, session_id, session["summarized_upto"]
+            ))
+
+    def _maybe_summarize(self, session_id: str, unsummarized: List[Dict[str, Any]]):
+        if session_id in self._summarizing or len(unsummarized) <= settings.INTERVIEW_KEEP_RECENT_MESSAGES:
+            return
+        tokens = sum(estimate_tokens(m["content"]) for m in unsummarized)
+        if tokens > settings.INTERVIEW_SUMMARY_TRIGGER_TOKENS:
+            self._summarizing.add(session_id)
+            self._spawn(self._summarize(session_id))
+
+    async def _summarize(self, session_id: str):
+        try:
+            session = await asyncio.to_thread(self.store.get, session_id)
+            if session is None:
+                return
+            messages = await asyncio.to_thread(self.store.messages, session_id, session["summarized_upto"])
+            # Not messages[:-keep]: with keep = 0 that is empty
+            fold = messages[:len(messages) - settings.INTERVIEW_KEEP_RECENT_MESSAGES]
+            if not fold:
+                return
+            started = time.perf_counter()
+            summary = await interview_service.summarize(session["summary"], fold)
+            if summary and await asyncio.to_thread(self.store.apply_summary, session_id, summary, fold[-1]["seq"]):
+                logger.info(
+                    f"Summarized {len(fold)} message(s) of interview {session_id} "
+                    f"in {time.perf_counter() - started:.2f}s"
+                )
+        except Exception as e:
+            # The hard history cap keeps prompts bounded; the next turn will try again
+            logger.warning(f"Interview summary failed for session {session_id}: {e}")
+        finally:
+            self._summarizing.discard(session_id)
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(deadline.detached(coro))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+
+interview_sessions = InterviewSessions(InterviewSessionStore(settings.INTERVIEW_DB_PATH))
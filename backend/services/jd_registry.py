@@ -0,0 +1,178 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+from config import settings
+from utils.cache import TTLCache
+from utils.minhash import MinHasher, band_keys, lsh_params, similarity
+from utils.nlp import extract_role_intent, tokenize
+from utils.sqlite import connect as sqlite_connect
+from utils.startup import LazyModule
+
+np = LazyModule("numpy")
+
+# last_seen is refreshed at most this often per JD, so repeat lookups stay read-only
+TOUCH_INTERVAL = 3600
+# Registrations between two sweeps of JDs unseen for longer than the TTL
+PRUNE_EVERY = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jds (
+    id         TEXT PRIMARY KEY,
+    title      TEXT NOT NULL,
+    signature  BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    last_seen  REAL
+);
+-- LSH buckets: one row per (band, band hash) of every registered JD
+CREATE TABLE IF NOT EXISTS jd_bands (
+    band  INTEGER NOT NULL,
+    key   INTEGER NOT NULL,
+    jd_id TEXT NOT NULL,
+    PRIMARY KEY (band, key, jd_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS jd_bands_jd ON jd_bands (jd_id);
+"""
+
+
+class JDRegistry:
+    """
+    Maps job description texts to canonical JD ids, so the same posting pasted
+    with trivial differences (whitespace, a tracking footer, a reordered
+    benefits section, another "Apply by" date) gets the same id and JD-keyed
+    caches hit. Texts are compared by MinHash signatures of their word
+    shingles; a JD whose estimated similarity to a registered one reaches
+    JD_DEDUP_THRESHOLD (and whose role title is the same) takes its id,
+    otherwise it is registered under a new one.
+
+    Lookups read a handful of LSH band rows and compare the few candidate
+    signatures, so they stay sub-millisecond however many JDs are stored;
+    exact repeats are answered from memory. Persisted in SQLite so ids
+    survive restarts and are shared by all workers; JDs not seen for
+    `ttl_days` (0 = keep forever) are dropped every PRUNE_EVERY registrations.
+    """
+
+    def __init__(self, path: str, threshold: float, num_perm: int, shingle_size: int, ttl_days: float = 0):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl_days * 86400
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Built on first use (or by the warm-up): both need numpy, which must not load at import
+        self._hasher: Optional[MinHasher] = None
+        self._bands: Tuple[int, int] = (0, 0)
+        self._hasher_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._exact = TTLCache(ttl=24 * 3600, max_entries=4096)  # normalized text hash -> id
+        self._registered = 0
+
+    @property
+    def hasher(self) -> MinHasher:
+        if self._hasher is None:
+            with self._hasher_lock:
+                if self._hasher is None:
+                    self._bands = lsh_params(self.threshold, self.num_perm)
+                    self._hasher = MinHasher(self.num_perm, self.shingle_size)
+        return self._hasher
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite_connect(self.path, _SCHEMA)
+            # Registries created before last_seen existed
+            if "last_seen" not in {r["name"] for r in conn.execute("PRAGMA table_info(jds)")}:
+                conn.execute("ALTER TABLE jds ADD COLUMN last_seen REAL")
+            conn.execute("UPDATE jds SET last_seen = created_at WHERE last_seen IS NULL")
+            conn.execute("CREATE INDEX IF NOT EXISTS jds_last_seen ON jds (last_seen)")
+            self._conn = conn
+        return self._conn
+
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        """Drops the JDs (and their LSH rows) not seen within the TTL. Runs inside the caller's transaction."""
+        cutoff = now - self.ttl
+        conn.execute("DELETE FROM jd_bands WHERE jd_id IN (SELECT id FROM jds WHERE last_seen < ?)", (cutoff,))
+        conn.execute("DELETE FROM jds WHERE last_seen < ?", (cutoff,))
+
+    def _match(self, conn: sqlite3.Connection, keys: List[int], signature: "np.ndarray", title: str) -> Optional[str]:
+        """Id of the most similar registered JD at or above the threshold, if any."""
+        candidates = set()
+        for band, key in enumerate(keys):
+            candidates.update(
+                r[0] for r in conn.execute("SELECT jd_id FROM jd_bands WHERE band = ? AND key = ?", (band, key))
+            )
+        if not candidates:
+            return None
+        ids = list(candidates)
+        rows = conn.execute(
+            f"SELECT id, title, signature FROM jds WHERE id IN ({','.join('?' * len(ids))})", ids
+        ).fetchall()
+        best: Tuple[float, Optional[str]] = (self.threshold, None)
+        for row in rows:
+            # The same template for another role is not a duplicate
+            if row["title"] != title:
+                continue
+            score = similarity(signature, np.frombuffer(row["signature"], dtype=np.uint32))
+            if score >= best[0]:
+                best = (score, row["id"])
+        return best[1]
+
+    def canonical_id(self, jd_text: str) -> str:
+        """Canonical id for the JD, registering it if no near-duplicate is known. Blocking."""
+        normalized = " ".join(tokenize(jd_text))
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        jd_id = self._exact.get(digest)
+        if jd_id is not None:
+            return jd_id
+
+        title = " ".join(tokenize(extract_role_intent(jd_text or "")))
+        signature = self.hasher.signature(normalized)
+        keys = band_keys(signature, *self._bands)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            jd_id = self._match(conn, keys, signature, title)
+            if jd_id is not None:
+                conn.execute(
+                    "UPDATE jds SET last_seen = ? WHERE id = ? AND last_seen < ?", (now, jd_id, now - TOUCH_INTERVAL)
+                )
+            else:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # Another worker may have registered it since the read above
+                    jd_id = self._match(conn, keys, signature, title)
+                    if jd_id is None:
+                        jd_id = uuid.uuid4().hex
+                        conn.execute(
+                            "INSERT INTO jds (id, title, signature, created_at, last_seen) VALUES (?, ?, ?, ?, ?)",
+                            (jd_id, title, signature.tobytes(), now, now),
+                        )
+                        conn.executemany(
+                            "INSERT OR IGNORE INTO jd_bands (band, key, jd_id) VALUES (?, ?, ?)",
+                            [(band, key, jd_id) for band, key in enumerate(keys)],
+                        )
+                        self._registered += 1
+                        if self.ttl and self._registered % PRUNE_EVERY == 0:
+                            self._prune(conn, now)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        self._exact.set(digest, jd_id)
+        return jd_id
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+jd_registry = JDRegistry(
+    settings.JD_DB_PATH,
+    settings.JD_DEDUP_THRESHOLD,
+    settings.JD_MINHASH_PERMUTATIONS,
+    settings.JD_SHINGLE_WORDS,
+    ttl_days=settings.JD_REGISTRY_TTL_DAYS,
+)
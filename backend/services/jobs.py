@@ -0,0 +1,390 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from config import settings
+from services.llm import TransientLLMError
+from services.ocr import PageBudget
+from services import pipeline
+from services.storage import upload_store
+from utils.sqlite import connect as sqlite_connect
+
+logger = logging.getLogger("backend")
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+TERMINAL_STATES = (SUCCEEDED, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    params      TEXT NOT NULL,
+    filepath    TEXT,
+    owner       TEXT,
+    result      TEXT,
+    error       TEXT,
+    truncated   INTEGER NOT NULL DEFAULT 0,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    run_after   REAL NOT NULL,
+    lease_until REAL,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    expires_at  REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, run_after);
+CREATE INDEX IF NOT EXISTS jobs_expiry ON jobs (expires_at);
+"""
+
+
+class QueueFull(Exception):
+    """Raised when the number of pending jobs has reached JOB_QUEUE_MAX."""
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+
+class JobStore:
+    """
+    SQLite persistence for jobs. All methods are blocking and serialized on
+    one connection; JobQueue calls them through asyncio.to_thread. WAL mode
+    lets several uvicorn workers share the same database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite_connect(self.path, _SCHEMA)
+            # Databases created before jobs had an owner
+            if "owner" not in {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            self._conn = conn
+        return self._conn
+
+    def insert(self, job_id: str, kind: str, params: Dict[str, Any], filepath: Optional[str], owner: Optional[str]):
+        now = time.time()
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO jobs (id, kind, status, params, filepath, owner, run_after, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(params), filepath, owner, now, now, now),
+            )
+
+    def count_pending(self) -> int:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()
+        return row[0]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def claim(self, lease_seconds: float, max_attempts: int) -> Optional[Dict[str, Any]]:
+        """
+        Atomically takes the oldest runnable job: queued and due, or running
+        with an expired lease (its worker died or the process was restarted).
+        A reclaimed job that has already been started `max_attempts` times is
+        not run again (the document likely crashes or OOM-kills the worker);
+        it comes back with status FAILED for the caller to finish.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, status, attempts FROM jobs WHERE (status = ? AND run_after <= ?) OR (status = ? AND lease_until < ?) "
+                    "ORDER BY run_after LIMIT 1",
+                    (QUEUED, now, RUNNING, now),
+                ).fetchone()
+                if row is not None and row["status"] == RUNNING and row["attempts"] >= max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                        (FAILED, f"Processing stopped unexpectedly {row['attempts']} times; giving up", now, row["id"]),
+                    )
+                elif row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_until = ?, updated_at = ? WHERE id = ?",
+                        (RUNNING, now + lease_seconds, now, row["id"]),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def pending_filepaths(self) -> List[str]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT filepath FROM jobs WHERE status IN (?, ?) AND filepath IS NOT NULL", (QUEUED, RUNNING)
+            ).fetchall()
+        return [r["filepath"] for r in rows]
+
+    def renew(self, job_id: str, lease_seconds: float) -> bool:
+        """Pushes back the lease of a job still running; False if it is no longer running."""
+        now = time.time()
+        with self._lock:
+            cursor = self._connect().execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ?", (now + lease_seconds, job_id, RUNNING)
+            )
+        return cursor.rowcount == 1
+
+    def update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._connect().execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def delete_expired(self) -> List[Tuple[str, Optional[str]]]:
+        """Removes finished jobs past their expiry; returns (id, filepath) of the deleted rows."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT id, filepath FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+            ).fetchall()
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(r["id"],) for r in rows])
+        return [(r["id"], r["filepath"]) for r in rows]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class JobQueue:
+    """
+    Durable background queue for document analyses.
+
+    Submitting persists the job and returns immediately; a fixed pool of
+    worker tasks (JOB_WORKERS) claims jobs from SQLite, runs the pipeline and
+    stores the result until it expires (JOB_RESULT_TTL). Transient LLM errors
+    are retried with exponential backoff up to JOB_MAX_ATTEMPTS. Jobs that
+    were running when the process stopped are picked up again on restart.
+    """
+
+    def __init__(self, store: JobStore, workers: int):
+        self.store = store
+        self.workers = workers
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._changed: Dict[str, asyncio.Event] = {}
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self.store._connect)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+        logger.info(f"Job queue started with {self.workers} worker(s), store={self.store.path}")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.store.close()
+
+    async def submit(
+        self, kind: str, filepath: Optional[str], params: Dict[str, Any], owner: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Queues a job; with an `owner`, only lookups made as that owner see it."""
+        if await asyncio.to_thread(self.store.count_pending) >= settings.JOB_QUEUE_MAX:
+            raise QueueFull()
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self.store.insert, job_id, kind, params, filepath, owner)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return await self.get(job_id, owner)
+
+    async def pending_files(self) -> List[str]:
+        """Input files of jobs that still need them (queued or running)."""
+        return await asyncio.to_thread(self.store.pending_filepaths)
+
+    async def get(self, job_id: str, owner: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Public view of a job, or None if it does not exist (or has expired).
+        With `owner`, a job submitted by someone else does not exist either.
+        """
+        row = await asyncio.to_thread(self.store.get, job_id)
+        if row is None or (row["expires_at"] and row["expires_at"] < time.time()):
+            return None
+        if owner is not None and row["owner"] != owner:
+            return None
+        return {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "created_at": _iso(row["created_at"]),
+            "updated_at": _iso(row["updated_at"]),
+            "expires_at": _iso(row["expires_at"]),
+            "truncated": bool(row["truncated"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+        }
+
+    async def watch(
+        self, job_id: str, heartbeat: float = 15, owner: Optional[str] = None
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yields the job each time its state changes, ending after a terminal
+        state. Yields None when nothing changed for `heartbeat` seconds so
+        callers can keep the connection alive. Changes made by other worker
+        processes are picked up by polling the store.
+        """
+        last_seen = None
+        idle = 0.0
+        while True:
+            # Register before reading so a change between the read and the wait isn't missed
+            event = self._changed.setdefault(job_id, asyncio.Event())
+            job = await self.get(job_id, owner)
+            if job is None:
+                return
+            if job["updated_at"] != last_seen:
+                last_seen = job["updated_at"]
+                idle = 0.0
+                yield job
+                if job["status"] in TERMINAL_STATES:
+                    return
+            elif idle >= heartbeat:
+                idle = 0.0
+                yield None
+            t0 = time.monotonic()
+            try:
+                await asyncio.wait_for(event.wait(), timeout=settings.JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            idle += time.monotonic() - t0
+
+    async def wait(self, job_id: str, timeout: float, owner: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The job once it has finished, or its current state if `timeout` passes first; None if unknown."""
+        async def until_done():
+            last = None
+            async for job in self.watch(job_id, heartbeat=float("inf"), owner=owner):
+                last = job
+            return last
+        try:
+            return await asyncio.wait_for(until_done(), timeout)
+        except asyncio.TimeoutError:
+            return await self.get(job_id, owner)
+
+    def _notify(self, job_id: str):
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _worker(self, n: int):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim, settings.JOB_LEASE_SECONDS, settings.JOB_MAX_ATTEMPTS)
+            except sqlite3.Error as e:
+                logger.error(f"Job worker {n} could not claim a job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if job["status"] == FAILED:
+                # Out of attempts after its workers kept dying: expire it and free its file
+                logger.error(f"Job {job['id']} failed: {job['error']}")
+                await self._finish(job, FAILED, error=job["error"])
+                self._notify(job["id"])
+                continue
+            self._notify(job["id"])
+            await self._run(job)
+
+    async def _keep_leased(self, job_id: str):
+        """Renews the job's lease while it runs, so a slow document is not reclaimed and run twice."""
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+            try:
+                if not await asyncio.to_thread(self.store.renew, job_id, settings.JOB_LEASE_SECONDS):
+                    return
+            except sqlite3.Error as e:
+                logger.warning(f"Could not renew the lease of job {job_id}: {e}")
+
+    async def _run(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        params = json.loads(job["params"])
+        budget = PageBudget()
+        t0 = time.perf_counter()
+        lease = asyncio.create_task(self._keep_leased(job_id))
+        try:
+            if job["kind"] == "parse-resume":
+                result = await pipeline.parse_document(job["filepath"], budget, raise_transient=True)
+            elif job["kind"] == "full-analysis":
+                result = await pipeline.full_analysis(job["filepath"], params["jd"], budget, raise_transient=True)
+            else:
+                raise ValueError(f"Unknown job kind: {job['kind']}")
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back so the next process picks it up (if this write
+            # doesn't make it, the lease expires and the job is reclaimed anyway)
+            await asyncio.shield(asyncio.to_thread(
+                self.store.update, job_id, status=QUEUED, attempts=job["attempts"] - 1, lease_until=None
+            ))
+            raise
+        except TransientLLMError as e:
+            if job["attempts"] < settings.JOB_MAX_ATTEMPTS:
+                delay = settings.JOB_RETRY_BACKOFF * 2 ** (job["attempts"] - 1)
+                logger.warning(f"Job {job_id} attempt {job['attempts']} failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.to_thread(
+                    self.store.update, job_id,
+                    status=QUEUED, error=str(e), run_after=time.time() + delay, lease_until=None,
+                )
+            else:
+                await self._finish(job, FAILED, error=str(e))
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            await self._finish(job, FAILED, error=str(e))
+        else:
+            logger.info(f"Job {job_id} ({job['kind']}) done in {time.perf_counter() - t0:.2f}s")
+            await self._finish(job, SUCCEEDED, result=result, truncated=budget.truncated)
+        finally:
+            lease.cancel()
+        self._notify(job_id)
+
+    async def _finish(self, job: Dict[str, Any], status: str, result: Any = None, error: Optional[str] = None, truncated: bool = False):
+        await asyncio.to_thread(
+            self.store.update, job["id"],
+            status=status,
+            result=json.dumps(result) if result is not None else None,
+            error=error,
+            truncated=int(truncated),
+            lease_until=None,
+            expires_at=time.time() + settings.JOB_RESULT_TTL,
+        )
+        await upload_store.release(job["filepath"])
+
+    async def _sweeper(self):
+        while True:
+            try:
+                expired = await asyncio.to_thread(self.store.delete_expired)
+                for _, filepath in expired:
+                    await upload_store.release(filepath)
+                if expired:
+                    logger.info(f"Expired {len(expired)} job result(s)")
+            except sqlite3.Error as e:
+                logger.error(f"Job sweeper failed: {e}")
+            await asyncio.sleep(settings.JOB_SWEEP_INTERVAL)
+
+
+job_queue = JobQueue(JobStore(settings.JOBS_DB_PATH), workers=settings.JOB_WORKERS)
@@ -0,0 +1,263 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import httpx
+from config import settings
+from utils.json_stream import IncrementalJSONParser
+from utils import deadline
+from utils.deadline import DeadlineExceeded
+
+logger = logging.getLogger("backend")
+
+# HTTP statuses worth retrying: timeouts, rate limits and upstream hiccups
+TRANSIENT_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+# Pseudo-field sent to on_field when a hedged call switches attempts: the fields received so
+# far are void, the ones that follow come from the attempt now producing the answer
+RESET_FIELD = "__reset__"
+
+
+class TransientLLMError(Exception):
+    """An LLM call failed in a way that is likely to succeed if retried later."""
+
+
+def _status_code(exc: BaseException):
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """True for timeouts, connection failures and retryable HTTP statuses from HF / Groq clients."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    return _status_code(exc) in TRANSIENT_STATUS_CODES
+
+
+async def stream_chat_json(
+    client,
+    messages: List[Dict[str, Any]],
+    on_field: Optional[Callable[[str, Any], None]] = None,
+    **params,
+) -> Tuple[Any, str]:
+    """
+    Streams a chat completion that should be one JSON object, calling
+    on_field(key, value) for each top-level field as soon as it is complete.
+    Returns (document, raw text); the document is repaired if the output was
+    truncated or slightly invalid, and ValueError is raised if it cannot be.
+    """
+    parser = IncrementalJSONParser()
+    stream = await client.chat_completion(messages=messages, stream=True, **params)
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        for key, value in parser.feed(delta):
+            if on_field is not None:
+                try:
+                    on_field(key, value)
+                except Exception as e:
+                    logger.warning(f"Field callback failed for {key!r}: {e}")
+    return parser.result(), parser.buffer
+
+
+class GroqChatClient:
+    """
+    Exposes a groq.AsyncGroq client through the chat_completion() interface of
+    huggingface_hub.AsyncInferenceClient, so either can serve a JSON call.
+    """
+
+    def __init__(self, client, model: str):
+        self.client = client
+        self.model = model
+
+    async def chat_completion(self, messages: List[Dict[str, Any]], stream: bool = False, **params):
+        return await self.client.chat.completions.create(
+            model=self.model, messages=messages, stream=stream, **params
+        )
+
+
+class HedgePolicy:
+    """
+    Tail-latency policy for one kind of LLM call. Once a call has run longer
+    than the observed LLM_HEDGE_QUANTILE of recent latencies, a duplicate is
+    sent to the hedge provider and the first answer wins; a failed primary
+    fails over to it immediately. Every call is bounded by `deadline`.
+    """
+
+    def __init__(self, kind: str, hedge: bool, deadline: float, window: int = 200):
+        self.kind = kind
+        self.hedge = hedge
+        self.deadline = deadline
+        self.latencies: deque = deque(maxlen=window)
+        self.counters = {
+            "calls": 0, "primary_wins": 0, "hedges_fired": 0, "hedge_wins": 0,
+            "failovers": 0, "errors": 0, "deadline_exceeded": 0,
+        }
+
+    def record(self, seconds: float):
+        self.latencies.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on the primary before hedging; a fixed guess until enough calls were seen."""
+        if len(self.latencies) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return settings.LLM_HEDGE_INITIAL_DELAY
+        return max(settings.LLM_HEDGE_MIN_DELAY, self.quantile(settings.LLM_HEDGE_QUANTILE))
+
+    def report(self) -> Dict[str, Any]:
+        fired = self.counters["hedges_fired"]
+        p50, p90 = self.quantile(0.5), self.quantile(0.9)
+        return {
+            "hedge": self.hedge,
+            "deadline_s": self.deadline,
+            "hedge_delay_s": round(self.hedge_delay(), 3),
+            "samples": len(self.latencies),
+            "latency_p50_s": round(p50, 3) if p50 is not None else None,
+            "latency_p90_s": round(p90, 3) if p90 is not None else None,
+            "hedge_rate": round(fired / self.counters["calls"], 3) if self.counters["calls"] else None,
+            "hedge_win_rate": round(self.counters["hedge_wins"] / fired, 3) if fired else None,
+            **self.counters,
+        }
+
+
+HEDGE_POLICIES = {
+    "parse": HedgePolicy("parse", hedge=settings.LLM_PARSE_HEDGE, deadline=settings.LLM_PARSE_DEADLINE),
+    "ats": HedgePolicy("ats", hedge=settings.LLM_ATS_HEDGE, deadline=settings.LLM_ATS_DEADLINE),
+}
+
+_hedge_client: Optional[GroqChatClient] = None
+
+
+def hedge_client() -> Optional[GroqChatClient]:
+    """The secondary provider: Groq (shared with the interview) on LLM_HEDGE_MODEL; None without a key."""
+    global _hedge_client
+    from services.interview import interview_service  # deferred: interview imports nothing from here
+
+    groq = interview_service.client
+    if groq is None or not settings.LLM_HEDGE_MODEL:
+        return None
+    if _hedge_client is None or _hedge_client.client is not groq:
+        _hedge_client = GroqChatClient(groq, settings.LLM_HEDGE_MODEL)
+    return _hedge_client
+
+
+def hedge_report() -> Dict[str, Any]:
+    return {
+        "hedge_model": settings.LLM_HEDGE_MODEL or None,
+        "policies": {kind: policy.report() for kind, policy in HEDGE_POLICIES.items()},
+    }
+
+
+async def hedged_chat_json(
+    kind: str,
+    primary,
+    messages: List[Dict[str, Any]],
+    on_field: Optional[Callable[[str, Any], None]] = None,
+    **params,
+) -> Tuple[Any, str]:
+    """
+    stream_chat_json under the HedgePolicy for `kind`: hedged to the secondary
+    provider past the observed p90 (or on a primary failure) and cancelled at
+    the policy deadline with asyncio.TimeoutError. Fields are forwarded to
+    on_field from whichever attempt produces one first; if another attempt
+    ends up answering, on_field gets RESET_FIELD followed by that attempt's
+    fields. When the request deadline is closer than the policy's, it wins
+    and DeadlineExceeded is raised instead.
+    """
+    deadline.check(f"LLM {kind} call")
+    policy = HEDGE_POLICIES[kind]
+    secondary = hedge_client() if policy.hedge else None
+    timeout = deadline.cap(policy.deadline)
+    policy.counters["calls"] += 1
+    try:
+        return await asyncio.wait_for(
+            _race(policy, primary, secondary, messages, on_field, params), timeout=timeout
+        )
+    except asyncio.TimeoutError:
+        policy.counters["deadline_exceeded"] += 1
+        if timeout < policy.deadline:
+            raise DeadlineExceeded(f"Request deadline reached during the LLM {kind} call") from None
+        # Leaving it out would make the hedge delay too optimistic; a cut-off by the request
+        # deadline above says nothing about the model's latency
+        policy.record(policy.deadline)
+        raise asyncio.TimeoutError(f"LLM {kind} call exceeded its {policy.deadline}s deadline") from None
+    except Exception:
+        policy.counters["errors"] += 1
+        raise
+
+
+async def _race(policy: HedgePolicy, primary, secondary, messages, on_field, params) -> Tuple[Any, str]:
+    started = time.monotonic()
+    leader: List[str] = []  # the attempt whose fields reach on_field
+    produced: Dict[str, List[Tuple[str, Any]]] = {"primary": [], "hedge": []}
+
+    def emit(key: str, value: Any):
+        try:
+            on_field(key, value)
+        except Exception as e:
+            logger.warning(f"Field callback failed for {key!r}: {e}")
+
+    def forward(name: str):
+        if on_field is None:
+            return None
+
+        def callback(key: str, value: Any):
+            produced[name].append((key, value))
+            if not leader:
+                leader.append(name)
+            if leader[0] == name:
+                on_field(key, value)
+        return callback
+
+    def follow(name: Optional[str]):
+        """Voids the fields forwarded so far and replays `name`'s (None: the next attempt to produce one leads)."""
+        if on_field is None or not leader or leader[0] == name:
+            return
+        emit(RESET_FIELD, None)
+        leader.clear()
+        if name is not None:
+            leader.append(name)
+            for key, value in produced[name]:
+                emit(key, value)
+
+    tasks = {asyncio.create_task(stream_chat_json(primary, messages, forward("primary"), **params)): "primary"}
+    errors: Dict[str, BaseException] = {}
+    hedged = secondary is None
+    try:
+        while tasks:
+            timeout = None if hedged else max(0.0, policy.hedge_delay() - (time.monotonic() - started))
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks.pop(task)
+                if task.exception() is not None:
+                    # As slow as it gets: a fast failure (a 401 in 50 ms) must not pull the hedge delay down
+                    policy.record(policy.deadline)
+                    errors[name] = task.exception()
+                    logger.warning(f"LLM {policy.kind} {name} attempt failed: {task.exception()}")
+                    if leader and leader[0] == name:
+                        follow(next(iter(tasks.values()), None))
+                    continue
+                # A cancelled slow primary still tells us its latency was at least this long
+                policy.record(time.monotonic() - started)
+                follow(name)
+                policy.counters["primary_wins" if name == "primary" else "hedge_wins"] += 1
+                return task.result()
+            if not hedged and (not done or "primary" in errors):
+                hedged = True
+                policy.counters["failovers" if "primary" in errors else "hedges_fired"] += 1
+                tasks[asyncio.create_task(stream_chat_json(secondary, messages, forward("hedge"), **params))] = "hedge"
+        raise errors.get("primary") or errors["hedge"]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,16 +1,66 @@
-import pdfplumber
-from pdf2image import convert_from_path
-import pytesseract
-from PIL import Image
-import docx
-import pypandoc
 import os
-from typing import List, Dict, Any, Union
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple, Union
 import logging
 from config import settings
+from utils.layout import PageLayout
+from utils.latex import latex_to_text
+from utils.docx_text import docx_to_text
+from services.pandoc_pool import pandoc_pool
+from utils.startup import LazyModule
+from utils import deadline, memory
+from utils.memory import DocumentTooComplex
+
+# Heavy PDF/OCR stacks are imported on first use (or by the startup warm-up)
+pdfplumber = LazyModule("pdfplumber")
+pdfplumber_text = LazyModule("pdfplumber.utils.text")
+pdf2image = LazyModule("pdf2image")
+pytesseract = LazyModule("pytesseract")
+np = LazyModule("numpy")
 
 logger = logging.getLogger("backend")
 
+# pdftoppm and tesseract run as subprocesses, so a thread pool gives real parallelism
+_ocr_executor: ThreadPoolExecutor | None = None
+
+
+def _get_ocr_executor() -> ThreadPoolExecutor:
+    global _ocr_executor
+    if _ocr_executor is None:
+        _ocr_executor = ThreadPoolExecutor(max_workers=settings.OCR_MAX_WORKERS, thread_name_prefix="ocr")
+    return _ocr_executor
+
+class PageBudget:
+    """
+    Page / character budget for one document (0 disables a limit).
+    Extraction stops once it is spent and sets `truncated`.
+    """
+    def __init__(self, max_pages: int | None = None, max_chars: int | None = None):
+        self.max_pages = settings.MAX_DOCUMENT_PAGES if max_pages is None else max_pages
+        self.max_chars = settings.MAX_DOCUMENT_CHARS if max_chars is None else max_chars
+        self.pages = 0
+        self.chars = 0
+        self.truncated = False
+
+    def pages_exhausted(self) -> bool:
+        return bool(self.max_pages) and self.pages >= self.max_pages
+
+    def chars_exhausted(self) -> bool:
+        return bool(self.max_chars) and self.chars >= self.max_chars
+
+    def take(self, page: Dict[str, Any]) -> Dict[str, Any]:
+        """Accounts for a page, clipping its text to whatever character budget is left."""
+        text = page.get("text") or ""
+        if self.max_chars and len(text) > self.max_chars - self.chars:
+            page["text"] = text[:max(0, self.max_chars - self.chars)]
+            self.truncated = True
+        self.pages += 1
+        self.chars += len(page.get("text") or "")
+        return page
+
+
 class OCRService:
     @staticmethod
     def normalize_bbox(bbox, width, height):
@@ -24,64 +74,208 @@ class OCRService:
         ]
 
     @staticmethod
-    async def process_pdf(filepath: str) -> Dict[str, Any]:
-        pages_data = []
+    def needs_ocr(text: str | None) -> bool:
+        """A page without a usable text layer (scanned / image-only) must be OCR'd."""
+        return len((text or "").strip()) < settings.OCR_MIN_TEXT_CHARS
+
+    @staticmethod
+    def extract_page_layout(page, with_words: bool = True):
+        """
+        Single character-clustering pass over a pdfplumber page.
+        Returns the same reading-order text as page.extract_text() and, if
+        with_words, the same word dicts as page.extract_words().
+        """
+        wordmap = pdfplumber_text.WordExtractor().extract_wordmap(page.chars)
+        text = wordmap.to_textmap(
+            presorted=True,
+            layout_bbox=page.bbox,
+            layout_width=page.width,
+            layout_height=page.height
+        ).as_string
+        words = [w for w, _ in wordmap.tuples] if with_words else []
+        return text, words
+
+    @staticmethod
+    def ocr_page(filepath: str, page_num: int, with_words: bool = True, timeout: float | None = None) -> Dict[str, Any]:
+        """
+        Rasterizes a single PDF page at OCR_DPI and runs Tesseract on it.
+        Blocking; meant to run on the OCR worker pool. `timeout` bounds each
+        subprocess (default OCR_PAGE_TIMEOUT).
+        """
+        timeout = max(1, int(settings.OCR_PAGE_TIMEOUT if timeout is None else timeout))
+        images = pdf2image.convert_from_path(
+            filepath,
+            dpi=settings.OCR_DPI,
+            first_page=page_num,
+            last_page=page_num,
+            grayscale=True,
+            timeout=timeout,
+        )
+        page_image = images[0]
+        img_width, img_height = page_image.size
+        data = pytesseract.image_to_data(
+            page_image,
+            lang=settings.OCR_LANG,
+            output_type=pytesseract.Output.DICT,
+            timeout=timeout,
+        )
+
+        kept = []
+        lines: Dict[tuple, List[str]] = {}
+        for i, word in enumerate(data["text"]):
+            word = (word or "").strip()
+            if not word or float(data["conf"][i]) < 0:
+                continue
+            kept.append(i)
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+
+        # dicts keep insertion order, which is Tesseract's reading order
+        text = "\n".join(" ".join(line) for line in lines.values())
+
+        words = PageLayout.empty()
+        if with_words and kept:
+            idx = np.asarray(kept)
+            left = np.asarray(data["left"], dtype=np.float64)[idx]
+            top = np.asarray(data["top"], dtype=np.float64)[idx]
+            boxes = np.stack([
+                left,
+                top,
+                left + np.asarray(data["width"], dtype=np.float64)[idx],
+                top + np.asarray(data["height"], dtype=np.float64)[idx]
+            ], axis=1)
+            texts = [data["text"][i].strip() for i in kept]
+            words = PageLayout.from_arrays(texts, boxes, img_width, img_height)
+        # The raster is only needed for Tesseract; holding it per page dominated memory on scanned PDFs
+        page_image.close()
+        return {"text": text, "words": words, "image": None}
+
+    @staticmethod
+    def _check_page_size(page, page_num: int):
+        """Refuses pages whose layout or raster would be unreasonably large before any of it is built."""
+        megapixels = (page.width / 72 * settings.OCR_DPI) * (page.height / 72 * settings.OCR_DPI) / 1e6
+        if settings.MAX_PAGE_MEGAPIXELS and megapixels > settings.MAX_PAGE_MEGAPIXELS:
+            raise DocumentTooComplex(
+                f"Page {page_num} is too large ({page.width:.0f}x{page.height:.0f} pt, "
+                f"{megapixels:.0f} MP at {settings.OCR_DPI} dpi)"
+            )
+        if settings.MAX_PAGE_CHARS and len(page.chars) > settings.MAX_PAGE_CHARS:
+            raise DocumentTooComplex(f"Page {page_num} has too much text ({len(page.chars)} characters)")
+
+    @staticmethod
+    def _extract_pdf_page(page, page_num: int, with_words: bool) -> Dict[str, Any]:
+        OCRService._check_page_size(page, page_num)
+        width, height = page.width, page.height
+        # One layout pass yields both the text and the words with bboxes
+        text, words = OCRService.extract_page_layout(page, with_words)
+
+        # Pages with a text layer are never rasterized; scanned pages are
+        # flagged here and OCR'd on the worker pool by iter_pdf_pages.
+        return {
+            "page_num": page_num,
+            "width": width,
+            "height": height,
+            "text": text,
+            # Columnar word storage, normalized to 0-1000 in one vectorized step
+            "words": PageLayout.from_words(words, width, height),
+            "image": None,
+            "ocr": OCRService.needs_ocr(text)
+        }
+
+    @staticmethod
+    async def _resolve_page(page_data: Dict[str, Any], ocr_future, filepath: str) -> Dict[str, Any]:
+        if ocr_future is None:
+            return page_data
+        try:
+            page_data.update(await ocr_future)
+            memory.checkpoint(f"OCR of page {page_data['page_num']}")
+        except Exception as e:
+            # A failed or timed-out OCR page degrades to empty text instead of failing the document
+            logger.warning(f"OCR failed for page {page_data['page_num']} of {filepath}: {e}")
+        return page_data
+
+    @staticmethod
+    async def iter_pdf_pages(filepath: str, with_words: bool = True, budget: "PageBudget | None" = None):
+        """
+        Yields page dicts one at a time, in page order, stopping once the budget
+        is spent. Scanned pages are OCR'd on the worker pool while later pages
+        are still being extracted, with at most OCR_MAX_WORKERS pages in flight.
+        The request deadline is checked per page and bounds each OCR job; OCR
+        jobs still queued when the caller stops (or is cancelled) are dropped.
+        Memory limits are checked after every page (see utils.memory).
+        """
+        budget = budget if budget is not None else PageBudget()
+        loop = asyncio.get_running_loop()
+        pending = deque()
         try:
-            # 1. Extract text + layout with pdfplumber
             with pdfplumber.open(filepath) as pdf:
+                n_pages = len(pdf.pages)
                 for i, page in enumerate(pdf.pages):
-                    width, height = page.width, page.height
-                    text = page.extract_text()
-                    
-                    # Get words with bboxes
-                    words = page.extract_words()
-                    
-                    # Convert page to image for AI models later
-                    # We might need to save this or return base64, 
-                    # for now let's keep the path or in-memory object logic in mind
-                    # For LayoutLMv3, we need the image.
-                    
-                    # Render page to image
-                    # Note: pdf2image requires poppler installed
-                    images = convert_from_path(filepath, first_page=i+1, last_page=i+1)
-                    page_image = images[0]
-                    
-                    # Normalize text blocks
-                    normalized_words = []
-                    for w in words:
-                        bbox = (w['x0'], w['top'], w['x1'], w['bottom'])
-                        norm_bbox = OCRService.normalize_bbox(bbox, width, height)
-                        normalized_words.append({
-                            "text": w['text'],
-                            "bbox": norm_bbox
-                        })
-                    
-                    pages_data.append({
-                        "page_num": i + 1,
-                        "width": width,
-                        "height": height,
-                        "text": text,
-                        "words": normalized_words,
-                        "image": page_image # Keep PIL image in memory for next step
-                    })
-                    
-            return {"pages": pages_data, "type": "pdf"}
+                    if budget.max_pages and i >= budget.max_pages:
+                        budget.truncated = True
+                        break
+
+                    deadline.check(f"page {i + 1}")
+                    page_data = await asyncio.to_thread(OCRService._extract_pdf_page, page, i + 1, with_words)
+                    page.close()  # drop pdfplumber's cached object graph for this page
+                    memory.checkpoint(f"page {i + 1}")
+
+                    ocr_future = None
+                    if page_data["ocr"]:
+                        logger.info(f"No text layer on page {i + 1} of {filepath}, running OCR")
+                        ocr_future = loop.run_in_executor(
+                            _get_ocr_executor(), OCRService.ocr_page, filepath, i + 1, with_words,
+                            deadline.cap(settings.OCR_PAGE_TIMEOUT),
+                        )
+                    pending.append((page_data, ocr_future))
+
+                    while pending and (
+                        pending[0][1] is None or pending[0][1].done() or len(pending) > settings.OCR_MAX_WORKERS
+                    ):
+                        yield budget.take(await OCRService._resolve_page(*pending.popleft(), filepath))
+                        if budget.chars_exhausted():
+                            budget.truncated = budget.truncated or bool(pending) or i + 1 < n_pages
+                            return
+
+                while pending:
+                    yield budget.take(await OCRService._resolve_page(*pending.popleft(), filepath))
+                    if budget.chars_exhausted():
+                        budget.truncated = budget.truncated or bool(pending)
+                        return
+        finally:
+            for _, ocr_future in pending:
+                if ocr_future is not None:
+                    ocr_future.cancel()
+
+    @staticmethod
+    async def process_pdf(filepath: str, with_words: bool = True, budget: "PageBudget | None" = None) -> Dict[str, Any]:
+        """
+        Extracts text (and, if with_words, normalized word boxes) from every page
+        within the budget. Callers that only need text should pass with_words=False
+        to skip bbox work.
+        """
+        budget = budget if budget is not None else PageBudget()
+        try:
+            pages_data = [page async for page in OCRService.iter_pdf_pages(filepath, with_words, budget)]
+            return {"pages": pages_data, "type": "pdf", "truncated": budget.truncated}
             
         except Exception as e:
             logger.error(f"Error processing PDF: {e}")
             raise e
 
     @staticmethod
-    async def process_docx(filepath: str) -> Dict[str, Any]:
+    async def process_docx(filepath: str, max_chars: int = 0) -> Dict[str, Any]:
+        """
+        Streams word/document.xml (plus headers, footers, tables and text boxes)
+        straight from the zip instead of loading the python-docx object model.
+        Reading stops early once max_chars is exceeded (0 = no limit).
+        """
         try:
-            doc = docx.Document(filepath)
-            full_text = []
-            for para in doc.paragraphs:
-                full_text.append(para.text)
+            text = await asyncio.to_thread(docx_to_text, filepath, max_chars)
             
             return {
                 "pages": [{
-                    "text": "\n".join(full_text),
+                    "text": text,
                     "words": [], # DOCX doesn't have layout info easily
                     "image": None 
                 }],
@@ -94,28 +288,97 @@ class OCRService:
     @staticmethod
     async def process_tex(filepath: str) -> Dict[str, Any]:
         try:
-            # Requires pandoc installed on system
-            text = pypandoc.convert_file(filepath, 'plain')
+            with open(filepath, encoding="utf-8", errors="replace") as f:
+                source = f.read()
+
+            # Common resume templates convert in-process; anything else goes to the pandoc pool
+            text = latex_to_text(source) if settings.TEX_FAST_PATH else None
+            path = "fast"
+            if text is None:
+                text, path = await pandoc_pool.convert(source)
+            logger.info(f"Converted {filepath} via {path} path")
             return {
                 "pages": [{
                     "text": text,
                     "words": [],
                     "image": None
                 }],
-                "type": "tex"
+                "type": "tex",
+                "extraction_path": path
             }
         except Exception as e:
              logger.error(f"Error processing TeX: {e}")
              raise e
 
     @staticmethod
-    async def parse_document(filepath: str) -> Dict[str, Any]:
+    async def iter_pages(filepath: str, with_words: bool = True, budget: "PageBudget | None" = None):
+        """
+        Streams the pages of any supported document within the budget.
+        Inspect budget.truncated afterwards to know whether content was dropped.
+        """
+        budget = budget if budget is not None else PageBudget()
         ext = os.path.splitext(filepath)[1].lower()
         if ext == '.pdf':
-            return await OCRService.process_pdf(filepath)
+            async for page in OCRService.iter_pdf_pages(filepath, with_words, budget):
+                yield page
+            return
         elif ext == '.docx':
-            return await OCRService.process_docx(filepath)
+            doc = await OCRService.process_docx(filepath, budget.max_chars)
         elif ext == '.tex':
-            return await OCRService.process_tex(filepath)
+            doc = await OCRService.process_tex(filepath)
         else:
             raise ValueError(f"Unsupported format: {ext}")
+        for page in doc["pages"]:
+            yield budget.take(page)
+            if budget.chars_exhausted() or budget.pages_exhausted():
+                break
+
+    @staticmethod
+    async def extract_text(filepath: str, budget: "PageBudget | None" = None) -> str:
+        """Text-only extraction for the LLM parser, consuming pages as they are produced."""
+        budget = budget if budget is not None else PageBudget()
+        texts = []
+        async for page in OCRService.iter_pages(filepath, with_words=False, budget=budget):
+            texts.append(page.get('text') or '')
+        if budget.truncated:
+            logger.warning(
+                f"Truncated {filepath} at {budget.pages} page(s) / {budget.chars} chars "
+                f"(limits: {budget.max_pages} pages, {budget.max_chars} chars)"
+            )
+        return "\n".join(texts)
+
+    @staticmethod
+    async def parse_document(filepath: str, with_words: bool = True, budget: "PageBudget | None" = None) -> Dict[str, Any]:
+        budget = budget if budget is not None else PageBudget()
+        ext = os.path.splitext(filepath)[1].lower()
+        if ext == '.pdf':
+            return await OCRService.process_pdf(filepath, with_words, budget)
+        elif ext == '.docx':
+            doc = await OCRService.process_docx(filepath, budget.max_chars)
+        elif ext == '.tex':
+            doc = await OCRService.process_tex(filepath)
+        else:
+            raise ValueError(f"Unsupported format: {ext}")
+        pages = []
+        for page in doc["pages"]:
+            pages.append(budget.take(page))
+            if budget.chars_exhausted() or budget.pages_exhausted():
+                break
+        doc["pages"] = pages
+        doc["truncated"] = budget.truncated
+        return doc
+
+
+def extract_text_sync(filepath: str, max_pages: int, max_chars: int) -> Tuple[str, bool]:
+    """
+    OCRService.extract_text as a blocking call, for worker processes (bulk ingestion).
+    Runs under the per-document memory limits of that process. Returns (text, truncated).
+    """
+    budget = PageBudget(max_pages, max_chars)
+    monitor = memory.MemoryMonitor(doc_limit_mb=settings.DOC_MEMORY_LIMIT_MB, rss_limit_mb=settings.WORKER_RSS_LIMIT_MB)
+
+    async def extract() -> str:
+        with monitor.track(os.path.basename(filepath)), memory.stage("extract"):
+            return await OCRService.extract_text(filepath, budget)
+
+    return asyncio.run(extract()), budget.truncated
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import shutil
+import socket
+from typing import List, Tuple
+import httpx
+from config import settings
+from utils.startup import LazyModule
+from utils import deadline
+
+pypandoc = LazyModule("pypandoc")
+
+logger = logging.getLogger("backend")
+
+# After a worker fails to start, topping up the pool is not retried for this long (seconds)
+SPAWN_RETRY_INTERVAL = 60
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class PandocPool:
+    """
+    Warm pool of long-running `pandoc server` processes (pandoc >= 3.0) so a
+    LaTeX conversion is an HTTP round-trip instead of a fresh pandoc start-up.
+    If the server mode is unavailable, conversions fall back to a one-shot
+    pypandoc call in a worker thread.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._workers: List[Tuple[asyncio.subprocess.Process, int]] = []
+        self._client: httpx.AsyncClient | None = None
+        self._lock: asyncio.Lock | None = None
+        self._next = 0
+        self._unavailable = False  # no pandoc binary at all
+        self._retry_at = 0.0
+
+    @staticmethod
+    def _server_command() -> List[str] | None:
+        if shutil.which("pandoc-server"):
+            return ["pandoc-server"]
+        if shutil.which("pandoc"):
+            return ["pandoc", "server"]
+        return None
+
+    async def _spawn(self, cmd: List[str]) -> Tuple[asyncio.subprocess.Process, int] | None:
+        port = _free_port()
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, "--port", str(port), "--timeout", str(settings.PANDOC_TIMEOUT),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        # Wait (bounded) for the worker to accept requests
+        loop = asyncio.get_running_loop()
+        ready_by = loop.time() + 5
+        while loop.time() < ready_by:
+            if proc.returncode is not None:
+                return None
+            try:
+                r = await self._client.get(f"http://127.0.0.1:{port}/version", timeout=1)
+                if r.status_code == 200:
+                    return proc, port
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+        proc.kill()
+        return None
+
+    async def start(self) -> bool:
+        """Starts (or tops up) the worker pool. Returns False if pandoc server mode is unavailable."""
+        if self._unavailable or self.size <= 0:
+            return False
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._workers = [(p, port) for p, port in self._workers if p.returncode is None]
+            if len(self._workers) >= self.size:
+                return True
+            cmd = self._server_command()
+            if cmd is None:
+                logger.warning("pandoc not found; TeX files can only use the fast path.")
+                self._unavailable = True
+                return False
+            loop = asyncio.get_running_loop()
+            if loop.time() < self._retry_at:
+                return bool(self._workers)
+            if self._client is None:
+                self._client = httpx.AsyncClient()
+            while len(self._workers) < self.size:
+                worker = await self._spawn(cmd)
+                if worker is None:
+                    # Old pandoc without server mode, or just a slow start: try again later, not per call
+                    logger.warning(
+                        f"pandoc server did not start (pandoc < 3.0?); using one-shot pandoc calls "
+                        f"for {SPAWN_RETRY_INTERVAL}s."
+                    )
+                    self._retry_at = loop.time() + SPAWN_RETRY_INTERVAL
+                    return bool(self._workers)
+                self._workers.append(worker)
+            logger.info(f"Pandoc pool ready with {len(self._workers)} worker(s)")
+            return True
+
+    async def convert(self, source: str) -> Tuple[str, str]:
+        """
+        Converts LaTeX source to plain text.
+        Returns (text, path) where path is "pandoc-server" or "pandoc".
+        """
+        if await self.start():
+            proc, port = self._workers[self._next % len(self._workers)]
+            self._next += 1
+            try:
+                r = await self._client.post(
+                    f"http://127.0.0.1:{port}/",
+                    json={"text": source, "from": "latex", "to": "plain"},
+                    headers={"Accept": "application/json"},
+                    timeout=deadline.cap(settings.PANDOC_TIMEOUT),
+                )
+                r.raise_for_status()
+                return r.json()["output"], "pandoc-server"
+            except Exception as e:
+                logger.warning(f"pandoc server conversion failed, retrying with one-shot pandoc: {e}")
+
+        # The one-shot fallback can't be interrupted, so don't start it past the request deadline
+        deadline.check("one-shot pandoc")
+
+        text = await asyncio.to_thread(pypandoc.convert_text, source, "plain", format="latex")
+        return text, "pandoc"
+
+    async def close(self):
+        for proc, _ in self._workers:
+            if proc.returncode is None:
+                proc.terminate()
+        for proc, _ in self._workers:
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                proc.kill()
+        self._workers = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+pandoc_pool = PandocPool(size=settings.PANDOC_POOL_SIZE)
@@ -1,27 +1,53 @@
 import logging
-import json
+import threading
 from config import settings
-from typing import Dict, Any
-from huggingface_hub import AsyncInferenceClient
+from typing import Dict, Any, Callable, Optional
+from utils.startup import startup_profile
+from utils.deadline import RequestAborted
+from services.llm import TransientLLMError, is_transient_error, hedged_chat_json
 
 logger = logging.getLogger("backend")
 
 class ResumeParserService:
     _instance = None
+    _client_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ResumeParserService, cls).__new__(cls)
-            cls._instance.client = None
-            if settings.HF_API_TOKEN:
-                cls._instance.client = AsyncInferenceClient(model=settings.LLM_MODEL, token=settings.HF_API_TOKEN)
-            else:
-                logger.warning("HF_API_TOKEN not found. LLM Parsing disabled.")
+            cls._instance._client = None
+            cls._instance._client_ready = False
         return cls._instance
 
-    async def parse_resume(self, text: str) -> Dict[str, Any]:
+    @property
+    def client(self):
+        # Built on first use so importing the service doesn't pull in huggingface_hub
+        # The lock makes a request wait for a warm-up thread still building it instead of seeing None
+        if not self._client_ready:
+            with self._client_lock:
+                if not self._client_ready:
+                    if settings.HF_API_TOKEN:
+                        with startup_profile.timed("initializer", "hf_parser_client"):
+                            from huggingface_hub import AsyncInferenceClient
+                            self._client = AsyncInferenceClient(model=settings.LLM_MODEL, token=settings.HF_API_TOKEN)
+                    else:
+                        logger.warning("HF_API_TOKEN not found. LLM Parsing disabled.")
+                    self._client_ready = True
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+        self._client_ready = True
+
+    async def parse_resume(
+        self, text: str, raise_transient: bool = False, on_field: Optional[Callable[[str, Any], None]] = None
+    ) -> Dict[str, Any]:
         """
         Takes raw text extracted from a resume and returns a strictly formatted JSON dict.
+        With raise_transient, retryable LLM failures raise TransientLLMError instead of returning {}.
+        The output is streamed: on_field(key, value) gets each top-level field as soon as the
+        model has finished writing it, and truncated or slightly invalid JSON is repaired.
         """
         if not self.client:
             logger.error("LLM Client not initialized. Returning empty dict.")
@@ -48,31 +74,28 @@ Required JSON Schema:
 Resume Text:
 {text}
 """
+        content = ""
         try:
-            response = await self.client.chat_completion(
-                messages=[{"role": "user", "content": prompt}],
+            parsed_data, content = await hedged_chat_json(
+                "parse",
+                self.client,
+                [{"role": "user", "content": prompt}],
+                on_field=on_field,
                 max_tokens=2048,
                 temperature=0.1
             )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Clean up potential markdown formatting like ```json ... ```
-            if content.startswith("```json"):
-                content = content[7:]
-            elif content.startswith("```"):
-                content = content[3:]
-                
-            if content.endswith("```"):
-                content = content[:-3]
-            
-            parsed_data = json.loads(content.strip())
+            if not isinstance(parsed_data, dict):
+                raise ValueError(f"expected a JSON object, got {type(parsed_data).__name__}")
             return parsed_data
             
-        except json.JSONDecodeError as decode_err:
+        except RequestAborted:
+            raise
+        except ValueError as decode_err:
             logger.error(f"Failed to decode JSON from LLM: {decode_err}\nContent received: {content}")
             return {}
         except Exception as e:
+            if raise_transient and is_transient_error(e):
+                raise TransientLLMError(f"LLM Parsing error: {e}") from e
             logger.error(f"LLM Parsing error: {e}")
             return {}
 
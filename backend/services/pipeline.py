@@ -0,0 +1,59 @@
+import os
+from typing import Any, Callable, Dict, Optional
+from config import settings
+from services.ocr import OCRService, PageBudget
+from services.parser import parser_service
+from services.structurer import structurer_service
+from services.ats import ats_service
+from services.interview import interview_service
+from utils import deadline, memory
+
+# Per-document memory accounting for the extraction pipeline (see /api/health/memory)
+memory_monitor = memory.MemoryMonitor(
+    doc_limit_mb=settings.DOC_MEMORY_LIMIT_MB,
+    rss_limit_mb=settings.WORKER_RSS_LIMIT_MB,
+    trace=settings.MEMORY_TRACEMALLOC,
+)
+
+
+async def parse_document(
+    filepath: str,
+    budget: PageBudget,
+    raise_transient: bool = False,
+    on_field: Optional[Callable[[str, Any], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Extract -> LLM parse -> structure. Shared by the synchronous routes and the job workers.
+    on_field(key, value) receives each structured top-level field while the model is still writing.
+    Raises memory.DocumentRejected when the document is over its memory / complexity limits.
+    """
+    with memory_monitor.track(os.path.basename(filepath)):
+        with memory.stage("extract"):
+            full_text = await OCRService.extract_text(filepath, budget)
+        deadline.check("parsing")
+        field_callback = None
+        if on_field is not None:
+            field_callback = lambda key, value: on_field(key, structurer_service.structure_field(key, value))
+        with memory.stage("parse"):
+            parsed_data = await parser_service.parse_resume(full_text, raise_transient=raise_transient, on_field=field_callback)
+        with memory.stage("structure"):
+            return structurer_service.structure_resume(parsed_data)
+
+
+async def full_analysis(filepath: str, jd: str, budget: PageBudget, raise_transient: bool = False) -> Dict[str, Any]:
+    """Parses the resume, then scores it against the job description."""
+    resume_data = await parse_document(filepath, budget, raise_transient=raise_transient)
+    deadline.check("scoring")
+    return await score_resume(resume_data, jd, raise_transient=raise_transient)
+
+
+async def score_resume(resume_data: Dict[str, Any], jd: str, raise_transient: bool = False) -> Dict[str, Any]:
+    """ATS-scores an already parsed resume; same response shape as full_analysis."""
+    jd_data = ats_service.process_jd(jd)
+    ats_result = await ats_service.calculate_score(resume_data, jd_data, raise_transient=raise_transient)
+    # The interview is usually the next step; have its first question ready by then
+    interview_service.prefetch_opening(resume_data, jd, jd_id=jd_data.get("jd_id"))
+    return {
+        "parsed_resume": resume_data,
+        "ats_analysis": ats_result
+    }
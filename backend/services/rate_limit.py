@@ -0,0 +1,73 @@
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+from utils.sqlite import connect as sqlite_connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key        TEXT PRIMARY KEY,
+    tokens     REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS buckets_idle ON buckets (updated_at);
+"""
+
+# Buckets untouched for this long are full again and can be forgotten
+IDLE_SECONDS = 3600
+PRUNE_EVERY = 1000
+
+
+class TokenBucketStore:
+    """
+    Token buckets in SQLite so every worker on the host draws from the same
+    balance. A bucket holds up to `capacity` tokens and refills at `rate`
+    tokens per second; state is only written when a request is admitted.
+    Blocking; call through asyncio.to_thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._takes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite_connect(self.path, _SCHEMA)
+        return self._conn
+
+    def take(self, key: str, cost: float, capacity: float, rate: float) -> Tuple[bool, float, float]:
+        """
+        Tries to spend `cost` tokens from `key`'s bucket.
+        Returns (admitted, tokens left, seconds until `cost` tokens are available).
+        """
+        cost = min(cost, capacity)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens = capacity if row is None else min(capacity, row["tokens"] + (now - row["updated_at"]) * rate)
+                admitted = tokens >= cost
+                if admitted:
+                    tokens -= cost
+                    conn.execute(
+                        "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)", (key, tokens, now)
+                    )
+                self._takes += 1
+                if self._takes % PRUNE_EVERY == 0:
+                    conn.execute("DELETE FROM buckets WHERE updated_at < ?", (now - IDLE_SECONDS,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        retry_after = 0.0 if admitted else (cost - tokens) / rate if rate > 0 else float(IDLE_SECONDS)
+        return admitted, tokens, retry_after
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from config import settings
+from utils.sqlite import connect as sqlite_connect
+
+logger = logging.getLogger("backend")
+
+# What a stored file is for; decides whether it may be expired or evicted
+UPLOAD = "upload"    # /upload-resume: kept for UPLOAD_TTL, evictable under quota pressure
+REQUEST = "request"  # in use by an in-flight request: released by the handler, TTL is only a crash safety net
+JOB = "job"          # input of a queued/running job: released when the job finishes
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    path       TEXT PRIMARY KEY,
+    owner      TEXT NOT NULL,
+    purpose    TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    pinned     INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS uploads_eviction ON uploads (pinned, created_at);
+CREATE INDEX IF NOT EXISTS uploads_expiry ON uploads (expires_at);
+"""
+
+
+class StorageFull(Exception):
+    """Raised when a new file cannot fit in UPLOAD_QUOTA_MB even after evicting everything evictable."""
+
+
+def _unlink(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        logger.warning(f"Could not remove {path}: {e}")
+        return False
+
+
+class UploadStore:
+    """
+    Lifecycle manager for files under UPLOAD_DIR.
+
+    Every saved file is registered (SQLite, shared by all workers) with its
+    owner, purpose, size and creation time. A background sweeper deletes
+    expired files, the total size is kept under UPLOAD_QUOTA_MB by evicting
+    the oldest unpinned files first, and files on disk that nobody registered
+    (e.g. left behind by a crash) are removed at startup and on each sweep.
+    """
+
+    def __init__(self, db_path: str, quota_bytes: int):
+        self.db_path = db_path
+        self.quota_bytes = quota_bytes
+        self._conn = None
+        self._lock = threading.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+        self.counters = {"expired": 0, "evicted": 0, "orphans_removed": 0, "rejected": 0}
+
+    @property
+    def directory(self) -> str:
+        return settings.UPLOAD_DIR
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite_connect(self.db_path, _SCHEMA)
+        return self._conn
+
+    # --- blocking primitives (run via asyncio.to_thread) ---
+
+    def _usage(self) -> int:
+        return self._db().execute("SELECT COALESCE(SUM(size), 0) FROM uploads").fetchone()[0]
+
+    def _make_room(self, incoming: int) -> List[str]:
+        """Deletes the oldest unpinned files until `incoming` more bytes fit. Caller holds the lock."""
+        if not self.quota_bytes:
+            return []
+        conn = self._db()
+        excess = self._usage() + incoming - self.quota_bytes
+        if excess <= 0:
+            return []
+        victims, freed = [], 0
+        for row in conn.execute("SELECT path, size FROM uploads WHERE pinned = 0 ORDER BY created_at"):
+            if freed >= excess:
+                break
+            victims.append(row["path"])
+            freed += row["size"]
+        conn.executemany("DELETE FROM uploads WHERE path = ?", [(p,) for p in victims])
+        for path in victims:
+            _unlink(path)
+        self.counters["evicted"] += len(victims)
+        if freed < excess:
+            self.counters["rejected"] += 1
+            raise StorageFull(f"Upload storage quota exceeded ({self.quota_bytes} bytes)")
+        return victims
+
+    def _reserve(self, size: int) -> List[str]:
+        with self._lock:
+            return self._make_room(size)
+
+    def _register(self, path: str, owner: str, purpose: str, ttl: Optional[float]) -> Dict[str, Any]:
+        size = os.path.getsize(path)
+        now = time.time()
+        record = {
+            "path": path,
+            "owner": owner,
+            "purpose": purpose,
+            "size": size,
+            "pinned": int(purpose != UPLOAD),
+            "created_at": now,
+            "expires_at": now + ttl if ttl else None,
+        }
+        with self._lock:
+            # Evict others first so the new file always counts against the quota
+            self._make_room(size)
+            self._db().execute(
+                "INSERT OR REPLACE INTO uploads (path, owner, purpose, size, pinned, created_at, expires_at) "
+                "VALUES (:path, :owner, :purpose, :size, :pinned, :created_at, :expires_at)",
+                record,
+            )
+        return record
+
+    def _release(self, path: str):
+        with self._lock:
+            self._db().execute("DELETE FROM uploads WHERE path = ?", (path,))
+        _unlink(path)
+
+    def _get(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db().execute("SELECT * FROM uploads WHERE path = ?", (path,)).fetchone()
+        return dict(row) if row else None
+
+    def _sweep(self, keep_job_files: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Expires files past their TTL, drops registry rows whose file vanished and
+        deletes unregistered files older than UPLOAD_ORPHAN_GRACE. With
+        keep_job_files (startup only), job inputs not in that set are released too.
+        """
+        now = time.time()
+        removed = {"expired": 0, "orphans_removed": 0}
+        with self._lock:
+            conn = self._db()
+            expired = [r["path"] for r in conn.execute(
+                "SELECT path FROM uploads WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+            )]
+            if keep_job_files is not None:
+                keep = set(keep_job_files)
+                expired += [r["path"] for r in conn.execute(
+                    "SELECT path FROM uploads WHERE purpose = ?", (JOB,)
+                ) if r["path"] not in keep]
+            conn.executemany("DELETE FROM uploads WHERE path = ?", [(p,) for p in expired])
+            for path in expired:
+                _unlink(path)
+            removed["expired"] = len(expired)
+
+            registered = {r["path"] for r in conn.execute("SELECT path FROM uploads")}
+            on_disk = set()
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    on_disk.add(entry.path)
+                    # Young files may still be mid-write / about to be registered by another worker
+                    if entry.path not in registered and now - entry.stat().st_mtime > settings.UPLOAD_ORPHAN_GRACE:
+                        if _unlink(entry.path):
+                            removed["orphans_removed"] += 1
+            vanished = [p for p in registered - on_disk if not os.path.exists(p)]
+            conn.executemany("DELETE FROM uploads WHERE path = ?", [(p,) for p in vanished])
+
+        for key, n in removed.items():
+            self.counters[key] += n
+        return removed
+
+    def _stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._db()
+            rows = conn.execute(
+                "SELECT purpose, COUNT(*) AS files, COALESCE(SUM(size), 0) AS bytes, MIN(created_at) AS oldest "
+                "FROM uploads GROUP BY purpose"
+            ).fetchall()
+        now = time.time()
+        total_bytes = sum(r["bytes"] for r in rows)
+        oldest = min((r["oldest"] for r in rows), default=None)
+        disk = shutil.disk_usage(self.directory)
+        return {
+            "directory": self.directory,
+            "files": sum(r["files"] for r in rows),
+            "bytes": total_bytes,
+            "quota_bytes": self.quota_bytes or None,
+            "quota_used_pct": round(100 * total_bytes / self.quota_bytes, 1) if self.quota_bytes else None,
+            "oldest_file_age_s": round(now - oldest, 1) if oldest else None,
+            "by_purpose": {r["purpose"]: {"files": r["files"], "bytes": r["bytes"]} for r in rows},
+            "disk": {"total_bytes": disk.total, "free_bytes": disk.free},
+            "counters": dict(self.counters),
+        }
+
+    # --- async API ---
+
+    async def reserve(self, size: int):
+        """Makes room for a file of `size` bytes before it is written; raises StorageFull."""
+        victims = await asyncio.to_thread(self._reserve, size)
+        if victims:
+            logger.info(f"Evicted {len(victims)} upload(s) to stay under the storage quota")
+
+    async def register(self, path: str, owner: str, purpose: str = REQUEST, ttl: Optional[float] = None) -> Dict[str, Any]:
+        """Starts tracking a file already written under UPLOAD_DIR; on StorageFull the file is deleted."""
+        ttl = settings.UPLOAD_TTL if ttl is None and purpose != JOB else ttl
+        try:
+            return await asyncio.to_thread(self._register, path, owner, purpose, ttl)
+        except StorageFull:
+            await asyncio.to_thread(_unlink, path)
+            raise
+
+    async def release(self, path: Optional[str]):
+        """Deletes a file and forgets it. Safe to call for files that are already gone."""
+        if path:
+            await asyncio.to_thread(self._release, path)
+
+    async def get(self, path: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, path)
+
+    async def stats(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._stats)
+
+    async def start(self, keep_job_files: Iterable[str] = ()):
+        """Cleans up after previous runs (orphans, stale job inputs), then starts the sweeper."""
+        removed = await asyncio.to_thread(self._sweep, list(keep_job_files))
+        if any(removed.values()):
+            logger.info(f"Upload cleanup at startup: {removed}")
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(settings.UPLOAD_SWEEP_INTERVAL)
+            try:
+                removed = await asyncio.to_thread(self._sweep)
+                if any(removed.values()):
+                    logger.info(f"Upload sweep: {removed}")
+            except Exception as e:
+                logger.error(f"Upload sweep failed: {e}")
+
+
+upload_store = UploadStore(
+    db_path=settings.STORAGE_DB_PATH,
+    quota_bytes=settings.UPLOAD_QUOTA_MB * 1024 * 1024,
+)
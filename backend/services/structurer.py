@@ -25,4 +25,14 @@ class StructurerService:
             
         return sections
 
+    @staticmethod
+    def structure_field(key: str, value: Any) -> Any:
+        """
+        Normalizes a single top-level field streamed by the parser the same way
+        structure_resume will, so early field events match the final result.
+        """
+        if key == "skills" and isinstance(value, list):
+            return normalize_skills(value)
+        return value
+
 structurer_service = StructurerService()
@@ -15,3 +15,22 @@ def time_execution(func):
         logger.info(f"{func.__name__} executed in {end_time - start_time:.4f} seconds")
         return result
     return wrapper
+
+def client_address(request, trusted_proxies=frozenset()) -> str:
+    """
+    Caller IP, used to attribute uploads and rate-limit anonymous callers. It is the
+    connection's peer; X-Forwarded-For is only read when that peer is one of
+    `trusted_proxies` ("*" trusts any), and then the nearest hop that isn't a trusted
+    proxy is used, so clients can't pick their own address by sending the header.
+    """
+    peer = request.client.host if request.client else "anonymous"
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded or not ("*" in trusted_proxies or peer in trusted_proxies):
+        return peer
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    if "*" in trusted_proxies:
+        return hops[0] if hops else peer
+    for hop in reversed(hops):
+        if hop not in trusted_proxies:
+            return hop
+    return hops[0] if hops else peer
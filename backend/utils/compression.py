@@ -0,0 +1,107 @@
+import asyncio
+import gzip
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip is offered
+    brotli = None
+
+# Compressing larger bodies is moved off the event loop
+THREAD_MIN_SIZE = 128 * 1024
+
+
+def _compressible(content_type: str) -> bool:
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type == "text/event-stream":
+        return False
+    return content_type.startswith("text/") or content_type in (
+        "application/json", "application/x-ndjson", "application/javascript", "application/xml",
+    )
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Picks "br" or "gzip" from an Accept-Encoding header (honouring q-values), else None."""
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip().lower()] = q
+    wildcard = offered.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    # Highest q wins; on ties the server's order (br before gzip) decides
+    best, best_q = None, 0.0
+    for name in candidates:
+        q = offered.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Negotiates gzip / brotli for complete (non-streaming) responses of at
+    least `minimum_size` bytes. Streaming bodies such as the SSE interview
+    and job event streams are passed through untouched so nothing is buffered.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # Without an acceptable encoding we still mark responses with Vary for caches
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message  # held back until we have seen the first body chunk
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=list(start["headers"]))
+            held, start = start, None
+            body = message.get("body", b"")
+            if not _compressible(headers.get("content-type", "")) or "content-encoding" in headers:
+                await send(held)
+                await send(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is None or message.get("more_body", False) or len(body) < self.minimum_size:
+                await send({**held, "headers": headers.raw})
+                await send(message)
+                return
+
+            if len(body) >= THREAD_MIN_SIZE:
+                compressed = await asyncio.to_thread(self._compress, body, encoding)
+            else:
+                compressed = self._compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            await send({**held, "headers": headers.raw})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,115 @@
+"""
+Request-scoped deadline and cancellation.
+
+A route starts a Deadline (a time budget) in its context; everything it
+awaits — OCR, the LLM calls, the interview stream — can read it back with
+current(), bound its own timeouts with cap() and call check() between
+stages. run() additionally watches for the client going away and cancels
+the work, which aborts in-flight upstream HTTP calls and pending OCR jobs,
+so no capacity is spent on a response nobody will receive.
+"""
+import asyncio
+import contextvars
+import time
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+DISCONNECT_POLL_INTERVAL = 0.5  # seconds
+
+
+class RequestAborted(Exception):
+    """The request's work was stopped before it finished."""
+
+
+class DeadlineExceeded(RequestAborted):
+    """The request's time budget ran out."""
+
+
+class ClientDisconnected(RequestAborted):
+    """The client went away, nobody will receive the response."""
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.aborted: Optional[RequestAborted] = None
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def check(self, stage: str = ""):
+        """Raises if the client disconnected or the budget is spent."""
+        if self.aborted is not None:
+            raise self.aborted
+        if self.remaining() <= 0:
+            where = f" before {stage}" if stage else ""
+            raise DeadlineExceeded(f"Request exceeded its {self.budget:g}s budget{where}")
+
+    def cap(self, timeout: Optional[float]) -> float:
+        """The smaller of `timeout` and the time left (never negative)."""
+        left = max(0.0, self.remaining())
+        return left if timeout is None else min(timeout, left)
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+def start(seconds: float) -> Deadline:
+    """Starts a deadline for the current request; tasks created afterwards inherit it."""
+    deadline = Deadline(seconds)
+    _current.set(deadline)
+    return deadline
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+def check(stage: str = ""):
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def cap(timeout: Optional[float]) -> Optional[float]:
+    """`timeout` bounded by the current deadline, if there is one."""
+    deadline = _current.get()
+    return timeout if deadline is None else deadline.cap(timeout)
+
+
+async def detached(work: Awaitable[T]) -> T:
+    """Runs `work` without the caller's deadline; for background tasks that outlive the request."""
+    _current.set(None)
+    return await work
+
+
+async def _watch_disconnect(request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def run(request, work: Awaitable[T], seconds: float) -> T:
+    """
+    Runs `work` (a coroutine) under a fresh deadline of `seconds`, cancelling
+    it as soon as the client disconnects or the budget runs out. Raises
+    ClientDisconnected / DeadlineExceeded in those cases.
+    """
+    deadline = start(seconds)
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.create_task(_watch_disconnect(request))
+    try:
+        done, _ = await asyncio.wait({task, watcher}, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED)
+        if task in done:
+            return task.result()
+        if watcher in done:
+            deadline.aborted = ClientDisconnected("Client disconnected")
+        else:
+            deadline.aborted = DeadlineExceeded(f"Request exceeded its {seconds:g}s budget")
+        raise deadline.aborted
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
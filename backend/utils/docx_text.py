@@ -0,0 +1,129 @@
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import IO, Iterator, List, Union
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+P, T, TAB, BR, CR, NB_HYPHEN = _W + "p", _W + "t", _W + "tab", _W + "br", _W + "cr", _W + "noBreakHyphen"
+TBL, TR, TC = _W + "tbl", _W + "tr", _W + "tc"
+BODY, HDR, FTR = _W + "body", _W + "hdr", _W + "ftr"
+# Text boxes are stored twice (DrawingML in mc:Choice, VML in mc:Fallback); read only the first
+FALLBACK = _MC + "Fallback"
+
+_PART_NUMBER = re.compile(r"(\d+)")
+
+
+def _part_order(name: str) -> int:
+    m = _PART_NUMBER.search(name.rsplit("/", 1)[-1])
+    return int(m.group(1)) if m else 0
+
+
+def _iter_part(stream: IO[bytes]) -> Iterator[str]:
+    """
+    Streams one WordprocessingML part, yielding lines in reading order.
+    Paragraphs become lines, table rows become "cell | cell" lines, and
+    text-box paragraphs are emitted where they are anchored. Finished
+    top-level blocks are cleared so memory stays flat on large documents.
+    """
+    paragraphs: List[List[str]] = []   # open paragraphs (text boxes nest them)
+    cells: List[List[str]] = []        # open table cells, each a list of lines
+    rows: List[List[str]] = []         # open table rows, each a list of cell texts
+    container = None                   # w:body / w:hdr / w:ftr whose children are blocks
+    skip = 0                           # depth inside mc:Fallback
+    pending: List[str] = []
+
+    def emit(line: str):
+        if cells:
+            cells[-1].append(line)
+        elif line:
+            pending.append(line)
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == FALLBACK:
+                skip += 1
+            elif skip:
+                continue
+            elif tag == P:
+                paragraphs.append([])
+            elif tag == TR:
+                rows.append([])
+            elif tag == TC:
+                cells.append([])
+            elif tag in (BODY, HDR, FTR) and container is None:
+                container = elem
+            continue
+
+        if tag == FALLBACK:
+            skip -= 1
+            continue
+        if skip:
+            continue
+
+        if tag == T:
+            if paragraphs and elem.text:
+                paragraphs[-1].append(elem.text)
+        elif tag == TAB:
+            if paragraphs:
+                paragraphs[-1].append("\t")
+        elif tag in (BR, CR):
+            if paragraphs:
+                paragraphs[-1].append("\n")
+        elif tag == NB_HYPHEN:
+            if paragraphs:
+                paragraphs[-1].append("-")
+        elif tag == P:
+            emit("".join(paragraphs.pop()).strip())
+        elif tag == TC:
+            text = " ".join(line for line in cells.pop() if line)
+            if rows:
+                rows[-1].append(text)
+        elif tag == TR:
+            emit(" | ".join(cell for cell in rows.pop() if cell))
+
+        # Drop finished top-level blocks from the tree
+        if tag in (P, TBL) and not paragraphs and not cells and container is not None:
+            container.clear()
+
+        if pending:
+            yield from pending
+            pending.clear()
+
+
+def iter_docx_lines(source: Union[str, IO[bytes]], include_headers: bool = True) -> Iterator[str]:
+    """
+    Yields the text lines of a .docx file without building its object model.
+    Headers come first, then the body (paragraphs, tables, text boxes), then footers.
+    """
+    with zipfile.ZipFile(source) as archive:
+        names = archive.namelist()
+        headers = sorted((n for n in names if re.fullmatch(r"word/header\d*\.xml", n)), key=_part_order)
+        footers = sorted((n for n in names if re.fullmatch(r"word/footer\d*\.xml", n)), key=_part_order)
+        parts = (headers if include_headers else []) + ["word/document.xml"] + (footers if include_headers else [])
+        seen_decorations = set()  # first-page / even-page headers usually repeat the default one
+        for name in parts:
+            if name not in names:
+                continue
+            is_body = name == "word/document.xml"
+            with archive.open(name) as stream:
+                for line in _iter_part(stream):
+                    if not is_body:
+                        if line in seen_decorations:
+                            continue
+                        seen_decorations.add(line)
+                    yield line
+
+
+def docx_to_text(source: Union[str, IO[bytes]], max_chars: int = 0) -> str:
+    """Plain text of a .docx file; stops reading once max_chars is exceeded (0 = no limit)."""
+    lines = []
+    total = 0
+    for line in iter_docx_lines(source):
+        lines.append(line)
+        total += len(line) + 1
+        if max_chars and total > max_chars:
+            break
+    return "\n".join(lines)
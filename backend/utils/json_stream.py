@@ -0,0 +1,225 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_DELIMITERS = set(',:[]{}"') | set(" \t\r\n")
+
+
+def _strip_fences(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text
+
+
+def _start(text: str) -> int:
+    # Both prompts ask for an object; a '[' in surrounding prose must not win
+    start = text.find("{")
+    return start if start >= 0 else text.find("[")
+
+
+def repair_json(text: str) -> Any:
+    """
+    Parses LLM output that is supposed to be one JSON document but may be
+    wrapped in ``` fences or prose, use Python literals (True/None), contain
+    trailing commas or raw newlines inside strings, or be cut off mid-way
+    (max_tokens). A truncated document is cut back to its last complete
+    value and its open brackets are closed, so partial strings, keys without
+    values and half-written numbers are dropped rather than guessed.
+    Raises ValueError when nothing usable is left.
+    """
+    text = _strip_fences(text)
+    start = _start(text)
+    if start < 0:
+        raise ValueError("no JSON object or array in the output")
+    text = text[start:]
+    try:
+        return json.JSONDecoder().raw_decode(text)[0]
+    except ValueError:
+        pass
+
+    out: List[str] = []
+    stack: List[str] = []       # open '{' / '['
+    expect_key: List[bool] = []  # per frame: True while an object waits for a key
+    safe: Tuple[int, Tuple[str, ...]] = (0, ())  # (len(out), stack) where the document can be closed
+    in_string = escaped = string_is_key = False
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+                out.append(c)
+            elif c == "\\":
+                escaped = True
+                out.append(c)
+            elif c == '"':
+                in_string = False
+                out.append(c)
+                if not string_is_key:
+                    safe = (len(out), tuple(stack))
+            elif c == "\n":
+                out.append("\\n")
+            elif c in "\r\t":
+                out.append("\\r" if c == "\r" else "\\t")
+            else:
+                out.append(c)
+            i += 1
+            continue
+
+        if c == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1] == "{" and expect_key[-1]
+            out.append(c)
+        elif c in "{[":
+            stack.append(c)
+            expect_key.append(c == "{")
+            out.append(c)
+            safe = (len(out), tuple(stack))
+        elif c in "}]":
+            if not stack:
+                break
+            while out and out[-1] in " \t\r\n,":
+                out.pop()
+            out.append("}" if stack.pop() == "{" else "]")
+            expect_key.pop()
+            safe = (len(out), tuple(stack))
+            if not stack:
+                break  # complete document; anything after it is prose
+        elif c == ":":
+            out.append(c)
+            if expect_key:
+                expect_key[-1] = False
+        elif c == ",":
+            out.append(c)
+            if stack and stack[-1] == "{":
+                expect_key[-1] = True
+        elif c in " \t\r\n":
+            out.append(c)
+        else:
+            j = i
+            while j < n and text[j] not in _DELIMITERS:
+                j += 1
+            token = text[i:j]
+            token = _LITERALS.get(token, token)
+            out.append(token)
+            try:
+                json.loads(token)
+                if j < n:  # a literal at the very end may itself be cut off
+                    safe = (len(out), tuple(stack))
+            except ValueError:
+                pass
+            i = j
+            continue
+        i += 1
+
+    if stack or in_string:
+        length, stack_at = safe
+        out = out[:length]
+        while out and out[-1] in " \t\r\n,":
+            out.pop()
+        if out and out[-1] == ":":
+            raise ValueError("truncated JSON could not be repaired")
+        out.extend("}" if frame == "{" else "]" for frame in reversed(stack_at))
+    if not out:
+        raise ValueError("truncated JSON could not be repaired")
+    return json.loads("".join(out))
+
+
+class IncrementalJSONParser:
+    """
+    Consumes a streamed JSON object chunk by chunk and reports each top-level
+    field as soon as its value is complete, e.g. `skills` while the model is
+    still writing `experience`. Text before the opening brace (``` fences,
+    prose) is skipped. `result()` returns the whole object, falling back to
+    repair_json when the stream ended early or was slightly invalid.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self._pos = 0
+        self._depth = 0
+        self._started = False
+        self._done = False
+        self._in_string = False
+        self._escaped = False
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Adds text; returns the (key, value) pairs completed by it."""
+        self.buffer += chunk
+        completed = []
+        buf = self.buffer
+        i = self._pos
+        while i < len(buf) and not self._done:
+            c = buf[i]
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+                i += 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == "\\":
+                    self._escaped = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key_start is not None and self._key is None:
+                        self._key = self._decode(buf[self._key_start:i + 1])
+                i += 1
+                continue
+
+            if self._depth == 1 and self._key is not None and self._value_start is None and c not in " \t\r\n:":
+                self._value_start = i
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None:
+                    self._key_start = i
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete_field(buf[self._value_start:i] if self._value_start is not None else None, completed)
+                    self._done = True
+            elif c == "," and self._depth == 1:
+                self._complete_field(buf[self._value_start:i] if self._value_start is not None else None, completed)
+            i += 1
+        self._pos = i
+        return completed
+
+    @staticmethod
+    def _decode(text: str) -> Optional[Any]:
+        try:
+            return json.loads(text)
+        except ValueError:
+            try:
+                return repair_json(text)
+            except ValueError:
+                return None
+
+    def _complete_field(self, value_text: Optional[str], completed: List[Tuple[str, Any]]):
+        key = self._key
+        self._key = self._key_start = self._value_start = None
+        if key is None or value_text is None or not value_text.strip():
+            return
+        value_text = value_text.strip()
+        value = self._decode(_LITERALS.get(value_text, value_text))
+        if value is None and value_text != "null":
+            return
+        self.fields[key] = value
+        completed.append((key, value))
+
+    def result(self) -> Any:
+        """The complete document; raises ValueError if the output cannot be recovered."""
+        try:
+            return json.loads(_strip_fences(self.buffer))
+        except ValueError:
+            return repair_json(self.buffer)
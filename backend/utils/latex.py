@@ -0,0 +1,268 @@
+import re
+from typing import List, Optional, Tuple
+
+# Constructs the fast path does not try to emulate; those documents go to pandoc
+_UNSUPPORTED = re.compile(
+    r"\\(input|include|import|subimport|newcommand|renewcommand|providecommand|def|let|"
+    r"newenvironment|renewenvironment|verb|lstinputlisting|csname|expandafter)(?![a-zA-Z])"
+    r"|\\begin\{(verbatim|lstlisting|minted|tikzpicture)\}"
+)
+
+# Preamble macros that carry contact details in moderncv / awesome-cv
+_PREAMBLE_INFO = (
+    "name", "firstname", "familyname", "title", "position", "address", "phone",
+    "mobile", "email", "homepage", "github", "linkedin", "social", "extrainfo", "quote",
+)
+
+# Commands whose arguments are layout/metadata only: name -> number of {} args to drop
+_DROP_ARGS = {
+    "vspace": 1, "vspace*": 1, "hspace": 1, "hspace*": 1, "setlength": 2, "addtolength": 2,
+    "usepackage": 1, "documentclass": 1, "label": 1, "ref": 1, "includegraphics": 1,
+    "pagestyle": 1, "thispagestyle": 1, "fancyhf": 1, "color": 1, "pagecolor": 1,
+    "setcounter": 2, "titleformat": 5, "titlespacing": 4, "titlespacing*": 4, "raisebox": 1,
+    "definecolor": 3, "colorlet": 2, "geometry": 1, "moderncvstyle": 1, "moderncvcolor": 1,
+    "photo": 1, "fontsize": 2, "rule": 2, "pdfbookmark": 2, "hypersetup": 1, "urlstyle": 1,
+}
+
+_SECTIONS = {
+    "section", "section*", "subsection", "subsection*", "subsubsection", "subsubsection*",
+    "cvsection", "cvsubsection", "chapter", "chapter*", "part", "part*",
+}
+
+# Text-style macros that take exactly one argument
+_ONE_ARG = {
+    "textbf", "textit", "textsl", "textsc", "texttt", "textrm", "textsf", "textnormal", "textup",
+    "emph", "underline", "uline", "mbox", "hbox", "text", "url", "small", "large", "Large", "Huge",
+}
+
+_NEWLINES = {"newline", "linebreak", "par", "cr", "bigskip", "medskip", "smallskip", "newpage", "pagebreak"}
+
+_SYMBOLS = {
+    "textbar": "|", "textbullet": "-", "cdot": "-", "bullet": "-", "ldots": "...", "dots": "...",
+    "textendash": "-", "textemdash": "-", "LaTeX": "LaTeX", "TeX": "TeX", "textasciitilde": "~",
+    "textbackslash": "\\", "quad": " ", "qquad": " ", "hfill": " ", "enspace": " ", "textperiodcentered": "-",
+    "slash": "/", "&": "&", "%": "%", "$": "$", "#": "#", "_": "_", "{": "{", "}": "}", " ": " ",
+    ",": " ", ";": " ", "!": "", "-": "",
+}
+
+# Environments whose leading {} args are column specs / widths rather than text
+_ENV_SPEC_ARGS = {"tabular": 1, "tabular*": 2, "tabularx": 2, "longtable": 1, "minipage": 1, "multicols": 1, "array": 1}
+
+# Unknown macros with several args (\cventry, \resumeSubheading) become comma-separated fields
+_FIELD_SEPARATOR = ", "
+
+# Marks section titles so _tidy can put a blank line before them
+_SECTION_MARK = "\x00"
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _strip_comments(source: str) -> str:
+    # An unescaped % starts a comment that runs to the end of the line
+    return re.sub(r"(?<!\\)%.*", "", source)
+
+
+class _Converter:
+    def __init__(self, source: str):
+        self.s = source
+        self.n = len(source)
+
+    def _skip_spaces(self, i: int) -> int:
+        while i < self.n and self.s[i] in " \t\n":
+            i += 1
+        return i
+
+    def _group(self, i: int, open_ch: str = "{", close_ch: str = "}") -> Tuple[str, int]:
+        """Returns the raw contents of a balanced group starting at s[i] == open_ch."""
+        depth = 0
+        start = i + 1
+        while i < self.n:
+            c = self.s[i]
+            if c == "\\":
+                i += 2
+                continue
+            if c == open_ch:
+                depth += 1
+            elif c == close_ch:
+                depth -= 1
+                if depth == 0:
+                    return self.s[start:i], i + 1
+            i += 1
+        raise _Unsupported("unbalanced group")
+
+    def _args(self, i: int, limit: int | None = None) -> Tuple[List[str], int]:
+        """Consumes [opt] and {arg} groups following a command; returns the {} args."""
+        args = []
+        while i < self.n and (limit is None or len(args) < limit):
+            j = self._skip_spaces(i)
+            # Without a known arity, a blank line ends the argument list
+            if limit is None and self.s.count("\n", i, j) > 1:
+                break
+            if j < self.n and self.s[j] == "[":
+                _, i = self._group(j, "[", "]")
+            elif j < self.n and self.s[j] == "{":
+                arg, i = self._group(j)
+                args.append(arg)
+            else:
+                break
+        return args, i
+
+    def _command(self, i: int) -> Tuple[str, int]:
+        j = i + 1
+        if j < self.n and self.s[j].isalpha():
+            while j < self.n and self.s[j].isalpha():
+                j += 1
+            if j < self.n and self.s[j] == "*":
+                j += 1
+            return self.s[i + 1:j], j
+        return self.s[i + 1:j + 1], j + 1
+
+    def convert(self) -> str:
+        out: List[str] = []
+        i = 0
+        while i < self.n:
+            c = self.s[i]
+            if c == "\\":
+                k = i - 1
+                while k >= 0 and self.s[k] in " \t":
+                    k -= 1
+                line_start = k < 0 or self.s[k] == "\n"
+                name, i = self._command(i)
+                i = self._render_command(name, i, out, line_start)
+            elif c == "{":
+                if out and out[-1] and not out[-1][-1].isspace() and self.s[i - 1] == "}":
+                    out.append(" ")  # keep adjacent groups {a}{b} from running together
+                inner, i = self._group(i)
+                out.append(_Converter(inner).convert())
+            elif c == "}":
+                raise _Unsupported("unbalanced closing brace")
+            elif c == "$":
+                i += 1  # math delimiters are dropped, contents kept
+            elif c == "~":
+                out.append(" ")
+                i += 1
+            elif c == "&":
+                out.append(" | ")
+                i += 1
+            elif c == "-" and self.s.startswith("---", i):
+                out.append("-")
+                i += 3
+            elif c == "-" and self.s.startswith("--", i):
+                out.append("-")
+                i += 2
+            else:
+                out.append(c)
+                i += 1
+        return "".join(out)
+
+    def _render_command(self, name: str, i: int, out: List[str], line_start: bool) -> int:
+        if name == "\\":
+            if i < self.n and self.s[i] == "[":
+                _, i = self._group(i, "[", "]")
+            out.append("\n")
+            return i
+        if name in _SYMBOLS:
+            out.append(_SYMBOLS[name])
+            return i
+        if name in _NEWLINES:
+            out.append("\n")
+            return i
+        if name == "item":
+            i = self._skip_spaces(i)
+            if i < self.n and self.s[i] == "[":
+                _, i = self._group(i, "[", "]")
+            out.append("\n- ")
+            return i
+        if name in ("begin", "end"):
+            args, i = self._args(i, limit=1)
+            env = args[0] if args else ""
+            if name == "begin":
+                if i < self.n and self.s[i] == "[":
+                    _, i = self._group(i, "[", "]")
+                _, i = self._args(i, limit=_ENV_SPEC_ARGS.get(env, 0))
+            out.append("\n")
+            return i
+        if name in _DROP_ARGS:
+            _, i = self._args(i, limit=_DROP_ARGS[name])
+            return i
+        if name in _SECTIONS:
+            args, i = self._args(i, limit=1)
+            out.append("\n" + _SECTION_MARK + " ".join(_Converter(a).convert().strip() for a in args) + "\n")
+            return i
+        if name == "href":
+            args, i = self._args(i, limit=2)
+            if args:
+                out.append(_Converter(args[-1]).convert())
+            return i
+
+        # Unknown / template-specific macro (\resumeItem, \cventry ...): keep its text
+        args, i = self._args(i, limit=1 if name in _ONE_ARG else None)
+        parts = [p for p in (_Converter(a).convert().strip() for a in args) if p]
+        if not parts:
+            if name.isalpha() and i < self.n and self.s[i] == " ":
+                i += 1  # a control word swallows the following space
+            return i
+        if line_start and name not in _ONE_ARG:
+            out.append("\n")
+        out.append(_FIELD_SEPARATOR.join(parts) if len(parts) > 1 else parts[0])
+        return i
+
+
+def _preamble_info(preamble: str) -> List[str]:
+    lines = []
+    for macro in _PREAMBLE_INFO:
+        for m in re.finditer(r"\\" + macro + r"(?![a-zA-Z])\s*(\[[^\]]*\])?\s*\{", preamble):
+            conv = _Converter(preamble)
+            args, _ = conv._args(m.end() - 1)
+            parts = [p for p in (_Converter(a).convert().strip() for a in args) if p]
+            if parts:
+                lines.append(" ".join(parts))
+    return lines
+
+
+def _tidy(text: str) -> str:
+    out = []
+    for line in text.split("\n"):
+        line = re.sub(r"[ \t]+", " ", line).strip()
+        line = re.sub(r"^(\| ?)+|( ?\|)+$", "", line).strip()
+        if not line or line == "-":
+            continue
+        if line.startswith(_SECTION_MARK):
+            line = line.lstrip(_SECTION_MARK).strip()
+            if out:
+                out.append("")
+        out.append(line)
+    return "\n".join(out)
+
+
+def latex_to_text(source: str, min_chars: int = 50) -> Optional[str]:
+    """
+    Fast, pure-Python plain-text extraction for LaTeX resumes (jake's resume,
+    moderncv, awesome-cv and similar templates). Macros are stripped while the
+    text of their arguments, \\section titles and \\item content is kept.
+
+    Returns None when the document uses constructs this extractor does not
+    handle (file inclusion, macro definitions in the body, verbatim...) or
+    yields suspiciously little text, so the caller can fall back to pandoc.
+    """
+    source = _strip_comments(source)
+    begin = source.find("\\begin{document}")
+    end = source.rfind("\\end{document}")
+    if begin == -1:
+        preamble, body = "", source
+    else:
+        preamble = source[:begin]
+        body = source[begin + len("\\begin{document}"):end if end > begin else len(source)]
+
+    if _UNSUPPORTED.search(body):
+        return None
+    try:
+        header = _preamble_info(preamble)
+        text = _tidy("\n".join(header) + "\n" + _Converter(body).convert())
+    except (_Unsupported, RecursionError):
+        return None
+    if len(text) < min_chars:
+        return None
+    return text
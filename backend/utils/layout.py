@@ -0,0 +1,100 @@
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, List
+from utils.startup import LazyModule
+
+np = LazyModule("numpy")
+
+# Normalized coordinates are on a 0-1000 scale, so int16 is plenty
+BBOX_DTYPE = "int16"
+
+
+class PageLayout(Sequence):
+    """
+    Compact, columnar word/bbox storage for one page.
+
+    Word texts live in a single string buffer addressed by an int32 offsets
+    array (word i is text_buffer[offsets[i]:offsets[i + 1]]), and bboxes in one
+    (n, 4) int16 array already normalized to the 0-1000 scale. It behaves like
+    the legacy list of {"text": ..., "bbox": [x0, y0, x1, y1]} dicts; dicts are
+    only built when an item is accessed or to_dicts() is called.
+    """
+    __slots__ = ("text_buffer", "offsets", "bboxes")
+
+    def __init__(self, text_buffer: str, offsets: "np.ndarray", bboxes: "np.ndarray"):
+        self.text_buffer = text_buffer
+        self.offsets = offsets
+        self.bboxes = bboxes
+
+    @classmethod
+    def empty(cls) -> "PageLayout":
+        return cls("", np.zeros(1, dtype=np.int32), np.zeros((0, 4), dtype=BBOX_DTYPE))
+
+    @classmethod
+    def from_arrays(cls, texts: List[str], boxes: "np.ndarray", width: float, height: float) -> "PageLayout":
+        """
+        Builds a layout from word texts and an (n, 4) array of absolute
+        (x0, y0, x1, y1) boxes in page units, normalizing them in one vectorized step.
+        """
+        if not texts:
+            return cls.empty()
+        offsets = np.zeros(len(texts) + 1, dtype=np.int32)
+        np.cumsum(np.fromiter(map(len, texts), dtype=np.int32, count=len(texts)), out=offsets[1:])
+        # Same arithmetic as OCRService.normalize_bbox: int(v / size * 1000), truncating
+        scale = np.array([width, height, width, height], dtype=np.float64)
+        norm = (np.asarray(boxes, dtype=np.float64) / scale * 1000).astype(BBOX_DTYPE)
+        return cls("".join(texts), offsets, norm)
+
+    @classmethod
+    def from_words(cls, words: Iterable[Dict[str, Any]], width: float, height: float) -> "PageLayout":
+        """Builds a layout from pdfplumber word dicts (x0/top/x1/bottom in PDF points)."""
+        words = words if isinstance(words, list) else list(words)
+        n = len(words)
+        if not n:
+            return cls.empty()
+        boxes = np.fromiter(
+            (v for w in words for v in (w["x0"], w["top"], w["x1"], w["bottom"])),
+            dtype=np.float64,
+            count=4 * n
+        ).reshape(n, 4)
+        return cls.from_arrays([w["text"] for w in words], boxes, width, height)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def text_at(self, i: int) -> str:
+        return self.text_buffer[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("PageLayout index out of range")
+        return {"text": self.text_at(i), "bbox": self.bboxes[i].tolist()}
+
+    def texts(self) -> List[str]:
+        offsets = self.offsets.tolist()
+        buf = self.text_buffer
+        return [buf[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Materializes the legacy list-of-dicts form."""
+        return [{"text": t, "bbox": b} for t, b in zip(self.texts(), self.bboxes.tolist())]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by this layout's buffers."""
+        return len(self.text_buffer) + self.offsets.nbytes + self.bboxes.nbytes
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PageLayout):
+            return (self.text_buffer == other.text_buffer
+                    and np.array_equal(self.offsets, other.offsets)
+                    and np.array_equal(self.bboxes, other.bboxes))
+        if isinstance(other, list):
+            return self.to_dicts() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PageLayout(words={len(self)}, nbytes={self.nbytes})"
@@ -0,0 +1,249 @@
+"""
+Memory accounting and guardrails for document processing.
+
+A MemoryMonitor.track() block follows one document through the pipeline:
+each stage records how much the process RSS grew and peaked while it ran,
+and checkpoint() (called per page by the PDF extractor) aborts with
+MemoryLimitExceeded once the document has grown the process by more than
+its allowance or the worker is over its RSS ceiling. Aggregates per stage
+are kept for /api/health/memory so workers can be sized from real numbers.
+
+RSS is process-wide: with several documents in flight each one is charged
+for the others' growth too, so the per-document figures are upper bounds
+and the per-document allowance is only enforced on a document that had the
+process to itself from start to finish (the worker RSS ceiling still is).
+With tracemalloc enabled, stages also report the Python-heap peak (native
+buffers such as page images are only visible in RSS).
+"""
+import contextlib
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Dict, Iterator, Optional, Set
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger("backend")
+
+MB = 1024 * 1024
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def peak_rss_bytes() -> int:
+    """Highest RSS of this process so far (0 where unavailable)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def rss_bytes() -> int:
+    """Current RSS of this process; falls back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+class DocumentRejected(Exception):
+    """A document was refused because processing it would take too many resources."""
+    status_code = 422
+
+
+class MemoryLimitExceeded(DocumentRejected):
+    """Processing the document took (or would take) more memory than allowed."""
+    status_code = 413
+
+
+class DocumentTooComplex(DocumentRejected):
+    """The document is structurally out of bounds (page size, objects per page)."""
+    status_code = 422
+
+
+class MemoryUsage:
+    """Memory figures for one document; obtained from MemoryMonitor.track()."""
+
+    def __init__(self, label: str, limit_bytes: int, rss_limit_bytes: int, trace: bool):
+        self.label = label
+        self.limit_bytes = limit_bytes
+        self.rss_limit_bytes = rss_limit_bytes
+        self.trace = trace
+        self.start_rss = rss_bytes()
+        self.peak_rss = self.start_rss
+        # Set once another document overlaps this one; its growth is then not this one's alone
+        self.shared = False
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._stage: Optional[Dict[str, float]] = None
+
+    def checkpoint(self, where: str = ""):
+        """Samples RSS and raises MemoryLimitExceeded if a limit is crossed."""
+        rss = rss_bytes()
+        self.peak_rss = max(self.peak_rss, rss)
+        if self._stage is not None:
+            self._stage["peak_rss"] = max(self._stage["peak_rss"], rss)
+        at = f" at {where}" if where else ""
+        if self.limit_bytes and not self.shared and rss - self.start_rss > self.limit_bytes:
+            raise MemoryLimitExceeded(
+                f"Document needs more than {self.limit_bytes // MB} MB to process{at}; "
+                "try a smaller or simpler file"
+            )
+        if self.rss_limit_bytes and rss > self.rss_limit_bytes:
+            raise MemoryLimitExceeded(
+                f"Server memory limit reached{at} ({rss // MB} MB of {self.rss_limit_bytes // MB} MB); "
+                "try again shortly"
+            )
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        before = rss_bytes()
+        stage = {"start_rss": before, "peak_rss": before}
+        outer, self._stage = self._stage, stage
+        if self.trace and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            after = rss_bytes()
+            self.peak_rss = max(self.peak_rss, after)
+            self.stages[name] = {
+                "seconds": round(time.perf_counter() - started, 3),
+                "rss_delta_mb": round((after - before) / MB, 2),
+                "peak_delta_mb": round((max(stage["peak_rss"], after) - before) / MB, 2),
+            }
+            if self.trace and tracemalloc.is_tracing():
+                self.stages[name]["heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / MB, 2)
+            self._stage = outer
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "label": self.label,
+            "start_rss_mb": round(self.start_rss / MB, 2),
+            "peak_delta_mb": round((self.peak_rss - self.start_rss) / MB, 2),
+            "stages": self.stages,
+        }
+
+
+_current: contextvars.ContextVar[Optional[MemoryUsage]] = contextvars.ContextVar("memory_usage", default=None)
+
+
+def checkpoint(where: str = ""):
+    """MemoryUsage.checkpoint for the document being processed, if it is tracked."""
+    usage = _current.get()
+    if usage is not None:
+        usage.checkpoint(where)
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Accounts the enclosed block to `name` on the tracked document (no-op otherwise)."""
+    usage = _current.get()
+    if usage is None:
+        yield
+        return
+    with usage.stage(name):
+        yield
+
+
+class MemoryMonitor:
+    """Creates the per-document trackers and keeps per-stage aggregates across documents."""
+
+    def __init__(self, doc_limit_mb: int = 0, rss_limit_mb: int = 0, trace: bool = False, recent: int = 20):
+        self.limit_bytes = doc_limit_mb * MB
+        self.rss_limit_bytes = rss_limit_mb * MB
+        self.trace = trace
+        self.documents = 0
+        self.rejected = 0
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._recent = deque(maxlen=recent)  # last few documents' reports
+        self._in_flight: Set[MemoryUsage] = set()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def track(self, label: str) -> Iterator[MemoryUsage]:
+        """
+        Tracks one document. Nested calls (full analysis -> parse) share the
+        outer tracker. Logs the per-stage figures when the block exits.
+        """
+        usage = _current.get()
+        if usage is not None:
+            yield usage
+            return
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        usage = MemoryUsage(label, self.limit_bytes, self.rss_limit_bytes, self.trace)
+        with self._lock:
+            if self._in_flight:
+                usage.shared = True
+                for other in self._in_flight:
+                    other.shared = True
+            self._in_flight.add(usage)
+        token = _current.set(usage)
+        try:
+            usage.checkpoint("start")
+            yield usage
+        except DocumentRejected as e:
+            with self._lock:
+                self.rejected += 1
+            logger.warning(f"Rejected {label}: {e}")
+            raise
+        finally:
+            _current.reset(token)
+            with self._lock:
+                self._in_flight.discard(usage)
+            self._record(usage)
+
+    def _record(self, usage: MemoryUsage):
+        report = usage.report()
+        with self._lock:
+            self.documents += 1
+            self._recent.append(report)
+            for name, figures in usage.stages.items():
+                agg = self._stages.setdefault(name, {"count": 0, "peak_delta_mb_sum": 0.0, "peak_delta_mb_max": 0.0})
+                agg["count"] += 1
+                agg["peak_delta_mb_sum"] += figures["peak_delta_mb"]
+                agg["peak_delta_mb_max"] = max(agg["peak_delta_mb_max"], figures["peak_delta_mb"])
+        stages = ", ".join(f"{name} {f['peak_delta_mb']:+.1f} MB" for name, f in usage.stages.items())
+        logger.info(f"Memory for {usage.label}: peak {report['peak_delta_mb']:+.1f} MB ({stages})")
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                name: {
+                    "count": agg["count"],
+                    "avg_peak_delta_mb": round(agg["peak_delta_mb_sum"] / agg["count"], 2),
+                    "max_peak_delta_mb": round(agg["peak_delta_mb_max"], 2),
+                }
+                for name, agg in self._stages.items()
+            }
+            recent = list(self._recent)
+        report = {
+            "rss_mb": round(rss_bytes() / MB, 2),
+            "peak_rss_mb": round(peak_rss_bytes() / MB, 2),
+            "limits": {
+                "document_mb": self.limit_bytes // MB or None,
+                "worker_rss_mb": self.rss_limit_bytes // MB or None,
+            },
+            "documents": self.documents,
+            "rejected": self.rejected,
+            "stages": stages,
+            "recent": recent,
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report["heap"] = {"current_mb": round(current / MB, 2), "peak_mb": round(peak / MB, 2)}
+        return report
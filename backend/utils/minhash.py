@@ -0,0 +1,88 @@
+"""
+MinHash signatures and LSH banding for near-duplicate text detection.
+
+A text is reduced to its set of word shingles (k consecutive tokens after
+lowercasing and dropping punctuation), and the signature keeps, for each of
+`num_perm` hash permutations, the smallest permuted shingle hash. The share
+of equal positions in two signatures estimates the Jaccard similarity of
+the shingle sets. For lookup the signature is cut into bands of `rows`
+values; texts sharing any whole band become candidates. The band count and
+size are chosen so that pairs above the threshold almost always collide.
+"""
+import hashlib
+import zlib
+from typing import List, Tuple
+from utils.nlp import tokenize
+from utils.startup import LazyModule
+
+np = LazyModule("numpy")
+
+# Prime just above 2^32, so the permutation mod p covers every 32-bit hash
+_PRIME = 4294967311
+# a and b are drawn below _MAX_HASH and x is a crc32, so a * x + b <= 2^64 - 2^33: the uint64
+# product cannot wrap. Widening a or b past 32 bits would break that (and change every signature).
+_MAX_HASH = 0xFFFFFFFF
+
+
+def shingles(text: str, size: int) -> List[str]:
+    """Distinct word `size`-grams of the text; short texts give their whole token string."""
+    tokens = tokenize(text)
+    if len(tokens) <= size:
+        return [" ".join(tokens)] if tokens else []
+    return list({" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)})
+
+
+def lsh_params(threshold: float, num_perm: int, miss_weight: float = 9.0) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows <= num_perm that minimize the false
+    positive and false negative probability mass around `threshold`. Misses
+    are weighted `miss_weight` times heavier: a false candidate only costs a
+    signature comparison, a missed duplicate costs a whole recomputation.
+    """
+    xs = np.linspace(0.0, 1.0, 201)
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        collide = 1.0 - (1.0 - xs ** rows) ** bands
+        below = xs < threshold
+        # Evenly spaced grid: the mean is the integral over [0, 1]
+        error = float(np.where(below, collide, miss_weight * (1.0 - collide)).mean())
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class MinHasher:
+    """Fixed-seed permutations, so signatures are comparable across processes and restarts."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> "np.ndarray":
+        """(num_perm,) uint32 signature; all-max for a text without tokens."""
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        # One (shingles, permutations) matrix, min over the shingles
+        permuted = (hashes[:, None] * self._a[None, :] + self._b[None, :]) % np.uint64(_PRIME)
+        return (permuted.min(axis=0) & np.uint64(_MAX_HASH)).astype(np.uint32)
+
+
+def band_keys(signature: "np.ndarray", bands: int, rows: int) -> List[int]:
+    """One signed 64-bit key per band (fits a SQLite INTEGER)."""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(signature[i * rows:(i + 1) * rows].tobytes(), digest_size=8).digest(), "little", signed=True
+        )
+        for i in range(bands)
+    ]
+
+
+def similarity(a: "np.ndarray", b: "np.ndarray") -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return float(np.count_nonzero(a == b)) / len(a)
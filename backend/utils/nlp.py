@@ -1,5 +1,48 @@
 import re
-from typing import List, Set
+from typing import Any, List, Set
+
+# Common English and job-posting filler words; they carry no signal for matching
+STOPWORDS: Set[str] = set("""
+a about above across after all also an and any are as at be been being both but by can could did do does
+each either etc for from had has have having he her here his how i if in into is it its just may me more
+most must my no not of on one or other our out over per same she should so some such than that the their
+them then there these they this those through to too under up us very via was we were what when where
+which while who whom why will with within without would you your
+ability able candidate candidates company experience job join looking opportunity plus position preferred
+required requirements responsibilities role skills strong team work working years
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+_TOKEN_CASED = re.compile(_TOKEN.pattern, re.IGNORECASE)
+_WS = re.compile(r"\s+")
+
+def tokenize(text: str, keep_case: bool = False) -> List[str]:
+    """Lowercased (or, with keep_case, as written) word tokens that keep tech spellings intact (node.js, c++, c#, ci/cd)."""
+    if keep_case:
+        return _TOKEN_CASED.findall(text or "")
+    return _TOKEN.findall((text or "").lower())
+
+def content_terms(text: str) -> List[str]:
+    """tokenize() minus stopwords and bare numbers."""
+    return [t for t in tokenize(text) if t not in STOPWORDS and not t.isdigit()]
+
+def canonical_skill(skill: str) -> str:
+    """Matching key for a skill: "Node.js", "node js" and "NodeJS" all become "nodejs"."""
+    return re.sub(r"[\s._-]+", "", str(skill).lower())
+
+def entry_text(entry: Any, field_sep: str = " ", item_sep: str = " ") -> str:
+    """A resume entry (string, object or list of them) as one line; objects keep their values, not their keys."""
+    if isinstance(entry, dict):
+        parts = (entry_text(v, field_sep, item_sep) for v in entry.values())
+        return field_sep.join(p for p in parts if p)
+    if isinstance(entry, list):
+        parts = (entry_text(v, field_sep, item_sep) for v in entry)
+        return item_sep.join(p for p in parts if p)
+    return _WS.sub(" ", str(entry)).strip() if entry else ""
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for prompt budgeting (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
 
 def normalize_skills(skills: List[str]) -> List[str]:
     """
@@ -24,14 +67,76 @@ def extract_jd_skills(jd_text: str) -> List[str]:
     """
     return []
 
+# Section headings of a JD: what the job involves vs. company/benefits/application boilerplate
+_JD_DUTY_HEADINGS = re.compile(
+    r"^(key |core |main |primary )?(responsibilit|dut|what you('| wi)ll (do|bring|work on)|what we('re| are) looking for|"
+    r"your (role|mission|impact)|the role|about the role|role overview|job description|requirement|qualification|"
+    r"must.have|nice.to.have|preferred|skills|experience|who you are|you will|tasks)"
+)
+_JD_BOILERPLATE_HEADINGS = re.compile(
+    r"^(about (us|the company|the team|[a-z]+$)|who we are|our (company|mission|story|culture)|benefits|perks|"
+    r"what we offer|compensation|salary|pay|how to apply|to apply|application|equal (opportunity|employment)|eeo|"
+    r"location|why (join|work)|diversity|disclaimer|apply by)"
+)
+_JD_SKILL_HEADINGS = re.compile(
+    r"^(key |core |required |technical |preferred )?(skills|tech(nical)? stack|technolog|tools|stack)"
+)
+
+def _jd_heading(line: str) -> str:
+    """Normalized heading text if `line` looks like a section heading, else ""."""
+    text = line.strip().strip("#*_=-•").strip().rstrip(":").strip().lower()
+    if not text or len(text.split()) > 6 or text.endswith("."):
+        return ""
+    if line.rstrip().endswith(":"):
+        return text
+    # Without a colon, only a known heading on a line of its own (not a "- Skills in ..." bullet)
+    known = _JD_DUTY_HEADINGS.match(text) or _JD_BOILERPLATE_HEADINGS.match(text) or _JD_SKILL_HEADINGS.match(text)
+    if line.lstrip()[:1] not in "-*•" and known:
+        return text
+    return ""
+
 def extract_jd_responsibilities(jd_text: str) -> str:
     """
     Extracts the core text representing responsibilities/experience requirements
-    from the JD.
+    from the JD: the lines under duty/requirement headings. Without such headings,
+    the whole JD minus company, benefits and application sections.
     """
-    # For now, return the whole text but strip out metadata at the top/bottom if possible.
-    # A more advanced version would use regex to find the "Responsibilities" section.
-    return jd_text
+    duties: List[str] = []
+    rest: List[str] = []
+    mode = None  # "duties", "boilerplate" or None (before any known heading)
+    for line in (jd_text or "").splitlines():
+        if not line.strip():
+            continue
+        heading = _jd_heading(line)
+        if heading:
+            if _JD_BOILERPLATE_HEADINGS.match(heading):
+                mode = "boilerplate"
+            elif _JD_DUTY_HEADINGS.match(heading):
+                mode = "duties"
+            # Unknown headings ("Tech stack:") keep the current section
+            continue
+        if mode == "duties":
+            duties.append(line.strip())
+        elif mode is None:
+            rest.append(line.strip())
+    if duties:
+        return "\n".join(duties)
+    return "\n".join(rest) if rest else (jd_text or "")
+
+def extract_jd_skill_section(jd_text: str) -> str:
+    """The lines under the JD's skills / tech stack headings ("" if it has none)."""
+    lines: List[str] = []
+    in_skills = False
+    for line in (jd_text or "").splitlines():
+        if not line.strip():
+            continue
+        heading = _jd_heading(line)
+        if heading:
+            in_skills = bool(_JD_SKILL_HEADINGS.match(heading))
+            continue
+        if in_skills:
+            lines.append(line.strip())
+    return "\n".join(lines)
 
 def extract_role_intent(jd_text: str) -> str:
     """
@@ -0,0 +1,101 @@
+import re
+from typing import Any, Dict, List, Tuple
+from utils.nlp import entry_text, estimate_tokens
+
+# Token budget per section of the encoded resume; entries past it are dropped
+SECTION_TOKEN_CAPS = {
+    "experience": 700,
+    "projects": 450,
+    "education": 150,
+    "skills": 200,
+}
+ENTRY_TOKEN_CAP = 160       # a single experience / project / education entry
+OTHER_SECTION_TOKEN_CAP = 80  # extra sections the parser may return (certifications, ...)
+
+# Order matters: skills come last so they can be deduped against the sections before them
+SECTION_ORDER = ("experience", "projects", "education", "skills")
+# Sections whose text stands in for a skill; a degree line naming one is not evidence of using it
+DEDUP_SECTIONS = ("experience", "projects")
+# Never relevant to scoring
+EXCLUDED_KEYS = {"personal_info"}
+# Shorter skills ("Go", "C", "R") are ordinary words or initials in prose, so they are always listed
+MIN_DEDUP_SKILL_LEN = 3
+
+_WS = re.compile(r"\s+")
+
+
+def _clean(text: Any) -> str:
+    return _WS.sub(" ", str(text)).strip()
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cuts text to about max_tokens at a word boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[: max_tokens * 4].rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;:.-") + "…"
+
+
+def _capped_lines(entries: List[Any], section_cap: int) -> Tuple[List[str], int]:
+    """Renders entries until the section budget is spent; returns (lines, dropped count)."""
+    lines, used = [], 0
+    for i, entry in enumerate(entries):
+        text = _truncate(entry_text(entry, " | ", "; "), min(ENTRY_TOKEN_CAP, section_cap))
+        if not text:
+            continue
+        cost = estimate_tokens(text) + 1
+        if lines and used + cost > section_cap:
+            return lines, len(entries) - i
+        lines.append(f"- {text}")
+        used += cost
+    return lines, 0
+
+
+def _mentioned(skill: str, text: str) -> bool:
+    if len(skill) < MIN_DEDUP_SKILL_LEN:
+        return False
+    return re.search(r"(?<!\w)" + re.escape(skill.lower()) + r"(?!\w)", text) is not None
+
+
+def encode_resume(resume_data: Dict[str, Any]) -> str:
+    """
+    Renders a structured resume as compact sectioned text for LLM prompts.
+
+    Compared to json.dumps(indent=2) this drops contact details, quotes,
+    braces and indentation, caps every section (SECTION_TOKEN_CAPS) and lists
+    under SKILLS only the skills not already visible in the experience and
+    project text, so the model still sees each skill exactly once. Skills
+    shorter than MIN_DEDUP_SKILL_LEN are always listed.
+    """
+    blocks, rendered = [], []
+    for key in SECTION_ORDER:
+        value = resume_data.get(key)
+        if not value:
+            continue
+        cap = SECTION_TOKEN_CAPS[key]
+        if key == "skills":
+            seen_text = " ".join(rendered).lower()
+            skills, seen = [], set()
+            for skill in value if isinstance(value, list) else [value]:
+                skill = _clean(skill)
+                if skill and skill.lower() not in seen and not _mentioned(skill, seen_text):
+                    seen.add(skill.lower())
+                    skills.append(skill)
+            if skills:
+                blocks.append("SKILLS: " + _truncate(", ".join(skills), cap))
+            continue
+        lines, dropped = _capped_lines(value if isinstance(value, list) else [value], cap)
+        if dropped:
+            lines.append(f"- (+{dropped} more)")
+        if key in DEDUP_SECTIONS:
+            rendered.extend(lines)
+        blocks.append(f"{key.upper()}:\n" + "\n".join(lines))
+
+    for key, value in resume_data.items():
+        if key in SECTION_ORDER or key in EXCLUDED_KEYS or not value:
+            continue
+        entries = value if isinstance(value, list) else [value]
+        text = _truncate("; ".join(t for t in (entry_text(e, " | ", "; ") for e in entries) if t), OTHER_SECTION_TOKEN_CAP)
+        if text:
+            blocks.append(f"{str(key).upper()}: {text}")
+    return "\n".join(blocks)
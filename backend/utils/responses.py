@@ -0,0 +1,32 @@
+import json
+from typing import Any
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib encoder
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes; pydantic models serialize through their own (Rust) encoder."""
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode("utf-8")
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson (when installed) instead of json.dumps,
+    for routes that return plain dicts (reports, stats, event payloads).
+
+    Routes with a response_model should keep the default response class:
+    FastAPI then serializes the validated model straight to bytes through
+    pydantic, which no custom class can beat and which a custom class disables.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,147 @@
+"""
+Offline text similarity: hashed n-gram TF-IDF vectors and batched cosine.
+
+Texts are turned into word uni/bigrams plus character 3-5 grams (taken
+inside word boundaries, so "postgres" still overlaps "postgresql" and
+"deployed" overlaps "deployment"), hashed into a fixed number of signed
+buckets, weighted by sublinear tf times an idf fitted on the texts being
+compared, and L2-normalized. Cosine similarity between every query and
+every document is then a matrix product (done in fixed-size blocks, so
+memory stays flat), and scoring one pair or a few thousand goes through
+the same code path.
+"""
+import zlib
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+from utils.nlp import content_terms
+from utils.startup import LazyModule
+
+np = LazyModule("numpy")
+
+# 2^14 buckets keep a dense float32 row at 64 KB; collisions are rare for resume-sized texts
+DEFAULT_DIM = 1 << 14
+CHAR_NGRAMS = (3, 5)
+WORD_NGRAMS = (1, 2)
+# Word features are rarer and more specific than character features
+WORD_WEIGHT = 2.0
+# Rows densified at a time when scoring large batches (~16 MB per block at the default dim)
+BLOCK_ROWS = 256
+
+
+@lru_cache(maxsize=1 << 16)
+def _bucket(feature: str, dim: int) -> Tuple[int, float]:
+    """Stable (bucket, sign) for a feature; the sign makes collisions cancel out on average."""
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % dim, (1.0 if h & 0x80000000 else -1.0)
+
+
+def _features(text: str) -> List[Tuple[str, float]]:
+    words = content_terms(text)
+    out: List[Tuple[str, float]] = []
+    lo, hi = WORD_NGRAMS
+    for n in range(lo, hi + 1):
+        for i in range(len(words) - n + 1):
+            out.append(("w:" + " ".join(words[i:i + n]), WORD_WEIGHT))
+    lo, hi = CHAR_NGRAMS
+    for word in words:
+        padded = f" {word} "
+        for n in range(lo, hi + 1):
+            for i in range(len(padded) - n + 1):
+                out.append(("c:" + padded[i:i + n], 1.0))
+    return out
+
+
+def _weights(texts: Sequence[str], dim: int) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Sparse (rows, cols, values) of the L2-normalized TF-IDF matrix of `texts`,
+    with the idf fitted on `texts` themselves. Rows are sorted.
+    """
+    rows: List[int] = []
+    cols: List[int] = []
+    vals: List[float] = []
+    for row, text in enumerate(texts):
+        for feature, weight in _features(text or ""):
+            col, sign = _bucket(feature, dim)
+            rows.append(row)
+            cols.append(col)
+            vals.append(sign * weight)
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+    # Sum the signed counts of each (row, bucket) without materializing the dense matrix
+    keys, inverse = np.unique(np.asarray(rows, dtype=np.int64) * dim + np.asarray(cols, dtype=np.int64), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.asarray(vals, dtype=np.float64))
+    keep = counts != 0
+    keys, counts = keys[keep], counts[keep]
+    rows_, cols_ = keys // dim, keys % dim
+
+    tf = np.sign(counts) * np.log1p(np.abs(counts))
+    df = np.bincount(cols_, minlength=dim)
+    idf = np.log((1 + len(texts)) / (1 + df)) + 1.0
+    values = tf * idf[cols_]
+    norms = np.sqrt(np.bincount(rows_, weights=values * values, minlength=len(texts)))
+    return rows_, cols_, (values / norms[rows_]).astype(np.float32)
+
+
+def _dense(weights, start: int, stop: int, dim: int) -> "np.ndarray":
+    """Rows start..stop of the sparse matrix from _weights() as a dense block."""
+    rows, cols, vals = weights
+    lo, hi = np.searchsorted(rows, [start, stop])
+    block = np.zeros((stop - start, dim), dtype=np.float32)
+    block[rows[lo:hi] - start, cols[lo:hi]] = vals[lo:hi]
+    return block
+
+
+def vectorize(texts: Sequence[str], dim: int = DEFAULT_DIM) -> "np.ndarray":
+    """
+    (len(texts), dim) float32 matrix of L2-normalized TF-IDF rows. The idf is
+    fitted on `texts` themselves, so vectorize everything that is compared in
+    one call. Empty texts give all-zero rows (similarity 0 to anything).
+    """
+    return _dense(_weights(texts, dim), 0, len(texts), dim)
+
+
+def cosine_matrix(queries: Sequence[str], documents: Sequence[str], dim: int = DEFAULT_DIM) -> "np.ndarray":
+    """(len(queries), len(documents)) cosine similarities in [0, 1]; documents are densified in blocks."""
+    n_q, n_d = len(queries), len(documents)
+    sims = np.zeros((n_q, n_d), dtype=np.float32)
+    if not n_q or not n_d:
+        return sims
+    weights = _weights([*queries, *documents], dim)
+    q = _dense(weights, 0, n_q, dim)
+    for start in range(0, n_d, BLOCK_ROWS):
+        stop = min(n_d, start + BLOCK_ROWS)
+        sims[:, start:stop] = q @ _dense(weights, n_q + start, n_q + stop, dim).T
+    # Signed hashing can push unrelated texts slightly below zero
+    return np.clip(sims, 0.0, 1.0)
+
+
+def pairwise(left: Sequence[str], right: Sequence[str], dim: int = DEFAULT_DIM) -> "np.ndarray":
+    """Cosine similarity of left[i] with right[i] for every i, computed block by block."""
+    if len(left) != len(right):
+        raise ValueError("pairwise() needs two sequences of the same length")
+    n = len(left)
+    sims = np.zeros(n, dtype=np.float32)
+    if not n:
+        return sims
+    weights = _weights([*left, *right], dim)
+    for start in range(0, n, BLOCK_ROWS):
+        stop = min(n, start + BLOCK_ROWS)
+        a = _dense(weights, start, stop, dim)
+        b = _dense(weights, n + start, n + stop, dim)
+        sims[start:stop] = np.einsum("ij,ij->i", a, b)
+    return np.clip(sims, 0.0, 1.0)
+
+
+def relevance_score(similarities: "np.ndarray", floor: float = 0.05, ceiling: float = 0.35) -> float:
+    """
+    Maps the similarities of several entries to one 0-100 score: the best
+    entry counts most, the next two strong ones add breadth. Similarities at
+    or below `floor` score 0, at or above `ceiling` score 100.
+    """
+    if similarities is None or len(similarities) == 0:
+        return 0.0
+    ranked = np.sort(np.asarray(similarities, dtype=np.float64))[::-1]
+    blended = 0.7 * float(ranked[0]) + 0.3 * float(ranked[:3].mean())
+    scaled = (blended - floor) / (ceiling - floor)
+    return round(100.0 * min(1.0, max(0.0, scaled)), 1)
@@ -0,0 +1,17 @@
+import os
+import sqlite3
+
+
+def connect(path: str, schema: str) -> sqlite3.Connection:
+    """
+    Opens a SQLite database for the local stores (jobs, uploads...): autocommit,
+    WAL so several uvicorn workers can share the file, rows as sqlite3.Row.
+    The schema script must be idempotent (CREATE ... IF NOT EXISTS).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(schema)
+    return conn
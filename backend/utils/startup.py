@@ -0,0 +1,150 @@
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger("backend")
+
+
+def _process_started_at() -> float:
+    """Wall-clock time the interpreter process started (falls back to now)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 is the start time in clock ticks after boot; the command name may contain spaces
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+class StartupProfiler:
+    """
+    Records how long module imports and client initializers take, and when
+    the app reached its startup milestones. Each entry is tagged with the
+    phase it ran in: "startup" (before the app was ready), "warmup" (the
+    background warm-up task) or "lazy" (first use by a request).
+    """
+
+    def __init__(self):
+        self.process_started_at = _process_started_at()
+        self._entries: List[Dict[str, Any]] = []
+        self._milestones: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.ready = False
+
+    def _since_start_ms(self) -> float:
+        return round((time.time() - self.process_started_at) * 1000, 1)
+
+    @property
+    def phase(self) -> str:
+        if getattr(self._local, "warmup", False):
+            return "warmup"
+        return "lazy" if self.ready else "startup"
+
+    @contextmanager
+    def timed(self, kind: str, name: str):
+        """Times the enclosed block as an "import" or "initializer" entry."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {
+                "kind": kind,
+                "name": name,
+                "ms": round((time.perf_counter() - t0) * 1000, 1),
+                "phase": self.phase,
+                "at_ms": self._since_start_ms(),
+            }
+            with self._lock:
+                self._entries.append(entry)
+
+    @contextmanager
+    def warming_up(self):
+        """Tags everything timed in this thread as background warm-up."""
+        self._local.warmup = True
+        try:
+            yield
+        finally:
+            self._local.warmup = False
+
+    def import_module(self, name: str):
+        if name in sys.modules:
+            return sys.modules[name]
+        with self.timed("import", name):
+            return importlib.import_module(name)
+
+    def mark(self, milestone: str):
+        """Records a milestone once (time since process start)."""
+        with self._lock:
+            self._milestones.setdefault(milestone, self._since_start_ms())
+        if milestone == "app_ready":
+            self.ready = True
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = sorted(self._entries, key=lambda e: e["ms"], reverse=True)
+            milestones = dict(self._milestones)
+        totals: Dict[str, float] = {}
+        for e in entries:
+            key = f"{e['phase']}_{e['kind']}s_ms"
+            totals[key] = round(totals.get(key, 0) + e["ms"], 1)
+        return {
+            "uptime_s": round(time.time() - self.process_started_at, 1),
+            "milestones_ms": milestones,
+            "totals": totals,
+            "imports": [e for e in entries if e["kind"] == "import"],
+            "initializers": [e for e in entries if e["kind"] == "initializer"],
+        }
+
+
+startup_profile = StartupProfiler()
+
+
+class LazyModule:
+    """
+    Stand-in for a heavy module that is imported on first attribute access,
+    e.g. `pdfplumber = LazyModule("pdfplumber")` at module level.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = startup_profile.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def warm_up(modules: List[str], initializers: List[Callable[[], Any]]):
+    """
+    Imports heavy modules and runs client initializers ahead of first use.
+    Meant for a background thread once the server is accepting requests;
+    failures are logged and left for the first real request to surface.
+    """
+    with startup_profile.warming_up():
+        for name in modules:
+            try:
+                startup_profile.import_module(name)
+            except Exception as e:
+                logger.warning(f"Warm-up import of {name} failed: {e}")
+        for init in initializers:
+            try:
+                init()
+            except Exception as e:
+                logger.warning(f"Warm-up initializer {getattr(init, '__name__', init)} failed: {e}")
+    startup_profile.mark("warmup_done")
@@ -294,18 +294,16 @@ export const Interview: React.FC = () => {
 
     const fetchNextMessage = async (currentHistory: Message[]) => {
         try {
+            const resume = parsedResumeRef.current;
+            // The parser returns plain strings; older cached results may hold objects
+            const asText = (items: any[] | undefined, format: (e: any) => string) =>
+                (items || []).map((e: any) => typeof e === 'string' ? e : format(e));
             const payload = {
-                personal_info: parsedResumeRef.current.personal_information,
-                skills: parsedResumeRef.current.skills || [],
-                education: parsedResumeRef.current.education
-                    ? parsedResumeRef.current.education.map((e: any) => `${e.degree || ''} at ${e.institution || ''}`.trim())
-                    : [],
-                experience: parsedResumeRef.current.work_experience
-                    ? parsedResumeRef.current.work_experience.map((e: any) => `${e.job_title || ''} at ${e.company || ''}`.trim())
-                    : [],
-                projects: parsedResumeRef.current.projects
-                    ? parsedResumeRef.current.projects.map((p: any) => p.name || '')
-                    : [],
+                personal_info: resume.personal_info || resume.personal_information,
+                skills: resume.skills || [],
+                education: asText(resume.education, (e: any) => `${e.degree || ''} at ${e.institution || ''}`.trim()),
+                experience: asText(resume.experience || resume.work_experience, (e: any) => `${e.job_title || ''} at ${e.company || ''}`.trim()),
+                projects: asText(resume.projects, (p: any) => p.name || ''),
                 jd: jdTextRef.current,
                 history: currentHistory.map(m => ({ role: m.role, content: m.content }))
             };